@@ -0,0 +1,182 @@
+# batch.py
+# Headless batch processing: normalizes and plots many datasets without opening any window.
+#
+# Example:
+#   python batch.py datasets/ -o results/ --method lobanov --ellipse --workers 8
+#
+# Every dataset gets a normalized table (<name>.csv or .xlsx) and a plot (<name>.png) in the output folder.
+# Files are spread across a process pool, and only matplotlib's Agg backend is used (no QApplication).
+#
+# Formants can also be extracted from a folder of recordings into one table that VowSpace can import:
+#   python batch.py extract recordings/ -o formants.csv --workers 8
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.data_io import read_dataset, DATASET_EXTENSIONS
+from core.normalization import METHODS, derive_columns, plot_columns
+from core.plotting import plot_vowel_space
+
+
+# Expands the given files and folders into a sorted list of dataset files
+def find_datasets(inputs):
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(DATASET_EXTENSIONS) and not name.startswith('~$'):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+# Normalizes one dataset and writes its table and plot. Runs inside a worker process.
+def process_file(file_name, output_dir, settings):
+    data = read_dataset(file_name)
+    method = settings['method']
+    x_column, y_column = settings['x'], settings['y']
+
+    if method:
+        formants = ['f1', 'f2', 'f3'] if method == 'bark_difference' else [x_column, y_column]
+        derived = derive_columns(data, method, formants)
+        for column in derived.columns:
+            data[column] = derived[column].to_numpy()
+
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    outputs = []
+
+    table_name = os.path.join(output_dir, f"{stem}.{settings['table_format']}")
+    if settings['table_format'] == 'xlsx':
+        data.to_excel(table_name, index=False, sheet_name='Sheet1', engine='openpyxl')
+    else:
+        data.to_csv(table_name, index=False)
+    outputs.append(table_name)
+
+    plot_x, plot_y = plot_columns(method, x_column, y_column)
+    if plot_x not in data.columns or plot_y not in data.columns:
+        raise ValueError(f"Selected column(s) '{plot_x}' or '{plot_y}' do not exist in the dataset.")
+
+    figure = Figure(figsize=(8, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    messages = plot_vowel_space(ax, data, plot_x, plot_y, **settings['plot_options'])
+    figure.tight_layout()
+
+    plot_name = os.path.join(output_dir, f"{stem}.{settings['image_format']}")
+    figure.savefig(plot_name, format=settings['image_format'], dpi=settings['dpi'])
+    outputs.append(plot_name)
+
+    return outputs, messages
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize and plot vowel datasets without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="dataset files or folders containing datasets")
+    parser.add_argument('-o', '--output', required=True, help="folder for the normalized tables and plots")
+    parser.add_argument('--method', choices=sorted(METHODS), default=None,
+                        help="normalization or scale conversion to apply (default: raw values)")
+    parser.add_argument('--x', default='f1', help="formant on the vertical axis (default: f1)")
+    parser.add_argument('--y', default='f2', help="formant on the horizontal axis (default: f2)")
+    parser.add_argument('--group-by', choices=['speaker', 'vowel'], default='speaker')
+    parser.add_argument('--ellipse', action='store_true', help="connect groups with ellipses")
+    parser.add_argument('--qhull', action='store_true', help="connect groups with convex hulls")
+    parser.add_argument('--center-labels', action='store_true', help="label the centre of each ellipse/hull")
+    parser.add_argument('--legend', action='store_true')
+    parser.add_argument('--grid', action='store_true')
+    parser.add_argument('--title', default=None)
+    parser.add_argument('--table-format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--image-format', choices=['png', 'jpeg', 'pdf', 'svg'], default='png')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=None, help="number of processes (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def parse_extract_arguments(argv):
+    parser = argparse.ArgumentParser(prog='batch.py extract',
+                                     description="Extract f0-f4 and intensity from audio files without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="audio files or folders containing audio files")
+    parser.add_argument('-o', '--output', required=True, help="table to write (.csv or .xlsx)")
+    parser.add_argument('--workers', type=int, default=None, help="number of processes (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def extract_main(argv):
+    # Imported here so plotting-only runs don't need parselmouth
+    from core.audio_analysis import extract_corpus
+
+    args = parse_extract_arguments(argv)
+
+    def report(done, total, file_name, error):
+        if error:
+            print(f"[{done}/{total}] {file_name} FAILED: {error}", file=sys.stderr)
+        else:
+            print(f"[{done}/{total}] {file_name}")
+
+    table, failures = extract_corpus(args.inputs, max_workers=args.workers, progress=report)
+    if args.output.lower().endswith('.xlsx'):
+        table.to_excel(args.output, index=False, sheet_name='Sheet1', engine='openpyxl')
+    else:
+        table.to_csv(args.output, index=False)
+
+    print(f"Wrote {len(table)} frame(s) to {args.output}; {len(failures)} file(s) failed.")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'extract':
+        return extract_main(argv[1:])
+
+    args = parse_arguments(argv)
+    files = find_datasets(args.inputs)
+    if not files:
+        print("No datasets found.", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    settings = {
+        'method': args.method,
+        'x': args.x,
+        'y': args.y,
+        'table_format': args.table_format,
+        'image_format': args.image_format,
+        'dpi': args.dpi,
+        'plot_options': {
+            'group_by': args.group_by,
+            'ellipse': args.ellipse,
+            'qhull': args.qhull,
+            'center_labels': args.center_labels,
+            'show_legend': args.legend,
+            'show_grid': args.grid,
+            'title': args.title,
+        },
+    }
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(process_file, file_name, args.output, settings): file_name for file_name in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            file_name = futures[future]
+            try:
+                outputs, messages = future.result()
+                print(f"[{done}/{len(files)}] {file_name} -> {', '.join(outputs)}")
+                for message in messages:
+                    print(f"    {message}")
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(files)}] {file_name} FAILED: {e}", file=sys.stderr)
+
+    print(f"Processed {len(files) - failures} of {len(files)} dataset(s).")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,472 @@
+# benchmark.py
+# Performance benchmarks for the startup, the normalizations, the scatterplot and the Audio Analysis Tools.
+#
+# Example:
+#   python benchmark.py -o results.json
+#   python benchmark.py --quick -o results.json --compare baseline.json
+#
+# Synthetic vowel datasets (1e3 to 1e6 tokens, 10 to 10,000 speakers) and synthetic recordings are generated
+# on the fly, so runs on different commits measure the same work. Every timing goes to a JSON file together
+# with the commit and the library versions; --compare reports the cases that got slower than in an older file
+# (and exits with status 1 if any did), so the script can guard against regressions in CI.
+# The windows are created on Qt's offscreen platform, so no display is needed.
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_FORMAT = 'vowspace-benchmark'
+BENCHMARK_VERSION = 1
+GROUPS = ('startup', 'normalization', 'plot', 'audio')
+
+# Modules that the main window should only load when they're first needed
+DEFERRED_MODULES = ('scipy', 'openpyxl', 'parselmouth', 'matplotlib.pyplot', 'components.audio_tool',
+                    'components.df_editor')
+
+# Starts the main window in a new interpreter and prints how long the imports and showing the window took,
+# and which of the deferred modules were loaded anyway
+STARTUP_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from vowel_space_visualizer import VowelSpaceVisualizer
+imported = time.perf_counter()
+app = QApplication(sys.argv[:1])
+window = VowelSpaceVisualizer()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({'imports': imported - started, 'window_shown': shown - started,
+                  'loaded': [name for name in %r if name in sys.modules]}))
+''' % (DEFERRED_MODULES,)
+
+# Average formants (Hz) of American English vowels, after Peterson & Barney (1952); f4 is a rough value
+VOWEL_FORMANTS = {
+    '/i/': (270, 2290, 3010, 3700), '/ɪ/': (390, 1990, 2550, 3600), '/ɛ/': (530, 1840, 2480, 3600),
+    '/æ/': (660, 1720, 2410, 3500), '/ɑ/': (730, 1090, 2440, 3500), '/ɔ/': (570, 840, 2410, 3400),
+    '/ʊ/': (440, 1020, 2240, 3400), '/u/': (300, 870, 2240, 3400), '/ʌ/': (640, 1190, 2390, 3500),
+    '/ɝ/': (490, 1350, 1690, 3300),
+}
+
+FULL_SIZES = {'tokens': [1000, 10000, 100000, 1000000], 'speakers': [10, 100, 1000, 10000],
+              'plot_tokens': [1000, 10000, 100000], 'durations': [10.0, 60.0, 300.0]}
+QUICK_SIZES = {'tokens': [1000, 10000], 'speakers': [10, 100], 'plot_tokens': [1000], 'durations': [5.0]}
+
+
+# Vowel tokens with every speaker's formants scaled by their own vocal tract length, the way real
+# speakers differ, so the per-speaker normalizations have something to do
+def synthetic_dataset(n_tokens, n_speakers, seed=0):
+    rng = np.random.default_rng(seed)
+    vowels = list(VOWEL_FORMANTS)
+    means = np.array([VOWEL_FORMANTS[vowel] for vowel in vowels], dtype=float)
+
+    vowel_codes = rng.integers(len(vowels), size=n_tokens)
+    speaker_codes = np.arange(n_tokens) % n_speakers  # every speaker has about the same number of tokens
+    rng.shuffle(speaker_codes)
+    scale = rng.lognormal(0.0, 0.1, size=n_speakers)
+    pitch = rng.uniform(90, 260, size=n_speakers)
+
+    formants = means[vowel_codes] * scale[speaker_codes, None] * rng.normal(1.0, 0.05, size=(n_tokens, 4))
+    speakers = [f"speaker{i:05d}" for i in range(n_speakers)]
+    return pd.DataFrame({
+        'vowel': pd.Categorical.from_codes(vowel_codes, vowels),
+        'f0': pitch[speaker_codes] * rng.normal(1.0, 0.05, size=n_tokens),
+        'f1': formants[:, 0],
+        'f2': formants[:, 1],
+        'f3': formants[:, 2],
+        'f4': formants[:, 3],
+        'speaker': pd.Categorical.from_codes(speaker_codes, speakers),
+    })
+
+
+# A 16-bit mono WAV of sustained vowels (harmonics shaped by the vowel's formants) separated by short pauses,
+# so there are voiced and unvoiced frames for the pitch, intensity and formant analyses
+def synthetic_audio(file_name, duration, sampling_frequency=44100, seed=0):
+    rng = np.random.default_rng(seed)
+    vowels = list(VOWEL_FORMANTS.values())
+    segment = int(0.3 * sampling_frequency)
+    pause = int(0.1 * sampling_frequency)
+    n_samples = int(duration * sampling_frequency)
+    bandwidths = np.array([80.0, 100.0, 150.0, 200.0])
+
+    with wave.open(file_name, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sampling_frequency)
+        written = 0
+        while written < n_samples:
+            f0 = rng.uniform(100, 220)
+            formants = np.array(vowels[rng.integers(len(vowels))], dtype=float)
+            harmonics = np.arange(1, int(5000 / f0) + 1) * f0
+            gains = (1.0 / (1.0 + ((harmonics[:, None] - formants) / bandwidths) ** 2)).sum(axis=1) / harmonics
+            t = np.arange(segment) / sampling_frequency
+            signal = (gains[:, None] * np.sin(2 * np.pi * harmonics[:, None] * t)).sum(axis=0)
+            signal *= np.hanning(segment) / np.abs(signal).max()
+            signal = np.concatenate([signal, np.zeros(pause)]) + rng.normal(0, 0.002, size=segment + pause)
+            block = signal[:n_samples - written]
+            wav.writeframes((np.clip(block, -1, 1) * 0.8 * 32767).astype('<i2').tobytes())
+            written += len(block)
+    return file_name
+
+
+# Runs function up to repeat times (fewer once max_seconds have been spent) and returns the timings.
+# setup runs before every call, outside the timing, and its result is passed to function.
+def measure(function, setup=None, repeat=5, max_seconds=10.0):
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat and (not timings or time.perf_counter() - started < max_seconds):
+        argument = setup() if setup is not None else None
+        t0 = time.perf_counter()
+        function(argument) if setup is not None else function()
+        timings.append(time.perf_counter() - t0)
+    return summarize(timings)
+
+
+def summarize(timings):
+    timings = np.array(timings)
+    return {'runs': len(timings), 'min': float(timings.min()), 'median': float(np.median(timings)),
+            'mean': float(timings.mean()), 'max': float(timings.max())}
+
+
+class Benchmark:
+    def __init__(self, repeat=5, max_seconds=10.0, verbose=True):
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.verbose = verbose
+        self.results = []
+
+    def run(self, group, name, params, function, setup=None, repeat=None):
+        timing = measure(function, setup, repeat or self.repeat, self.max_seconds)
+        return self.add(group, name, params, timing)
+
+    # Adds timings measured elsewhere (e.g. inside another process)
+    def add(self, group, name, params, timing):
+        self.results.append({'group': group, 'name': name, 'params': params, **timing})
+        if self.verbose:
+            described = ', '.join(f"{key}={value}" for key, value in params.items())
+            print(f"{group:<14} {name:<40} {described:<40} {timing['median'] * 1000:10.2f} ms "
+                  f"({timing['runs']} runs)", flush=True)
+        return timing
+
+
+# Cold start of the main window, each run in a fresh interpreter
+def run_startup(benchmark):
+    folder = os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    runs = []
+
+    def start():
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=folder, env=environment,
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    benchmark.run('startup', 'process', {}, start)
+    for stage in ('imports', 'window_shown'):
+        benchmark.add('startup', stage, {}, summarize([run[stage] for run in runs]))
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    if loaded:
+        print(f"Warning: loaded at startup: {', '.join(loaded)}", file=sys.stderr)
+
+
+# Dataset sizes to run: every combination with at least ten tokens per speaker
+def dataset_sizes(tokens, speakers):
+    return [(n_tokens, n_speakers) for n_tokens in tokens for n_speakers in speakers
+            if n_speakers * 10 <= n_tokens]
+
+
+# Every function of core/normalization.py, with the arguments to call it with on a dataset
+def normalization_cases(df):
+    from core import normalization
+
+    formants = ['f1', 'f2']
+    codes, n_groups = normalization.group_codes(df)
+    values = df[formants].to_numpy()
+    stats = normalization.grouped_stats(df, formants)
+    f1 = df['f1'].to_numpy()
+
+    cases = {
+        'group_codes': lambda _: normalization.group_codes(df),
+        'grouped_sum': lambda _: normalization.grouped_sum(codes, n_groups, values),
+        'grouped_stats': lambda _: normalization.grouped_stats(df, formants),
+        'broadcast_to_rows': lambda _: normalization.broadcast_to_rows(stats, stats['mean']),
+        'lobanov_normalization': lambda fresh: normalization.lobanov_normalization(fresh, formants),
+        'bark_difference': lambda fresh: normalization.bark_difference(fresh),
+        'nearey1': lambda fresh: normalization.nearey1(fresh, formants),
+        'nearey2': lambda fresh: normalization.nearey2(fresh, formants),
+        'bark': lambda _: normalization.bark(f1),
+        'mel': lambda _: normalization.mel(f1),
+        'erb': lambda _: normalization.erb(f1),
+        'bark_transform': lambda fresh: normalization.bark_transform(fresh, formants),
+        'log_transform': lambda fresh: normalization.log_transform(fresh, formants),
+        'mel_transform': lambda fresh: normalization.mel_transform(fresh, formants),
+        'erb_transform': lambda fresh: normalization.erb_transform(fresh, formants),
+        'plot_columns': lambda _: [normalization.plot_columns(method, 'f1', 'f2') for method in normalization.METHODS],
+        'method_dependencies': lambda _: [normalization.method_dependencies(method, formants)
+                                          for method in normalization.METHODS],
+    }
+    for method in normalization.METHODS:
+        method_formants = ['f1', 'f2', 'f3'] if method == 'bark_difference' else formants
+        cases[f"derive_columns[{method}]"] = \
+            lambda fresh, method=method, method_formants=method_formants: \
+            normalization.derive_columns(fresh, method, method_formants)
+
+    # A new function in the module should get a case here too
+    covered = {name.split('[')[0] for name in cases}
+    functions = {name for name, value in vars(normalization).items()
+                 if inspect.isfunction(value) and value.__module__ == normalization.__name__}
+    for name in sorted(functions - covered):
+        print(f"Warning: core.normalization.{name} has no benchmark.", file=sys.stderr)
+    return cases
+
+
+def run_normalization(benchmark, sizes):
+    for n_tokens, n_speakers in dataset_sizes(sizes['tokens'], sizes['speakers']):
+        df = synthetic_dataset(n_tokens, n_speakers)
+        params = {'tokens': n_tokens, 'speakers': n_speakers}
+        for name, function in normalization_cases(df).items():
+            # Each call gets its own copy, since the normalizations add columns to the frame they're given
+            benchmark.run('normalization', name, params, function, setup=df.copy)
+
+
+# The Qt application for the window benchmarks, on the offscreen platform unless another one was asked for.
+# Error dialogs would wait for a click that never comes, so they raise instead.
+def qt_application():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+
+    def raise_error(parent, title, text, *args, **kwargs):
+        raise RuntimeError(text)
+
+    QMessageBox.critical = staticmethod(raise_error)
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+# update_scatterplot() for every combination of ellipses, hulls and labels (all three label options), drawn
+# right away. "cold" starts without any cached ellipse or hull, "warm" redraws with the cache filled.
+def run_plot(benchmark, sizes):
+    app = qt_application()
+    from core.geometry import GroupGeometry
+    from vowel_space_visualizer import VowelSpaceVisualizer
+
+    window = VowelSpaceVisualizer()
+    window.resize(1200, 800)
+    window.show()
+    app.processEvents()
+    labels = [window.checkbox_show_labels_f, window.checkbox_show_labels_vowel, window.checkbox_show_labels_speaker]
+
+    def redraw(_=None):
+        window.update_scatterplot()
+        window.flush_render()
+
+    def cold():
+        window.vowel_plot.geometry = GroupGeometry()
+
+    try:
+        for n_tokens, n_speakers in dataset_sizes(sizes['plot_tokens'], sizes['speakers']):
+            window.data = synthetic_dataset(n_tokens, n_speakers)
+            window.derived_cache.invalidate_rows()
+            for ellipse in (False, True):
+                for qhull in (False, True):
+                    for label in (False, True):
+                        window.connect_ellipse_action.setChecked(ellipse)
+                        window.connect_qhull_action.setChecked(qhull)
+                        for action in labels:
+                            action.setChecked(label)
+                        params = {'tokens': n_tokens, 'speakers': n_speakers,
+                                  'ellipse': ellipse, 'qhull': qhull, 'labels': label}
+                        benchmark.run('plot', 'update_scatterplot[cold]', params, redraw, setup=cold)
+                        benchmark.run('plot', 'update_scatterplot[warm]', params, redraw)
+    finally:
+        window.close()
+        app.processEvents()
+
+
+# The analyses behind the Audio Analysis Tools (each on a fresh entry, so nothing comes from the cache),
+# a file load up to the drawn spectrogram, and the drawing paths of the window
+def run_audio(benchmark, sizes, sampling_frequency, folder):
+    app = qt_application()
+    from core.audio_analysis import AnalysisEntry, analysis_cache
+    from components.audio_tool import AudioAnalysisTool
+
+    tool = AudioAnalysisTool()
+    tool.resize(1200, 600)
+    tool.show()
+    app.processEvents()
+
+    def wait_for_analyses(timeout=3600):
+        started = time.perf_counter()
+        while (tool.pending or tool.spectrogram_ax is None) and time.perf_counter() - started < timeout:
+            app.processEvents()
+            time.sleep(0.001)
+
+    try:
+        for duration in sizes['durations']:
+            file_name = synthetic_audio(os.path.join(folder, f"synthetic-{duration:g}s.wav"), duration,
+                                        sampling_frequency)
+            params = {'duration': duration, 'sampling_frequency': sampling_frequency}
+
+            for kind in ('spectrogram', 'envelope', 'spectrogram_pyramid', 'pitch', 'intensity', 'formant_matrix'):
+                def fresh_entry(kind=kind):
+                    entry = AnalysisEntry(file_name)
+                    if kind == 'spectrogram_pyramid':
+                        entry.get('spectrogram')  # only the pyramid is timed
+                    return entry
+                benchmark.run('audio', f"analysis[{kind}]", params, lambda entry, kind=kind: entry.get(kind),
+                              setup=fresh_entry, repeat=3)
+
+            def load(_):
+                tool.load_audio_file(file_name)
+                wait_for_analyses()
+
+            benchmark.run('audio', 'load_audio_file', params, load, setup=analysis_cache.clear, repeat=3)
+
+            # With the file loaded and every overlay computed
+            tool.pitch_action.setChecked(True)
+            tool.intensity_action.setChecked(True)
+            tool.show_pitch = tool.show_intensity = True
+            for action in tool.formant_actions:
+                action.setChecked(True)
+            tool.redraw_plots()
+            wait_for_analyses()
+            app.processEvents()
+
+            def draw(_=None):
+                tool.spectrogram_ax = None  # as for a newly loaded file
+                tool.draw_spectrogram()
+                tool.redraw_plots()
+                app.processEvents()
+
+            def zoom(_=None):
+                start = tool.analysis.source.start_time
+                tool.spectrogram_ax.set_xlim(start + 1.0, start + 2.0)  # level of detail follows the view
+                tool.spectrogram_ax.set_xlim(start, start + tool.analysis.source.duration)
+                tool.canvas.draw()
+
+            benchmark.run('audio', 'draw_spectrogram', params, draw)
+            benchmark.run('audio', 'update_overlays', params, tool.update_overlays)
+            benchmark.run('audio', 'zoom', params, zoom)
+
+            tool.pitch_action.setChecked(False)
+            tool.intensity_action.setChecked(False)
+            tool.show_pitch = tool.show_intensity = False
+            for action in tool.formant_actions:
+                action.setChecked(False)
+            analysis_cache.clear()
+    finally:
+        tool.close()
+        app.processEvents()
+
+
+def environment():
+    import matplotlib
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=30,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+# Compares the medians with an older results file. Returns the cases that got slower than threshold times.
+def compare(results, baseline, threshold):
+    def key(result):
+        return result['group'], result['name'], json.dumps(result['params'], sort_keys=True)
+
+    previous = {key(result): result for result in baseline['results']}
+    slower = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None or old['median'] <= 0:
+            continue
+        ratio = result['median'] / old['median']
+        if ratio > threshold:
+            slower.append((result, old, ratio))
+    return slower
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Time the startup, the normalizations, the scatterplot and the audio "
+                                                 "analysis on synthetic data and write the results as JSON.")
+    parser.add_argument('-o', '--output', default='benchmark-results.json', help="JSON file for the results")
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS), help="benchmarks to run")
+    parser.add_argument('--quick', action='store_true', help="small sizes only, for a fast check")
+    parser.add_argument('--tokens', type=int, nargs='+', help="dataset sizes for the normalizations")
+    parser.add_argument('--speakers', type=int, nargs='+', help="numbers of speakers")
+    parser.add_argument('--plot-tokens', type=int, nargs='+', help="dataset sizes for the scatterplot")
+    parser.add_argument('--durations', type=float, nargs='+', help="lengths of the recordings in seconds")
+    parser.add_argument('--sampling-frequency', type=int, default=44100, help="of the recordings (default: 44100)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case (default: 5)")
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help="stop repeating a case after this many seconds (default: 10)")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="a case is reported as slower when its median grows by this factor (default: 1.25)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    sizes = dict(QUICK_SIZES if args.quick else FULL_SIZES)
+    for name in ('tokens', 'speakers', 'plot_tokens', 'durations'):
+        if getattr(args, name) is not None:
+            sizes[name] = getattr(args, name)
+
+    benchmark = Benchmark(args.repeat, args.max_seconds)
+    if 'startup' in args.groups:
+        run_startup(benchmark)
+    if 'normalization' in args.groups:
+        run_normalization(benchmark, sizes)
+    if 'plot' in args.groups:
+        run_plot(benchmark, sizes)
+    if 'audio' in args.groups:
+        with tempfile.TemporaryDirectory() as folder:
+            run_audio(benchmark, sizes, args.sampling_frequency, folder)
+
+    output = {
+        'format': BENCHMARK_FORMAT,
+        'version': BENCHMARK_VERSION,
+        'environment': environment(),
+        'sizes': sizes,
+        'results': benchmark.results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=1, ensure_ascii=False)
+    print(f"Wrote {len(benchmark.results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        slower = compare(benchmark.results, baseline, args.threshold)
+        for result, old, ratio in slower:
+            described = ', '.join(f"{key}={value}" for key, value in result['params'].items())
+            print(f"Slower: {result['group']} {result['name']} ({described}): "
+                  f"{old['median'] * 1000:.2f} ms -> {result['median'] * 1000:.2f} ms ({ratio:.2f}x)")
+        print(f"{len(slower)} case(s) slower than {args.threshold:g}x the baseline "
+              f"({baseline.get('environment', {}).get('commit')}).")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
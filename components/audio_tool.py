@@ -1,14 +1,47 @@
 # components/audio_tools.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from parselmouth import Sound
-import matplotlib.pyplot as plt
+import pandas as pd
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QMessageBox, QFileDialog, QMenuBar, QMenu, QAction
 )
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5 import NavigationToolbar2QT as NavigationToolbar
+from matplotlib.figure import Figure
+
+from components.export_queue import ExportQueue
+from core.audio_analysis import analysis_cache, extract_corpus, interpolate_frames
+from core.level_of_detail import envelope_line
+from core.profiling import profiler
+
+# Resolution of saved graphs
+EXPORT_DPI = 1400
+
+# Runs the batch formant extraction (which uses its own process pool) without blocking the window
+class BatchExtractionWorker(QThread):
+    progress = pyqtSignal(int, int, str, str)  # done, total, file name, error ('' on success)
+    finished_extraction = pyqtSignal(object, object)  # table, failures
+
+    def __init__(self, inputs, parent=None):
+        super().__init__(parent)
+        self.inputs = inputs
+        self.cancelled = False
+
+    def run(self):
+        table, failures = extract_corpus(
+            self.inputs,
+            progress=lambda done, total, file_name, error: self.progress.emit(done, total, file_name, error or ''),
+            should_stop=lambda: self.cancelled,
+        )
+        self.finished_extraction.emit(table, failures)
+
+
+# Carries results from the analysis threads back to the window's thread
+class AnalysisSignals(QObject):
+    finished = pyqtSignal(int, str, object, str)  # generation, kind, result, error ('' on success)
 
 
 class AudioAnalysisTool(QWidget):
@@ -18,9 +51,33 @@ class AudioAnalysisTool(QWidget):
         self.vowel_space_visualizer = visualizer  # link back to VowelSpaceVisualizer
         self.show_pitch = False
         self.show_intensity = False
+        # Pitch and intensity are (times, values) tracks
         self.pitch = None
         self.intensity = None
-        self.formants = None
+        # Dense (frames x f1-f4) matrix of the formant tracks, computed once per analysis
+        self.formant_times = None
+        self.formant_values = None
+        self.batch_worker = None
+
+        # Analyses run lazily on a small thread pool. Every file load starts a new "generation";
+        # results that arrive for an older generation are thrown away.
+        self.audio_file = None
+        self.analysis = None
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.pending = {}  # kind -> Future
+        self.generation = 0
+        self.analysis_signals = AnalysisSignals()
+        self.analysis_signals.finished.connect(self.analysis_finished)
+
+        # The spectrogram and waveform are drawn once and kept as a background image. Pitch, intensity and
+        # each formant are persistent overlay layers that are only blitted on top of it.
+        self.spectrogram_ax = None
+        self.background = None
+
+        # Saved graphs are rendered in the background
+        self.export_queue = ExportQueue(self)
+        self.export_queue.progress.connect(self.export_progress)
+        self.export_queue.finished_export.connect(self.export_finished)
 
         self.initUI()
 
@@ -30,7 +87,8 @@ class AudioAnalysisTool(QWidget):
 
         layout = QVBoxLayout()
 
-        self.figure, self.ax = plt.subplots(figsize=(6, 9))
+        self.figure = Figure(figsize=(6, 9))
+        self.ax = self.figure.add_subplot()
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
 
@@ -38,18 +96,25 @@ class AudioAnalysisTool(QWidget):
         self.audio_title_label = QLabel()
         self.sampling_rate_label = QLabel()
         self.coordinates_label = QLabel()
+        self.coordinates_label.setFixedWidth(
+            self.coordinates_label.fontMetrics().horizontalAdvance('Cursor Coordinates: x=00000.00, y=00000.00'))
 
         labels_layout.addWidget(self.audio_title_label)
         labels_layout.addWidget(self.sampling_rate_label)
         labels_layout.addWidget(self.coordinates_label)
         layout.addLayout(labels_layout)
 
+        # Progress of batch extractions, reported here instead of in dialogs
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
         self.toolbar = NavigationToolbar(self.canvas, self)
         layout.addWidget(self.toolbar)
 
         self.setLayout(layout)
         self.create_menu_bar()
 
+        self.canvas.mpl_connect('draw_event', self.on_draw)
         self.canvas.mpl_connect('motion_notify_event', self.update_cursor_coordinates)
         self.canvas.mpl_connect('button_press_event', self.handle_click)
 
@@ -58,7 +123,10 @@ class AudioAnalysisTool(QWidget):
         file_menu = menubar.addMenu('File')
 
         file_menu.addAction(self.create_action('Read from Audio File', self.read_audio_file))
+        file_menu.addAction(self.create_action('Batch Extract Formants from Folder...', self.batch_extract))
+        file_menu.addAction(self.create_action('Export Formant Table...', self.export_formants))
         file_menu.addAction(self.create_action('Save Graph', self.save_graph))
+        file_menu.addAction(self.create_action('Cancel Saving', lambda: self.export_queue.cancel()))
 
         options_menu = menubar.addMenu('Options')
 
@@ -107,114 +175,349 @@ class AudioAnalysisTool(QWidget):
         self.redraw_plots()
 
     def redraw_plots(self):
-        try:
-            self.draw_spectrogram(self.audio_file)
+        if self.spectrogram_ax is None:
+            return  # nothing to draw yet; analysis_finished will call us again
 
-            if self.show_pitch and self.pitch:
-                self.draw_pitch(self.pitch)
-            if self.show_intensity and self.intensity:
-                self.draw_intensity(self.intensity)
+        # Overlays are only computed the first time they are switched on
+        if self.show_pitch and self.pitch is None:
+            self.request_analysis('pitch')
+        if self.show_intensity and self.intensity is None:
+            self.request_analysis('intensity')
+        if any(action.isChecked() for action in self.formant_actions) and self.formant_values is None:
+            self.request_analysis('formant_matrix')
 
-            for i, action in enumerate(self.formant_actions, start=1):
-                if action.isChecked() and self.formants:
-                    self.draw_formants(self.formants, i)
+        try:
+            self.update_overlays()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error redrawing plots: {str(e)}")
 
     def read_audio_file(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open Audio File", "", "Audio Files (*.wav *.mp3 *.ogg)")
         if file_name:
-            try:
-                self.audio_file = file_name
-                self.audio_title_label.setText(f'Audio Title: {os.path.basename(file_name)}')
-                snd = Sound(file_name)
-
-                self.pitch = snd.to_pitch()
-                self.intensity = snd.to_intensity()
-                self.formants = snd.to_formant_burg()
-                self.sampling_rate_label.setText(f'Sampling Rate: {snd.sampling_frequency} Hz')
-
-                self.redraw_plots()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error reading audio file: {str(e)}")
+            self.load_audio_file(file_name)
+
+    # Timed as "read_audio_file"; the analyses it starts are timed on their own threads
+    @profiler.timed('read_audio_file')
+    def load_audio_file(self, file_name):
+        profiler.note(file=os.path.basename(file_name))
+        # Anything still pending for the previous file is cancelled, and late results are ignored
+        self.cancel_pending()
+        self.generation += 1
+
+        self.audio_file = file_name
+        self.analysis = None
+        self.pitch = self.intensity = None
+        self.formant_times = self.formant_values = None
+        self.spectrogram_ax = None
+        self.audio_title_label.setText(f'Audio Title: {os.path.basename(file_name)}')
+
+        # The spectrogram comes first; pitch, intensity and formants wait until they are switched on
+        self.request_analysis('spectrogram')
+
+    def cancel_pending(self):
+        for future in self.pending.values():
+            future.cancel()  # analyses that already started run to the end, but their results are dropped
+        self.pending.clear()
+
+    # Schedules an analysis of the current file on the thread pool (once per kind and file)
+    def request_analysis(self, kind):
+        if self.audio_file is None or kind in self.pending:
+            return
+        generation, file_name = self.generation, self.audio_file
+
+        def run():
+            with profiler.span('audio analysis', kind=kind, file=os.path.basename(file_name)) as span:
+                # Opened once (memory-mapped for WAV) and kept with every analysis in the shared cache
+                entry = analysis_cache.entry(file_name)
+                span.note(samples=entry.source.n_samples)
+                result = entry.get(kind)
+                if kind == 'spectrogram':
+                    # The multi-resolution copies the spectrogram is drawn from scan the whole recording,
+                    # so they're built here too rather than on the window's thread
+                    with profiler.span('levels of detail'):
+                        entry.get('envelope')
+                        entry.get('spectrogram_pyramid')
+                return entry, result
+
+        def done(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            result = None if error else future.result()
+            self.analysis_signals.finished.emit(generation, kind, result, str(error) if error else '')
+
+        self.status_label.setText(f'Computing {kind.replace("_matrix", "s")}...')
+        future = self.executor.submit(run)
+        self.pending[kind] = future
+        future.add_done_callback(done)
+
+    # Runs on the window's thread when an analysis is ready
+    def analysis_finished(self, generation, kind, result, error):
+        if generation != self.generation:
+            return  # belongs to a file that is no longer shown
+        self.pending.pop(kind, None)
+        if error:
+            self.status_label.setText('')
+            QMessageBox.critical(self, "Error", f"Error reading audio file: {error}")
+            return
+
+        self.analysis, value = result
+        if kind == 'spectrogram':
+            self.sampling_rate_label.setText(f'Sampling Rate: {self.analysis.source.sampling_frequency} Hz')
+        elif kind == 'pitch':
+            self.pitch = value
+        elif kind == 'intensity':
+            self.intensity = value
+        elif kind == 'formant_matrix':
+            self.formant_times, self.formant_values = value
+
+        if not self.pending:
+            self.status_label.setText('')
+        if kind == 'spectrogram':
+            self.draw_spectrogram()
+        else:
+            self.fill_overlay(kind)
+        self.redraw_plots()
 
-    def draw_spectrogram(self, audio_file, dynamic_range=70):
+    # Builds the figure for a newly read file: the spectrogram and waveform (the background), and empty,
+    # hidden overlay layers for pitch, intensity and f1-f4 that are filled as their analyses arrive
+    @profiler.timed('draw_spectrogram')
+    def draw_spectrogram(self, dynamic_range=70):
         try:
-            snd = Sound(audio_file)
-            spectrogram = snd.to_spectrogram()
-
-            plt.figure(self.figure.number)
-            plt.clf()
-
-            plt.plot(snd.xs(), snd.values.T, color='black', alpha=0.5)
-            plt.xlim([snd.xmin, snd.xmax])
-
-            X, Y = spectrogram.x_grid(), spectrogram.y_grid()
-            sg_db = 10 * np.log10(spectrogram.values)
-            plt.pcolormesh(X, Y, sg_db, vmin=sg_db.max() - dynamic_range, cmap='binary')
-            plt.ylim([spectrogram.ymin, spectrogram.ymax])
-            plt.xlabel("time [s]")
-            plt.ylabel("frequency [Hz]")
-
-            self.figure.tight_layout()
-            self.canvas.draw()
+            analysis = self.analysis
+            source = analysis.source
+            start_time, end_time = source.start_time, source.start_time + source.duration
+            # Computed by the analysis thread before it reported the spectrogram as ready
+            spectrogram = analysis.finished('spectrogram')
+            profiler.note(samples=source.n_samples, frames=spectrogram['db'].shape[1])
+
+            # Multi-resolution copies of the waveform and spectrogram, so only about one point per pixel is drawn
+            self.envelope = analysis.finished('envelope')
+            self.spectrogram_pyramid = analysis.finished('spectrogram_pyramid')
+
+            self.background = None
+            self.figure.clf()
+            self.spectrogram_ax = ax = self.figure.add_subplot()
+
+            self.waveform_line, = ax.plot([], [], color='black', alpha=0.5)
+            self.spectrogram_image = ax.imshow(
+                np.zeros((1, 1)), extent=(start_time, end_time, spectrogram['ymin'], spectrogram['ymax']),
+                origin='lower', aspect='auto', interpolation='nearest', cmap='binary',
+                vmin=self.spectrogram_pyramid.vmax - dynamic_range, vmax=self.spectrogram_pyramid.vmax)
+
+            ax.set_xlim([start_time, end_time])
+            ax.set_ylim([spectrogram['ymin'], spectrogram['ymax']])
+            ax.set_autoscale_on(False)
+            ax.set_xlabel("time [s]")
+            ax.set_ylabel("frequency [Hz]")
+
+            # Pitch and intensity have their own y axes; as animated artists they're left out of normal draws
+            self.pitch_ax = ax.twinx()
+            self.pitch_lines = self.pitch_ax.plot([], [], 'o', markersize=2, color='white') + \
+                self.pitch_ax.plot([], [], 'o', markersize=1)
+            self.pitch_ax.set_ylabel("Pitch [Hz]")
+
+            self.intensity_ax = ax.twinx()
+            self.intensity_lines = self.intensity_ax.plot([], [], linewidth=3, color='white') + \
+                self.intensity_ax.plot([], [], linewidth=1, color='black')
+            self.intensity_ax.set_ylabel("Intensity [dB]")
+
+            self.formant_lines = [ax.plot([], [], 'o', color='white', markersize=3) + ax.plot([], [], 'o', markersize=1)
+                                  for _ in self.formant_actions]
+
+            for kind in ('pitch', 'intensity', 'formant_matrix'):
+                self.fill_overlay(kind)
+            with profiler.span('tight_layout'):
+                self.figure.tight_layout()  # with every layer visible, so there is room for the pitch/intensity labels
+            for layer in self.overlay_layers():
+                layer.set_animated(True)
+                layer.set_visible(False)
+            with profiler.span('level of detail'):
+                self.update_level_of_detail()
+            for view_ax in (ax, self.pitch_ax, self.intensity_ax):
+                self.watch_view(view_ax)
+            with profiler.span('canvas.draw'):
+                self.canvas.draw()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error drawing spectrogram: {str(e)}")
 
-    def draw_pitch(self, pitch):
-        try:
-            pitch_values = pitch.selected_array['frequency']
-            pitch_values[pitch_values == 0] = np.nan
-            ax = plt.gca().twinx()
-            ax.plot(pitch.xs(), pitch_values, 'o', markersize=2, color='white')
-            ax.plot(pitch.xs(), pitch_values, 'o', markersize=1)
-            ax.set_ylabel("Pitch [Hz]")
-            self.canvas.draw()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error plotting pitch: {str(e)}")
-
-    def draw_intensity(self, intensity):
-        try:
-            ax = plt.gca().twinx()
-            ax.plot(intensity.xs(), intensity.values.T, linewidth=3, color='white')
-            ax.plot(intensity.xs(), intensity.values.T, linewidth=1, color='black')
-            ax.set_ylabel("Intensity [dB]")
-            self.canvas.draw()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error plotting intensity: {str(e)}")
-
-    def draw_formants(self, formants, formant_number):
-        try:
-            times = formants.xs()
-            values = [formants.get_value_at_time(formant_number, t) for t in times]
-            plt.plot(times, values, 'o', color='white', markersize=3)
-            plt.plot(times, values, 'o', markersize=1)
-            self.canvas.draw()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error plotting formants: {str(e)}")
-
+    # Every overlay layer: the pitch and intensity axes (with their lines) and the lines of each formant
+    def overlay_layers(self):
+        if self.spectrogram_ax is None:
+            return []
+        return [self.pitch_ax, self.intensity_ax] + [line for lines in self.formant_lines for line in lines]
+
+    # Puts a freshly computed track into its overlay layer
+    def fill_overlay(self, kind):
+        if self.spectrogram_ax is None:
+            return
+        if kind == 'pitch' and self.pitch is not None:
+            for line in self.pitch_lines:
+                line.set_data(*self.pitch)  # unvoiced frames are NaN
+            self.pitch_ax.relim()
+            self.pitch_ax.autoscale_view(scalex=False)
+        elif kind == 'intensity' and self.intensity is not None:
+            for line in self.intensity_lines:
+                line.set_data(*self.intensity)
+            self.intensity_ax.relim()
+            self.intensity_ax.autoscale_view(scalex=False)
+        elif kind == 'formant_matrix' and self.formant_values is not None:
+            for i, lines in enumerate(self.formant_lines):
+                for line in lines:
+                    line.set_data(self.formant_times, self.formant_values[:, i])
+
+    # Shows the overlays that are switched on (and computed), hides the rest, and blits them over the background
+    def update_overlays(self):
+        if self.spectrogram_ax is None:
+            return
+        self.pitch_ax.set_visible(self.show_pitch and self.pitch is not None)
+        self.intensity_ax.set_visible(self.show_intensity and self.intensity is not None)
+        for action, lines in zip(self.formant_actions, self.formant_lines):
+            for line in lines:
+                line.set_visible(action.isChecked() and self.formant_values is not None)
+
+        if self.background is None:
+            self.canvas.draw_idle()  # on_draw will draw the overlays
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_overlays()
+        self.canvas.blit(self.figure.bbox)
+
+    def draw_overlays(self):
+        for layer in self.overlay_layers():
+            if layer.get_visible():
+                self.figure.draw_artist(layer)
+
+    # After every full draw (new file, zoom, resize) the background is saved again and the overlays go on top
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_overlays()
+
+    # Zooming or panning (on the spectrogram or on the pitch/intensity axes on top of it) picks a new level of detail
+    def watch_view(self, ax):
+        ax.callbacks.connect('xlim_changed', lambda changed_ax: self.update_level_of_detail())
+
+    # Fills the waveform and spectrogram artists from the level of detail that matches the visible time range
+    # and the width of the axes in pixels. scale > 1 asks for more pixels than the screen has, for an export
+    # at a higher resolution; such a level of detail isn't drawn on screen.
+    def update_level_of_detail(self, scale=1.0):
+        ax = self.spectrogram_ax
+        if ax is None or ax.figure is None:
+            return
+        t0, t1 = sorted(ax.get_xlim())
+        bbox = ax.get_window_extent()
+
+        times, lows, highs = self.envelope.view(t0, t1, bbox.width * scale)
+        self.waveform_line.set_data(*envelope_line(times, lows, highs))
+
+        image, extent = self.spectrogram_pyramid.view(t0, t1, bbox.width * scale, bbox.height * scale)
+        self.spectrogram_image.set_data(image)
+        self.spectrogram_image.set_extent(extent)
+        if scale == 1.0:
+            self.canvas.draw_idle()
+
+    # Only the label changes; its width is fixed (in initUI) so new text never resizes the canvas
     def update_cursor_coordinates(self, event):
         if event.inaxes:
             x, y = event.xdata, event.ydata
             self.coordinates_label.setText(f'Cursor Coordinates: x={x:.2f}, y={y:.2f}')
 
     def handle_click(self, event):
-        if event.inaxes and event.button == 3 and self.formants:
+        if event.inaxes and event.button == 3 and self.formant_values is None:
+            self.request_analysis('formant_matrix')  # measured on the next click, once the formants are ready
+        if event.inaxes and event.button == 3 and self.formant_values is not None:
             x = event.xdata
-            f1 = self.formants.get_value_at_time(1, x)
-            f2 = self.formants.get_value_at_time(2, x)
-            f3 = self.formants.get_value_at_time(3, x)
-            f4 = self.formants.get_value_at_time(4, x)
+            f1, f2, f3, f4 = interpolate_frames(self.formant_times, self.formant_values, x)[0]
 
             audio_title = os.path.splitext(os.path.basename(self.audio_file))[0]
             if self.vowel_space_visualizer:
                 self.vowel_space_visualizer.update_input_fields_audio(f1, f2, f3, f4, audio_title)
 
+    # Extracts f0-f4 and intensity from every audio file in a folder, in parallel, and adds them to the visualizer
+    def batch_extract(self):
+        if self.batch_worker and self.batch_worker.isRunning():
+            self.batch_worker.cancelled = True
+            self.status_label.setText('Cancelling batch extraction...')
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder with Audio Files")
+        if folder:
+            self.batch_failures = []
+            self.batch_worker = BatchExtractionWorker(folder, self)
+            self.batch_worker.progress.connect(self.batch_progress)
+            self.batch_worker.finished_extraction.connect(self.batch_finished)
+            self.status_label.setText(f'Extracting formants from {folder}...')
+            self.batch_worker.start()
+
+    def batch_progress(self, done, total, file_name, error):
+        name = os.path.basename(file_name)
+        if error:
+            self.batch_failures.append(name)
+            self.status_label.setText(f'[{done}/{total}] {name} failed: {error}')
+        else:
+            self.status_label.setText(f'[{done}/{total}] {name}')
+
+    def batch_finished(self, table, failures):
+        summary = f'Extracted {len(table)} frame(s).'
+        if failures:
+            summary += f' {len(failures)} file(s) failed: ' + ', '.join(os.path.basename(f) for f, _ in failures)
+        self.status_label.setText(summary)
+        if self.vowel_space_visualizer and not table.empty:
+            self.vowel_space_visualizer.append_data(table)
+
+    # Saves the formant tracks of the current file as a table, straight from the formant matrix
+    def export_formants(self):
+        if self.audio_file is None:
+            QMessageBox.critical(self, "Error", "Please read an audio file first.")
+            return
+        if self.formant_values is None:
+            self.request_analysis('formant_matrix')
+            QMessageBox.information(self, "Please wait", "The formants are being computed, please try again in a moment.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Formant Table", "", "CSV files (*.csv)")
+        if file_path:
+            try:
+                table = pd.DataFrame(self.formant_values, columns=['f1', 'f2', 'f3', 'f4'])
+                table.insert(0, 'time', self.formant_times)
+                table.to_csv(file_path, index=False)
+                QMessageBox.information(self, "Success", "Formant table exported successfully!")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Error exporting formants: {str(e)}")
+
+    def closeEvent(self, event):
+        self.cancel_pending()
+        self.executor.shutdown(wait=False)
+        self.export_queue.shutdown()
+        super().closeEvent(event)
+
     def save_graph(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Graph", "", "JPEG files (*.jpeg)")
         if file_path:
             try:
-                self.figure.savefig(file_path, format='jpeg', dpi=1400)
-                QMessageBox.information(self, "Success", "Graph saved successfully!")
+                # Animated layers are skipped by savefig, so the overlays are normal artists in the snapshot.
+                # The waveform and spectrogram are detailed enough for the export's pixels, not the screen's.
+                layers = self.overlay_layers()
+                for layer in layers:
+                    layer.set_animated(False)
+                try:
+                    self.update_level_of_detail(scale=EXPORT_DPI / self.figure.dpi)
+                    self.export_queue.submit(self.figure, file_path, 'jpeg', EXPORT_DPI)
+                finally:
+                    for layer in layers:
+                        layer.set_animated(True)
+                    self.update_level_of_detail()
+                self.status_label.setText(f'Saving {os.path.basename(file_path)}...')
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error saving graph: {str(e)}")
\ No newline at end of file
+                QMessageBox.critical(self, "Error", f"Error saving graph: {str(e)}")
+
+    def export_progress(self, export_id, percent, message):
+        self.status_label.setText(f'{message} graph ({percent}%)')
+
+    def export_finished(self, export_id, file_name, error):
+        if error == 'Cancelled':
+            self.status_label.setText('Saving the graph was cancelled.')
+        elif error:
+            self.status_label.setText('')
+            QMessageBox.critical(self, "Error", f"Error saving graph: {error}")
+        else:
+            self.status_label.setText(f'Graph saved as {os.path.basename(file_name)}.')
\ No newline at end of file
@@ -0,0 +1,57 @@
+# components/dataset_import.py
+
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.data_io import iter_dataset, CHUNK_ROWS
+from core.profiling import profiler
+
+
+# Reads a dataset in batches in the background (see core.data_io.iter_dataset) and hands each batch to the
+# window as soon as it's read, so the window stays responsive and can show the rows imported so far.
+# At most max_pending batches wait for the window at a time, which keeps the memory of a big import flat.
+class DatasetImport(QThread):
+    batch_ready = pyqtSignal(object)  # cleaned DataFrame with the next rows
+    progress = pyqtSignal(int, str)  # percent, message
+    finished_import = pyqtSignal(str)  # error ('' on success, 'Cancelled')
+
+    def __init__(self, file_name, chunk_rows=CHUNK_ROWS, max_pending=2, parent=None):
+        super().__init__(parent)
+        self.file_name = file_name
+        self.chunk_rows = chunk_rows
+        self.slots = threading.Semaphore(max_pending)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    # Called by the window once it has added a batch
+    def batch_done(self):
+        self.slots.release()
+
+    def run(self):
+        batches = iter_dataset(self.file_name, self.chunk_rows)
+        try:
+            self.progress.emit(0, 'Reading')
+            while True:
+                with profiler.span('read batch') as span:
+                    batch, fraction = next(batches, (None, None))
+                    span.note(rows=0 if batch is None else len(batch))
+                if batch is None:
+                    break
+                # Waits for the window to catch up, but still notices a cancel
+                while not self.slots.acquire(timeout=0.1):
+                    if self.cancelled:
+                        break
+                if self.cancelled:
+                    self.finished_import.emit('Cancelled')
+                    return
+                self.batch_ready.emit(batch)
+                self.progress.emit(int(fraction * 100), 'Importing')
+        except Exception as e:
+            self.finished_import.emit(str(e))
+            return
+        finally:
+            batches.close()  # closes the file when the import stops early
+        self.finished_import.emit('')
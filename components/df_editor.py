@@ -1,6 +1,105 @@
 # components/df_editor.py
 
-from PyQt5.QtWidgets import QDialog, QTableWidget, QTableWidgetItem, QVBoxLayout, QPushButton
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent
+from PyQt5.QtWidgets import QDialog, QTableView, QHeaderView, QVBoxLayout, QPushButton
+
+
+# Table model that reads straight from the DataFrame's column arrays. The view only asks for the cells
+# on screen, so opening a big table costs nothing per cell. Edits are kept aside as dirty cells
+# until they're written back to the DataFrame.
+# source, if given, returns the current DataFrame (the visualizer's frame is rebuilt whenever its store
+# changes); the model follows it before every write and whenever follow_source() is called.
+class DataFrameModel(QAbstractTableModel):
+    def __init__(self, data, parent=None, source=None):
+        super().__init__(parent)
+        self.df = data
+        self.source = source
+        self.edits = {}  # (row, column) -> new value
+        self.refresh_columns()
+
+    # Switches to the source's current DataFrame if it's a different one. Pending edits stay on their
+    # row and column name; edits of rows or columns that are gone are dropped.
+    def follow_source(self):
+        if self.source is None:
+            return
+        df = self.source()
+        if df is self.df:
+            return
+        self.beginResetModel()
+        names = list(self.df.columns)
+        positions = {name: i for i, name in enumerate(df.columns)}
+        self.edits = {(row, positions[names[column]]): value for (row, column), value in self.edits.items()
+                      if names[column] in positions and row < len(df.index)}
+        self.df = df
+        self.refresh_columns()
+        self.endResetModel()
+
+    # The arrays behind the columns; needed again when writing back changed a column's dtype
+    def refresh_columns(self):
+        self.columns = [self.df[column].to_numpy() for column in self.df.columns]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.df.index)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.df.columns)
+
+    def value(self, row, column):
+        if (row, column) in self.edits:
+            return self.edits[(row, column)]
+        return self.columns[column][row]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return str(self.value(index.row(), index.column()))
+
+    def setData(self, index, text, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        try:
+            value = float(text)
+        except ValueError:
+            value = text
+
+        # Typing the old value back in is not an edit
+        if str(self.columns[column][row]) == text:
+            self.edits.pop((row, column), None)
+        else:
+            self.edits[(row, column)] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return str(self.df.columns[section])
+        return str(section + 1)
+
+    # Writes the dirty cells into the DataFrame and forgets them. Returns the previous values of the
+    # edited rows (all columns, as the visualizer expects them) and the names of the edited columns.
+    def write_back(self):
+        self.follow_source()
+        rows = sorted({row for row, _ in self.edits})
+        columns = [self.df.columns[column] for column in sorted({column for _, column in self.edits})]
+        old_rows = self.df.iloc[rows].copy()
+        for (row, column), value in self.edits.items():
+            # A Categorical column (vowel and speaker in the visualizer) only takes values it has a category for
+            series = self.df.iloc[:, column]
+            if isinstance(series.dtype, pd.CategoricalDtype) and not pd.isna(value) \
+                    and value not in series.cat.categories:
+                self.df[self.df.columns[column]] = series.cat.add_categories([value])
+            self.df.iat[row, column] = value
+        self.edits.clear()
+        self.refresh_columns()
+        return old_rows, columns
+
 
 class DFEditor(QDialog):
     def __init__(self, data, parent=None, visualizer=None):
@@ -12,37 +111,35 @@ class DFEditor(QDialog):
         self.initUI()
 
     def initUI(self):
-        self.create_table_widget()
+        self.create_table_view()
         self.save_button = QPushButton('Save Changes', self)
         self.save_button.clicked.connect(self.save_changes)
 
         layout = QVBoxLayout()
-        layout.addWidget(self.table_widget)
+        layout.addWidget(self.table_view)
         layout.addWidget(self.save_button)
         self.setLayout(layout)
 
-    def create_table_widget(self):
-        self.table_widget = QTableWidget()
-        self.table_widget.setRowCount(len(self.data.index))
-        self.table_widget.setColumnCount(len(self.data.columns))
-        self.table_widget.setHorizontalHeaderLabels(self.data.columns)
+    def create_table_view(self):
+        source = (lambda: self.vowel_space_visualizer.data) if self.vowel_space_visualizer else None
+        self.model = DataFrameModel(self.data, self, source=source)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        # Fixed row heights, so the view never measures rows that aren't on screen
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
 
-        for i in range(len(self.data.index)):
-            for j in range(len(self.data.columns)):
-                item = QTableWidgetItem(str(self.data.iloc[i, j]))
-                self.table_widget.setItem(i, j, item)
+    # Coming back to the editor after working in the main window shows its current data
+    def changeEvent(self, event):
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.model.follow_source()
+        super().changeEvent(event)
 
     def save_changes(self):
-        for i in range(self.table_widget.rowCount()):
-            for j in range(self.table_widget.columnCount()):
-                item = self.table_widget.item(i, j)
-                if item is not None:
-                    try:
-                        value = float(item.text())
-                    except ValueError:
-                        value = item.text()
-                    self.data.iat[i, j] = value
-
-        # Refresh the scatterplot in VowelSpaceVisualizer if given
+        if not self.model.edits:
+            return
+        old_rows, columns = self.model.write_back()
+
+        # Refresh the scatterplot in VowelSpaceVisualizer if given, passing the previous values
+        # of the edited rows so it can update its running statistics
         if self.vowel_space_visualizer:
-            self.vowel_space_visualizer.update_scatterplot()
+            self.vowel_space_visualizer.rows_edited(old_rows, columns)
@@ -0,0 +1,85 @@
+# components/export_queue.py
+
+import queue
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.export import snapshot_figure, start_export
+
+
+# Saves figures one after the other in the background. Each export is a snapshot of the figure taken when
+# it is queued, rendered in its own process (see core.export); this thread only starts the processes and
+# relays their progress, so the window stays responsive and the user can keep working or queue more.
+class ExportQueue(QThread):
+    progress = pyqtSignal(int, int, str)  # export id, percent, message
+    finished_export = pyqtSignal(int, str, str)  # export id, file name, error ('' on success, 'Cancelled')
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.cancelled = set()  # ids of exports to drop (or stop, if already rendering)
+        self.next_id = 0
+
+    # Number of exports queued or rendering
+    @property
+    def pending(self):
+        return self.jobs.unfinished_tasks
+
+    # Takes the snapshot right away (on the caller's thread) and queues it; returns the id of the export
+    def submit(self, figure, file_name, format, dpi):
+        snapshot = snapshot_figure(figure)
+        self.next_id += 1
+        self.jobs.put((self.next_id, snapshot, file_name, format, dpi))
+        if not self.isRunning():
+            self.start()
+        return self.next_id
+
+    # Cancels one export, or every export still queued or rendering
+    def cancel(self, export_id=None):
+        if export_id is None:
+            self.cancelled.update(range(1, self.next_id + 1))
+        else:
+            self.cancelled.add(export_id)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            export_id, snapshot, file_name, format, dpi = job
+            error = self.export(export_id, snapshot, file_name, format, dpi)
+            self.jobs.task_done()
+            self.finished_export.emit(export_id, file_name, error)
+
+    def export(self, export_id, snapshot, file_name, format, dpi):
+        if export_id in self.cancelled:
+            return 'Cancelled'
+        process, connection = start_export(snapshot, file_name, format, dpi)
+        try:
+            while True:
+                if export_id in self.cancelled:
+                    process.terminate()
+                    return 'Cancelled'
+                if not connection.poll(0.1):
+                    continue
+                try:
+                    message = connection.recv()
+                except EOFError:
+                    return 'The export process stopped unexpectedly.'
+                if message[0] == 'progress':
+                    self.progress.emit(export_id, message[1], message[2])
+                elif message[0] == 'done':
+                    return ''
+                else:
+                    return message[1]
+        finally:
+            connection.close()
+            process.join(timeout=5)
+
+    # Stops the running export and drops the queued ones, e.g. when the window closes
+    def shutdown(self):
+        self.cancel()
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait(2000)
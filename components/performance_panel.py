@@ -0,0 +1,95 @@
+# components/performance_panel.py
+
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QTreeWidget, QTreeWidgetItem, QFileDialog,
+    QMessageBox, QLabel
+)
+
+from core.profiling import profiler, describe
+
+
+# Carries finished operations from whichever thread ran them to the panel's thread
+class OperationSignals(QObject):
+    finished = pyqtSignal(object)
+
+
+# Timings of the most recent operations (redraws, normalizations, imports, audio analyses), each with its
+# stages and row counts. Nothing is timed while "Record timings" is off.
+class PerformancePanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.signals = OperationSignals()
+        self.signals.finished.connect(self.add_operation)
+        profiler.listeners.append(self.signals.finished.emit)
+        self.initUI()
+        self.resize(700, 500)
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        self.checkbox_record = QCheckBox('Record timings')
+        self.checkbox_record.setChecked(profiler.enabled)
+        self.checkbox_record.toggled.connect(self.set_recording)
+        layout.addWidget(self.checkbox_record)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(['Operation', 'Time (ms)', 'Details', 'Thread'])
+        self.tree.setColumnWidth(0, 220)
+        layout.addWidget(self.tree)
+
+        buttons_layout = QHBoxLayout()
+        self.summary_label = QLabel('')
+        buttons_layout.addWidget(self.summary_label)
+        buttons_layout.addStretch()
+        clear_button = QPushButton('Clear')
+        clear_button.clicked.connect(self.clear)
+        buttons_layout.addWidget(clear_button)
+        export_button = QPushButton('Export Trace...')
+        export_button.clicked.connect(self.export_trace)
+        buttons_layout.addWidget(export_button)
+        layout.addLayout(buttons_layout)
+
+        self.setLayout(layout)
+        for operation in list(profiler.operations):
+            self.add_operation(operation)
+
+    def set_recording(self, checked):
+        profiler.enabled = checked
+
+    # Newest operation on top; only as many are listed as the profiler keeps
+    def add_operation(self, operation):
+        self.tree.insertTopLevelItem(0, self.span_item(operation))
+        while self.tree.topLevelItemCount() > profiler.operations.maxlen:
+            self.tree.takeTopLevelItem(self.tree.topLevelItemCount() - 1)
+        self.summary_label.setText(f"Last: {operation.name}, {operation.duration * 1000:.1f} ms "
+                                   f"at {time.strftime('%H:%M:%S')}")
+
+    def span_item(self, span):
+        item = QTreeWidgetItem([span.name, f"{span.duration * 1000:.1f}", describe(span.values), span.thread])
+        for stage in span.stages:
+            item.addChild(self.span_item(stage))
+        return item
+
+    def clear(self):
+        profiler.clear()
+        self.tree.clear()
+        self.summary_label.setText('')
+
+    def export_trace(self):
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        file_name, _ = QFileDialog.getSaveFileName(self, "Export Trace", "vowspace-trace.json",
+                                                   "Trace Files (*.json);;All Files (*)", options=options)
+        if not file_name:
+            return
+        try:
+            profiler.export_trace(file_name)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error exporting trace: {str(e)}")
+            return
+        QMessageBox.information(self, "Success", f"Trace saved to {file_name}.\n"
+                                                 "It can be opened in chrome://tracing or ui.perfetto.dev.")
@@ -0,0 +1,600 @@
+# core/audio_analysis.py
+# Acoustic analysis with Parselmouth (Praat) that doesn't need any window.
+# Used by the Audio Analysis Tools and by the batch formant extraction.
+
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from fractions import Fraction
+
+import numpy as np
+import pandas as pd
+from parselmouth import Sound
+from parselmouth.praat import call
+
+from core.level_of_detail import EnvelopePyramid, SpectrogramPyramid
+from core.wav_io import WavFile
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.ogg')
+
+# Praat's defaults for the analyses, kept in one place so every caller analyses audio the same way
+DEFAULT_PARAMETERS = {
+    'pitch': {'time_step': None, 'pitch_floor': 75.0, 'pitch_ceiling': 600.0},
+    'intensity': {'minimum_pitch': 100.0, 'time_step': None},
+    'formant': {'time_step': None, 'max_number_of_formants': 5.0, 'maximum_formant': 5500.0,
+                'window_length': 0.025, 'pre_emphasis_from': 50.0},
+    'spectrogram': {'window_length': 0.005, 'maximum_frequency': 5000.0, 'time_step': 0.002,
+                    'frequency_step': 20.0},
+}
+
+# Long recordings are analysed this many seconds at a time, with CHUNK_OVERLAP extra seconds on each side
+# so frames near the edges of a chunk (and the pitch path finder) see the same signal as in a whole-file analysis
+CHUNK_DURATION = 60.0
+CHUNK_OVERLAP = 1.0
+
+# Results larger than this (e.g. the spectrogram of a recording that lasts hours) go to a temporary file
+SCRATCH_BYTES = 256 * 1024 ** 2
+
+# Columns of the extracted table. 'vowel' and 'speaker' are there so the table can go straight into the visualizer.
+EXTRACTION_COLUMNS = ['file', 'time', 'f0', 'f1', 'f2', 'f3', 'f4', 'intensity', 'vowel', 'speaker']
+
+
+def analysis_parameters(parameters=None):
+    merged = {name: dict(values) for name, values in DEFAULT_PARAMETERS.items()}
+    for name, values in (parameters or {}).items():
+        merged[name].update(values)
+    return merged
+
+
+# Praat's "To Pitch..." is the autocorrelation method with these settings; the silence threshold is
+# relative to the largest amplitude in the sound
+def analyze_pitch(snd, parameters=None, silence_threshold=0.03):
+    return snd.to_pitch_ac(**analysis_parameters(parameters)['pitch'], silence_threshold=silence_threshold)
+
+
+def analyze_intensity(snd, parameters=None):
+    return snd.to_intensity(**analysis_parameters(parameters)['intensity'])
+
+
+def analyze_formants(snd, parameters=None):
+    return snd.to_formant_burg(**analysis_parameters(parameters)['formant'])
+
+
+# Dense (frames x formants) matrix of formant frequencies, read in one call per formant
+# instead of one get_value_at_time call per frame. Undefined values are NaN.
+def formant_matrix(formants, number_of_formants=4):
+    values = np.empty((formants.n_frames, number_of_formants))
+    for n in range(1, number_of_formants + 1):
+        track = call(formants, "To Matrix", n).values[0]
+        values[:, n - 1] = np.where(track > 0, track, np.nan)  # Praat writes 0 for undefined frames
+    return np.asarray(formants.xs()), values
+
+
+# Linear interpolation of every column of a (frames x tracks) matrix at the given times in one go.
+# Times within half a frame outside the first/last frame take that frame's value, anything further out is NaN.
+def interpolate_frames(times, values, at):
+    at = np.atleast_1d(np.asarray(at, dtype=float))
+    result = np.full((len(at), values.shape[1]), np.nan)
+    if len(times) == 0:
+        return result
+    if len(times) == 1:
+        result[:] = values[0]
+    else:
+        right = np.clip(np.searchsorted(times, at), 1, len(times) - 1)
+        left = right - 1
+        weight = np.clip((at - times[left]) / (times[right] - times[left]), 0.0, 1.0)[:, None]
+        left_values, right_values = values[left], values[right]
+        result = left_values * (1 - weight) + right_values * weight
+        # Like Praat, when either neighbouring frame has no value for a formant, take the nearest frame's value
+        nearest_values = np.where(weight < 0.5, left_values, right_values)
+        result = np.where(np.isnan(left_values) | np.isnan(right_values), nearest_values, result)
+
+    half_frame = (times[1] - times[0]) / 2 if len(times) > 1 else 0.0
+    outside = (at < times[0] - half_frame) | (at > times[-1] + half_frame)
+    result[outside] = np.nan
+    return result
+
+
+# Pitch contour with unvoiced frames as NaN
+def pitch_track(pitch):
+    values = pitch.selected_array['frequency'].copy()
+    values[values == 0] = np.nan
+    return np.asarray(pitch.xs()), values
+
+
+def intensity_track(intensity):
+    return np.asarray(intensity.xs()), intensity.values[0].copy()
+
+
+# Linear interpolation of a track at the given times, NaN outside the analysed range
+def sample_track(times, track_times, track_values, at):
+    if len(track_times) == 0:
+        return np.full(len(at), np.nan)
+    return np.interp(at, track_times, track_values, left=np.nan, right=np.nan)
+
+
+# Same interface as WavFile for files that have to be decoded in full (mp3, ogg, compressed WAV)
+class DecodedAudio:
+    def __init__(self, file_name):
+        snd = Sound(file_name)
+        self.file_name = file_name
+        self.values = snd.values
+        self.n_channels, self.n_samples = self.values.shape
+        self.sampling_frequency = snd.sampling_frequency
+        self.start_time = snd.xmin
+
+    @property
+    def duration(self):
+        return self.n_samples / self.sampling_frequency
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def read(self, start=0, stop=None):
+        return self.values[:, max(start, 0):stop]
+
+    def blocks(self, block_size):
+        for start in range(0, self.n_samples, block_size):
+            yield start, self.read(start, start + block_size)
+
+
+# Uncompressed WAV files are memory-mapped; anything else is decoded by Praat
+def open_audio(file_name):
+    try:
+        return WavFile(file_name)
+    except ValueError:
+        return DecodedAudio(file_name)
+
+
+# Time step, physical window length and resampling frequency (None if the sound isn't resampled first)
+# of each analysis, as Praat chooses them from the parameters
+def analysis_layout(kind, sampling_frequency, parameters=None):
+    values = analysis_parameters(parameters)[kind]
+    if kind == 'pitch':
+        return values['time_step'] or 3.0 / values['pitch_floor'] / 4.0, 3.0 / values['pitch_floor'], None
+    if kind == 'intensity':
+        return values['time_step'] or 0.8 / values['minimum_pitch'], 6.4 / values['minimum_pitch'], None
+    if kind == 'formant':
+        # Burg's method resamples the sound to twice the maximum formant before anything else
+        resampling_frequency = 2 * values['maximum_formant']
+        if abs(resampling_frequency / sampling_frequency - 1) < 1e-12:
+            resampling_frequency = None
+        return values['time_step'] or values['window_length'] / 4, 2 * values['window_length'], resampling_frequency
+    return values['time_step'], 2 * values['window_length'], None  # spectrogram (Gaussian window)
+
+
+# Number of frames and time of the first frame of a short-term analysis, laid out the way Praat does it:
+# as many frames as fit, centred in the sound. The arithmetic follows Praat's (Sampled_shortTermAnalysis and
+# Sound_resample) step by step, because a sound in which the frames fit exactly is one frame longer or shorter
+# depending on how the division rounds. Works on arrays of sample counts and start times too.
+def frame_grid(n_samples, sampling_frequency, start_time, time_step, window_duration, resampling_frequency=None):
+    dx = 1.0 / sampling_frequency
+    x1 = start_time + 0.5 * dx
+    if resampling_frequency:
+        x1 = resampled_start(n_samples, sampling_frequency, start_time, resampling_frequency)
+        n_samples = np.floor((n_samples / sampling_frequency) * resampling_frequency + 0.5)
+        dx = 1.0 / resampling_frequency
+    duration = dx * n_samples
+    n_frames = np.floor((duration - window_duration) / time_step) + 1
+    middle = x1 - 0.5 * dx + 0.5 * duration
+    return n_frames, middle - 0.5 * (n_frames * time_step) + 0.5 * time_step
+
+
+# Time of the first sample after Praat resamples a sound that starts at start_time
+def resampled_start(n_samples, sampling_frequency, start_time, resampling_frequency):
+    end_time = start_time + n_samples / sampling_frequency
+    n_resampled = np.floor((end_time - start_time) * resampling_frequency + 0.5)
+    return 0.5 * (start_time + end_time - (n_resampled - 1) / resampling_frequency)
+
+
+# Fewest samples that make a whole number of frames (and of resampled samples, if the analysis resamples).
+# Cutting whole periods off either end of a recording leaves its frames (and resampled samples) where they
+# were. Raises ValueError if the time step or the resampling isn't a fraction of the sampling period.
+def alignment_period(sampling_frequency, time_step, resampling_frequency=None):
+    ratios = [sampling_frequency * time_step]
+    if resampling_frequency:
+        ratios.append(sampling_frequency / resampling_frequency)
+    period = 1
+    for ratio in ratios:
+        fraction = Fraction(ratio).limit_denominator(10000)
+        if abs(fraction - ratio) > 1e-12 * ratio:
+            raise ValueError(f"A time step of {time_step} s at {sampling_frequency} Hz can't be analysed in chunks "
+                             f"whose frames line up with the whole recording's.")
+        period = math.lcm(period, fraction.numerator)
+    return period
+
+
+# Splits a recording into chunks of about chunk_duration seconds. Yields (first sample, last sample,
+# first frame, last frame): the samples to analyse, and which frames of the whole-file analysis they provide.
+# A chunk is the recording with whole alignment periods cut off both ends (keeping the overlap), so its own
+# frames (and its resampled samples, if the analysis resamples) fall on the whole-file ones. Then every frame
+# sees exactly the samples it sees in a whole-file analysis, and the stitched frames equal the whole-file ones.
+# When the frames fit the recording exactly, rounding decides whether Praat counts one frame more, and it may
+# decide differently for a chunk that ends where the recording ends. Such a chunk is moved out by the same few
+# samples on both ends instead, which keeps its centre: the samples past the end of the recording (a negative
+# first sample, or a last one past n_samples) are silence that no frame's window reaches.
+def chunk_plan(n_samples, sampling_frequency, time_step, window_duration, resampling_frequency=None,
+               chunk_duration=CHUNK_DURATION, overlap=CHUNK_OVERLAP):
+    fs = sampling_frequency
+    n_frames, first_time = frame_grid(n_samples, fs, 0.0, time_step, window_duration, resampling_frequency)
+    n_frames = int(n_frames)
+    frames_per_chunk = max(int(chunk_duration / time_step), 1)
+    if n_frames <= frames_per_chunk:
+        if n_frames > 0:
+            yield 0, n_samples, 0, n_frames
+        return
+
+    period = alignment_period(fs, time_step, resampling_frequency)
+    margin = int(np.ceil((overlap + window_duration / 2) * fs))
+    # Other ranges with the same frames: one or two periods more on either end, and both ends moved out or in
+    # by the same few samples (in by less than half a frame), which keeps the chunk's centre
+    widest = 64
+    start_periods, stop_periods, widening = np.meshgrid(
+        np.arange(3) * period, np.arange(3) * period, np.arange(-min(int(fs * time_step / 2), widest), widest),
+        indexing='ij')
+    extra_start = (start_periods + widening).ravel()
+    extra_stop = (stop_periods + widening).ravel()
+    order = np.argsort(extra_start + extra_stop, kind='stable')
+    extra_start, extra_stop = extra_start[order], extra_stop[order]
+
+    for first_frame in range(0, n_frames, frames_per_chunk):
+        last_frame = min(first_frame + frames_per_chunk, n_frames)
+        start = max(int((first_time + first_frame * time_step) * fs) - margin, 0)
+        stop = min(int(np.ceil((first_time + (last_frame - 1) * time_step) * fs)) + margin, n_samples)
+        starts = start // period * period - extra_start
+        stops = n_samples - (n_samples - stop) // period * period + extra_stop
+        valid = (starts >= -widest) & (stops <= n_samples + widest)
+        starts, stops = starts[valid], stops[valid]
+
+        chunk_frames, chunk_first_times = frame_grid(stops - starts, fs, starts / fs, time_step,
+                                                     window_duration, resampling_frequency)
+        offsets = (chunk_first_times - first_time) / time_step
+        aligned = (np.abs(offsets - np.round(offsets)) < 1e-6) & (np.round(offsets) <= first_frame) \
+            & (last_frame - np.round(offsets) <= chunk_frames)
+        if resampling_frequency:
+            target = resampled_start(n_samples, fs, 0.0, resampling_frequency)
+            offsets = (resampled_start(stops - starts, fs, starts / fs, resampling_frequency) - target) \
+                * resampling_frequency
+            aligned &= np.abs(offsets - np.round(offsets)) < 1e-6
+        # Ranges within the recording first, and ranges the frames don't fit exactly (where the count
+        # depends on rounding) before those they do
+        inside = (starts >= 0) & (stops <= n_samples)
+        _, exact_first_times = frame_grid(stops - starts, fs, starts / fs, time_step,
+                                          window_duration + 1e-9 * time_step, resampling_frequency)
+        unambiguous = exact_first_times == chunk_first_times
+        for preferred in (inside & unambiguous, inside, unambiguous, True):
+            choices = np.flatnonzero(aligned & preferred)
+            if len(choices):
+                break
+        else:
+            raise ValueError(f"No chunk of the recording has the frames {first_frame}-{last_frame} "
+                             f"of the whole recording.")
+        yield int(starts[choices[0]]), int(stops[choices[0]]), first_frame, last_frame
+
+
+# Empty array for a result, memory-mapped to a temporary file when it's bigger than SCRATCH_BYTES
+def result_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    if int(np.prod(shape)) * dtype.itemsize <= SCRATCH_BYTES:
+        return np.empty(shape, dtype)
+    return np.memmap(tempfile.TemporaryFile(), dtype=dtype, mode='w+', shape=shape)
+
+
+# Memory an array takes up, not counting arrays that live in a file
+def resident_nbytes(array):
+    return 0 if isinstance(array, np.memmap) else array.nbytes
+
+
+# Runs a short-term analysis chunk by chunk and stitches the frames back together.
+# frames(snd) analyses one chunk and returns (frame times, frames x values matrix); kind names the analysis
+# in DEFAULT_PARAMETERS. Only one chunk of samples is ever in memory. A recording that fits in one chunk is
+# analysed as a whole, and the frame times always come from Praat's own output.
+# Returns the frame times and the (frames x values) matrix of the whole recording. Raises ValueError rather
+# than read a long recording in one piece when its chunks can't have the whole-file frames (see chunk_plan).
+def chunked_analysis(source, kind, frames, parameters=None, chunk_duration=CHUNK_DURATION, overlap=CHUNK_OVERLAP):
+    fs = source.sampling_frequency
+    time_step, window_duration, resampling_frequency = analysis_layout(kind, fs, parameters)
+    n_frames, first_time = frame_grid(source.n_samples, fs, source.start_time, time_step, window_duration,
+                                      resampling_frequency)
+    n_frames = int(n_frames)
+    if n_frames < 1:
+        raise ValueError(f"The sound is shorter than the {kind} analysis window ({window_duration:.3f} s).")
+
+    plan = list(chunk_plan(source.n_samples, fs, time_step, window_duration, resampling_frequency,
+                           chunk_duration, overlap))
+    if len(plan) == 1 and plan[0][:2] == (0, source.n_samples):
+        times, values = frames(Sound(source.read(0, source.n_samples), fs, source.start_time))
+        return np.asarray(times, dtype=float), values
+
+    times = np.empty(n_frames)
+    values = None
+    for start, stop, first_frame, last_frame in plan:
+        samples = source.read(start, stop)
+        if start < 0 or stop > source.n_samples:
+            samples = np.pad(samples, ((0, 0), (max(-start, 0), max(stop - source.n_samples, 0))))
+        snd = Sound(samples, fs, source.start_time + start / fs)
+        chunk_times, chunk_values = frames(snd)
+        chunk_times = np.asarray(chunk_times, dtype=float)
+        offset = (chunk_times[0] - first_time) / time_step if len(chunk_times) else np.nan
+        if not abs(offset - round(offset)) < 1e-6 \
+                or not 0 <= first_frame - round(offset) <= last_frame - round(offset) <= len(chunk_times):
+            # chunk_plan lays the chunks out from the same arithmetic as Praat, so this is a bug, not a layout
+            # to work around by reading the whole recording
+            raise ValueError(f"The {kind} frames of samples {start}-{stop} don't line up with the whole "
+                             f"recording's.")
+        offset = int(round(offset))
+        if values is None:
+            values = result_array((n_frames, chunk_values.shape[1]), chunk_values.dtype)
+        times[first_frame:last_frame] = chunk_times[first_frame - offset:last_frame - offset]
+        values[first_frame:last_frame] = chunk_values[first_frame - offset:last_frame - offset]
+    return times, values
+
+
+# Largest distance of any sample from its channel's mean, which is what Praat's pitch analysis calls
+# the global peak. Read one block at a time.
+def peak_amplitude(source, block_size=2 ** 20):
+    totals = np.zeros(source.n_channels)
+    for _, values in source.blocks(block_size):
+        totals += values.sum(axis=1)
+    means = totals / max(source.n_samples, 1)
+    peak = 0.0
+    for _, values in source.blocks(block_size):
+        peak = max(peak, np.abs(values - means[:, None]).max())
+    return peak
+
+
+# global_peak is the peak amplitude of the whole recording. A chunk's silence threshold is rescaled by it,
+# so frames are judged silent (and unvoiced) exactly as they would be in a whole-file analysis.
+def pitch_frames(snd, parameters=None, global_peak=None):
+    silence_threshold = 0.03
+    chunk_peak = np.abs(snd.values - snd.values.mean(axis=1, keepdims=True)).max()
+    if global_peak and chunk_peak > 0:
+        silence_threshold *= global_peak / chunk_peak
+    times, values = pitch_track(analyze_pitch(snd, parameters, silence_threshold))
+    return times, values[:, None]
+
+
+def intensity_frames(snd, parameters=None):
+    times, values = intensity_track(analyze_intensity(snd, parameters))
+    return times, values[:, None]
+
+
+def formant_frames(snd, parameters=None):
+    return formant_matrix(analyze_formants(snd, parameters))
+
+
+# Spectrogram in dB with the grids imshow/pcolormesh need, computed chunk by chunk.
+# The dB values are kept as float32, which is plenty for display and halves the memory of long recordings.
+def analyze_spectrogram(source, parameters=None, chunk_duration=CHUNK_DURATION, overlap=CHUNK_OVERLAP):
+    settings = analysis_parameters(parameters)['spectrogram']
+    frequencies = {}
+
+    def frames(snd):
+        spectrogram = snd.to_spectrogram(**settings)
+        frequencies.update(y_grid=np.asarray(spectrogram.y_grid()), ymin=spectrogram.ymin, ymax=spectrogram.ymax)
+        with np.errstate(divide='ignore'):
+            db = (10 * np.log10(spectrogram.values.T)).astype(np.float32)
+        return np.asarray(spectrogram.xs()), db
+
+    times, db = chunked_analysis(source, 'spectrogram', frames, parameters, chunk_duration, overlap)
+    time_step = settings['time_step']
+    return {
+        'x_grid': np.append(times - time_step / 2, times[-1] + time_step / 2),
+        'y_grid': frequencies['y_grid'],
+        'db': db.T,
+        'ymin': frequencies['ymin'],
+        'ymax': frequencies['ymax'],
+    }
+
+
+# Everything computed for one file: its samples (memory-mapped when possible) plus each analysis,
+# computed the first time it's asked for. Pitch, intensity and formants are (times, values) tracks.
+# Analyses may be requested from worker threads; the lock makes sure each one is only computed once.
+class AnalysisEntry:
+    TRACKS = ('pitch', 'intensity', 'formant_matrix')
+
+    def __init__(self, file_name, parameters=None, cache=None):
+        self.file_name = file_name
+        self.parameters = parameters
+        self.cache = cache
+        self.source = open_audio(file_name)
+        self.results = {}
+        self.pending = {}  # kind -> Future of an analysis that is running on some thread
+        self.lock = threading.Lock()  # guards results and pending only; analyses run outside it
+
+    # Each kind is computed once. A thread asking for a kind that another thread is computing waits for that
+    # result, while different kinds (e.g. the pitch track and the formants) are computed at the same time.
+    def get(self, kind):
+        with self.lock:
+            if kind in self.results:
+                return self.results[kind]
+            future = self.pending.get(kind)
+            owner = future is None
+            if owner:
+                future = self.pending[kind] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = self.compute(kind)
+        except BaseException as e:
+            with self.lock:
+                del self.pending[kind]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.results[kind] = result
+            del self.pending[kind]
+        future.set_result(result)
+        if self.cache is not None:
+            self.cache.enforce_budget()
+        return result
+
+    # A result that is computed already, without computing it (KeyError if it isn't).
+    # For the window's thread, which must never run an analysis itself.
+    def finished(self, kind):
+        with self.lock:
+            return self.results[kind]
+
+    def compute(self, kind):
+        if kind == 'spectrogram':
+            return analyze_spectrogram(self.source, self.parameters)
+        if kind == 'envelope':
+            return EnvelopePyramid(self.source)
+        if kind == 'spectrogram_pyramid':
+            spectrogram = self.get('spectrogram')
+            return SpectrogramPyramid(spectrogram['db'], spectrogram['x_grid'], spectrogram['y_grid'])
+        if kind == 'pitch':
+            global_peak = peak_amplitude(self.source)
+            times, values = chunked_analysis(self.source, 'pitch',
+                                             lambda snd: pitch_frames(snd, self.parameters, global_peak),
+                                             self.parameters)
+            return times, values[:, 0]
+        if kind == 'intensity':
+            times, values = chunked_analysis(self.source, 'intensity',
+                                             lambda snd: intensity_frames(snd, self.parameters), self.parameters)
+            return times, values[:, 0]
+        if kind == 'formant_matrix':
+            return chunked_analysis(self.source, 'formant', lambda snd: formant_frames(snd, self.parameters),
+                                    self.parameters)
+        raise KeyError(kind)
+
+    # Rough memory footprint: the decoded samples (none when memory-mapped) and the arrays behind each analysis
+    @property
+    def nbytes(self):
+        total = self.source.nbytes
+        spectrogram = self.results.get('spectrogram')
+        if spectrogram is not None:
+            total += resident_nbytes(spectrogram['db'])
+        for kind in self.TRACKS:
+            if kind in self.results:
+                times, values = self.results[kind]
+                total += times.nbytes + values.nbytes
+        for kind in ('envelope', 'spectrogram_pyramid'):
+            if kind in self.results:
+                total += self.results[kind].nbytes
+        return total
+
+
+# Keeps the analyses of recently opened files, keyed by path, modification time and analysis parameters,
+# so redrawing never re-reads the file or recomputes. The least recently used files are dropped
+# when the total goes over the memory budget.
+class AnalysisCache:
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def key(file_name, parameters=None):
+        stat = os.stat(file_name)
+        merged = analysis_parameters(parameters)
+        frozen = tuple((name, tuple(sorted(values.items()))) for name, values in sorted(merged.items()))
+        return os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size, frozen
+
+    def entry(self, file_name, parameters=None):
+        key = self.key(file_name, parameters)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = AnalysisEntry(file_name, parameters, cache=self)
+                self.entries[key] = entry
+            self.entries.move_to_end(key)
+        self.enforce_budget()
+        return entry
+
+    @property
+    def nbytes(self):
+        with self.lock:
+            return sum(entry.nbytes for entry in list(self.entries.values()))
+
+    # Drops the least recently used files until the budget is met, but always keeps the most recent one
+    def enforce_budget(self):
+        with self.lock:
+            while len(self.entries) > 1 and self.nbytes > self.max_bytes:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Shared by every Audio Analysis Tools window
+analysis_cache = AnalysisCache()
+
+
+# Analyses one file and returns its tidy table: one row per formant frame.
+# Long recordings are analysed chunk by chunk, so memory use doesn't grow with the length of the file.
+def extract_file(file_name, parameters=None):
+    entry = AnalysisEntry(file_name, parameters)
+    times, formant_values = entry.get('formant_matrix')
+    pitch_times, pitch_values = entry.get('pitch')
+    intensity_times, intensity_values = entry.get('intensity')
+
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    table = pd.DataFrame({
+        'file': file_name,
+        'time': times,
+        'f0': sample_track(times, pitch_times, pitch_values, times),
+        'f1': formant_values[:, 0],
+        'f2': formant_values[:, 1],
+        'f3': formant_values[:, 2],
+        'f4': formant_values[:, 3],
+        'intensity': sample_track(times, intensity_times, intensity_values, times),
+        'vowel': '',
+        'speaker': stem,
+    })
+    return table[EXTRACTION_COLUMNS]
+
+
+# Expands the given files and folders into a sorted list of audio files
+def find_audio_files(inputs):
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+# Analyses many files in a process pool (one process per core by default).
+# progress(done, total, file_name, error) is called as each file finishes; error is None on success.
+# Returns the combined table and a list of (file_name, error message) for the files that failed.
+def extract_corpus(inputs, parameters=None, max_workers=None, progress=None, should_stop=None):
+    files = find_audio_files(inputs)
+    tables, failures = [], []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(extract_file, file_name, parameters): file_name for file_name in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            file_name = futures[future]
+            error = None
+            try:
+                tables.append(future.result())
+            except Exception as e:
+                error = str(e)
+                failures.append((file_name, error))
+            if progress:
+                progress(done, len(files), file_name, error)
+            if should_stop and should_stop():
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    if tables:
+        table = pd.concat(tables, ignore_index=True)
+        # Keep the files in the order they were given, not the order they finished in
+        order = {file_name: i for i, file_name in enumerate(files)}
+        table = table.sort_values(['file', 'time'], key=lambda s: s.map(order) if s.name == 'file' else s,
+                                  kind='stable', ignore_index=True)
+    else:
+        table = pd.DataFrame(columns=EXTRACTION_COLUMNS)
+    return table, failures
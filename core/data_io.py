@@ -0,0 +1,192 @@
+# core/data_io.py
+# Reading datasets from disk, shared by the main window and the batch command line tool.
+
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+# Various representations of missing values found in the spreadsheets
+NA_VALUES = ['', 'NaN', 'nan', 'N/A', 'NA', 'n/a']
+FORMANT_COLUMNS = ['f0', 'f1', 'f2', 'f3', 'f4']
+CATEGORY_COLUMNS = ['vowel', 'speaker']
+EXCEL_EXTENSIONS = ('.xls', '.xlsx')
+TEXT_EXTENSIONS = ('.csv', '.tsv')
+ARROW_EXTENSIONS = ('.parquet', '.feather')  # need pyarrow
+DATASET_EXTENSIONS = EXCEL_EXTENSIONS + TEXT_EXTENSIONS + ARROW_EXTENSIONS
+
+# Rows per batch when a dataset is read in batches (see iter_dataset)
+CHUNK_ROWS = 50000
+
+# File dialog filter for every format read_dataset() knows
+DATASET_FILTER = ("Datasets (*.xls *.xlsx *.csv *.tsv *.parquet *.feather);;Excel Files (*.xls *.xlsx);;"
+                  "CSV/TSV Files (*.csv *.tsv);;Parquet/Feather Files (*.parquet *.feather);;All Files (*)")
+
+
+# Reads a dataset and cleans it up the same way for every caller.
+# The files should have columns named "vowel", "speaker", and F values.
+def read_dataset(file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        new_data = read_text_table(file_name, sep='\t' if extension == '.tsv' else ',')
+    elif extension in ARROW_EXTENSIONS:
+        new_data = read_arrow_table(file_name, extension)
+    else:
+        new_data = pd.read_excel(file_name, na_values=NA_VALUES)
+    return clean_dataset(new_data)
+
+
+# Column types for a table with the given columns: formants straight into float arrays, vowel and speaker
+# into categoricals, anything else left to the parser
+def dataset_schema(columns):
+    schema = {column: 'float64' for column in columns if column in FORMANT_COLUMNS}
+    schema.update({column: 'category' for column in columns if column in CATEGORY_COLUMNS})
+    return schema
+
+
+# CSV or TSV with the schema applied while parsing, so no column is converted afterwards
+def read_text_table(file_name, sep=','):
+    columns = pd.read_csv(file_name, sep=sep, nrows=0).columns
+    schema = dataset_schema(columns)
+    try:
+        return pd.read_csv(file_name, sep=sep, dtype=schema, na_values=NA_VALUES, engine='c')
+    except ValueError:
+        # A formant column holds something that isn't a number; read it as text and let
+        # clean_dataset() coerce it the way the Excel import does
+        schema = {column: dtype for column, dtype in schema.items() if dtype != 'float64'}
+        return pd.read_csv(file_name, sep=sep, dtype=schema, na_values=NA_VALUES, engine='c')
+
+
+# Parquet or Feather, which already store typed columns
+def read_arrow_table(file_name, extension):
+    if importlib.util.find_spec('pyarrow') is None:
+        raise ImportError(f"Reading {extension} files needs pyarrow (pip install pyarrow).")
+    if extension == '.parquet':
+        new_data = pd.read_parquet(file_name)
+    else:
+        new_data = pd.read_feather(file_name)
+    return typed_arrow_frame(new_data)
+
+
+# Missing values may still be spelled out in the text columns of an Arrow table, and vowel and speaker
+# may be plain strings
+def typed_arrow_frame(new_data):
+    for column in new_data.columns:
+        if new_data[column].dtype == object:
+            new_data[column] = new_data[column].mask(new_data[column].isin(NA_VALUES))
+    for column, dtype in dataset_schema(new_data.columns).items():
+        if dtype == 'category' and not isinstance(new_data[column].dtype, pd.CategoricalDtype):
+            new_data[column] = new_data[column].astype('category')
+    return new_data
+
+
+# Reads a dataset in batches of about chunk_rows rows, cleaned like read_dataset() does.
+# Yields (batch, fraction of the file read so far); stopping the iteration stops reading.
+def iter_dataset(file_name, chunk_rows=CHUNK_ROWS):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        yield from iter_text_table(file_name, '\t' if extension == '.tsv' else ',', chunk_rows)
+    elif extension == '.xlsx':
+        yield from iter_xlsx(file_name, chunk_rows)
+    elif extension == '.parquet':
+        yield from iter_parquet(file_name, chunk_rows)
+    else:
+        # Formats that can only be read whole are still handed out in batches
+        new_data = read_dataset(file_name)
+        for start in range(0, len(new_data), chunk_rows):
+            yield new_data.iloc[start:start + chunk_rows], min(start + chunk_rows, len(new_data)) / len(new_data)
+
+
+def iter_text_table(file_name, sep, chunk_rows):
+    schema = dataset_schema(pd.read_csv(file_name, sep=sep, nrows=0).columns)
+    size = max(os.path.getsize(file_name), 1)
+    rows_read = 0
+    typed = True
+    with open(file_name, 'rb') as handle:
+        reader = pd.read_csv(handle, sep=sep, dtype=schema, na_values=NA_VALUES, chunksize=chunk_rows)
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except ValueError:
+                if not typed:
+                    raise
+                # A formant column holds something that isn't a number: the rest of the file is read
+                # without the float types, starting after the rows already handed out
+                typed = False
+                handle.seek(0)
+                schema = {column: dtype for column, dtype in schema.items() if dtype != 'float64'}
+                reader = pd.read_csv(handle, sep=sep, dtype=schema, na_values=NA_VALUES, chunksize=chunk_rows,
+                                     skiprows=range(1, rows_read + 1))
+                continue
+            rows_read += len(chunk)
+            yield clean_dataset(chunk), min(handle.tell() / size, 1.0)
+
+
+# .xlsx files are streamed row by row with openpyxl's read-only mode instead of loading the whole workbook
+def iter_xlsx(file_name, chunk_rows):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+        total = max((sheet.max_row or 0) - 1, 1)
+        rows_read = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                rows_read += len(batch)
+                yield xlsx_batch(batch, columns), min(rows_read / total, 1.0)
+                batch = []
+        if batch:
+            yield xlsx_batch(batch, columns), 1.0
+    finally:
+        workbook.close()
+
+
+def xlsx_batch(rows, columns):
+    new_data = pd.DataFrame.from_records(rows, columns=columns, nrows=len(rows))
+    new_data = new_data.replace(NA_VALUES, np.nan)
+    return clean_dataset(new_data)
+
+
+def iter_parquet(file_name, chunk_rows):
+    if importlib.util.find_spec('pyarrow') is None:
+        raise ImportError("Reading .parquet files needs pyarrow (pip install pyarrow).")
+    import pyarrow.parquet
+
+    parquet_file = pyarrow.parquet.ParquetFile(file_name)
+    total = max(parquet_file.metadata.num_rows, 1)
+    rows_read = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+        rows_read += batch.num_rows
+        yield clean_dataset(typed_arrow_frame(batch.to_pandas())), min(rows_read / total, 1.0)
+
+
+def clean_dataset(new_data):
+    # Ensure all formant columns are treated as numeric and handle errors gracefully
+    # (columns that were already parsed as numbers are left as they are)
+    for col in FORMANT_COLUMNS:
+        if col in new_data.columns and not pd.api.types.is_numeric_dtype(new_data[col]):
+            new_data[col] = pd.to_numeric(new_data[col], errors='coerce')
+
+    # Set 'speaker' column to an empty string if it doesn't exist
+    if 'speaker' not in new_data.columns:
+        new_data['speaker'] = ''
+
+    # Fill missing values in 'speaker' column with 'N/A'
+    speaker = new_data['speaker']
+    if isinstance(speaker.dtype, pd.CategoricalDtype) and 'N/A' not in speaker.cat.categories:
+        speaker = speaker.cat.add_categories('N/A')
+    new_data['speaker'] = speaker.fillna('N/A')
+
+    # Drop rows with any missing values after conversion
+    return new_data.dropna()
@@ -0,0 +1,282 @@
+# core/data_store.py
+# Columnar storage for the tokens entered in the main window. Every column lives in a preallocated buffer
+# that doubles when it's full, so adding a row is amortized O(1) instead of a pd.concat of the whole table.
+# Formant (and other numeric) columns are float64 buffers; vowel and speaker are kept as category codes.
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COLUMNS = ["vowel", "f0", "f1", "f2", "f3", "f4", "speaker"]
+CATEGORY_COLUMNS = ("vowel", "speaker")
+NUMERIC_COLUMNS = ("f0", "f1", "f2", "f3", "f4")
+# Written rows are remembered in blocks of this many rows, for saving only what changed (see core/project.py)
+CHANGE_BLOCK_ROWS = 1024
+
+
+# The plotting and normalization code work on a DataFrame, which frame() gives them as a view of the
+# buffers: building it only slices them, and in-place writes like df.loc[rows, 'zsc_f1'] = ... land in the
+# store. Columns added to or replaced in that frame are taken back into the store before the next change.
+# Vowel and speaker are Categorical columns in the frame, built from the store's codes, so grouping by them
+# (pd.factorize in plotting and normalization) works on the codes instead of hashing strings. In-place edits
+# of those change the Categorical's codes and are found by sync(), which compares them with the store's.
+# In-place writes to the other columns can't be seen from here: whoever makes them reports the rows to
+# mark_written(), so the next project save writes them.
+class DataStore:
+    def __init__(self, columns=DEFAULT_COLUMNS, capacity=64):
+        self.capacity = capacity
+        self.n_rows = 0
+        self.columns = []
+        self.buffers = {}  # column -> float64 or object buffer (the values of a category column)
+        self.codes = {}  # category column -> int32 codes, -1 for missing
+        self.categories = {}  # category column -> (list of values, value -> code)
+        self.frame_cache = None
+        self.frame_categoricals = {}  # category column -> the Categorical handed out in frame_cache
+        self.changed = {}  # column -> blocks of rows (see CHANGE_BLOCK_ROWS) written since mark_saved()
+        for column in columns:
+            self.add_column(column)
+
+    def __len__(self):
+        return self.n_rows
+
+    def add_column(self, column, dtype=None):
+        if column in CATEGORY_COLUMNS:
+            self.buffers[column] = np.full(self.capacity, np.nan, dtype=object)
+            self.codes[column] = np.full(self.capacity, -1, dtype=np.int32)
+            self.categories[column] = ([], {})
+        elif column in NUMERIC_COLUMNS or (dtype is not None and _is_numeric(dtype)):
+            self.buffers[column] = np.full(self.capacity, np.nan)
+        else:
+            self.buffers[column] = np.full(self.capacity, np.nan, dtype=object)
+        if column not in self.columns:
+            self.columns.append(column)
+
+    # Makes room for at least n_rows rows, doubling the capacity as needed
+    def reserve(self, n_rows):
+        if n_rows <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < n_rows:
+            capacity *= 2
+        for arrays, fill in ((self.buffers, np.nan), (self.codes, -1)):
+            for column, array in arrays.items():
+                grown = np.full(capacity, fill, dtype=array.dtype)
+                grown[:self.n_rows] = array[:self.n_rows]
+                arrays[column] = grown
+        self.capacity = capacity
+
+    # Codes of values in a category column, adding new categories at the end. Missing values (None, NaN)
+    # are -1; an empty string is a category like any other, as it is for pandas.
+    def encode(self, column, values):
+        names, lookup = self.categories[column]
+        values = pd.Series(values, dtype=object)
+        missing = values.isna().to_numpy()
+        codes, uniques = pd.factorize(values[~missing])
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            if value not in lookup:
+                lookup[value] = len(names)
+                names.append(value)
+            mapping[i] = lookup[value]
+        result = np.full(len(values), -1, dtype=np.int32)
+        result[~missing] = mapping[codes]
+        return result
+
+    # Code of one value, the scalar version of encode()
+    def encode_value(self, column, value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return -1
+        names, lookup = self.categories[column]
+        if value not in lookup:
+            lookup[value] = len(names)
+            names.append(value)
+        return lookup[value]
+
+    # The codes of a category column and the values they stand for
+    def category_codes(self, column):
+        self.sync()
+        return self.codes[column][:self.n_rows], list(self.categories[column][0])
+
+    # Writes values into some rows (a slice or row positions) of a column, turning a numeric buffer into
+    # an object one if needed
+    def write(self, column, rows, values):
+        self.mark_written(rows, [column])
+        if isinstance(values, pd.Categorical):
+            if column in self.categories:
+                # Only the categories are looked up, the rows just follow their codes
+                mapping = np.append(self.encode(column, values.categories), -1)
+                codes = self.codes[column][rows] = mapping[values.codes]  # code -1 picks the trailing -1
+                names = np.array(self.categories[column][0] + [np.nan], dtype=object)
+                self.buffers[column][rows] = names[codes]
+                return
+            values = values.to_numpy()
+        values = np.asarray(values)
+        if column in self.categories:
+            codes = self.codes[column][rows] = self.encode(column, values)
+            names = np.array(self.categories[column][0] + [np.nan], dtype=object)
+            self.buffers[column][rows] = names[codes]  # code -1 picks the trailing NaN
+            return
+        buffer = self.buffers[column]
+        if buffer.dtype != object and not _is_numeric(values.dtype):
+            series = pd.Series(values, dtype=object)
+            numeric = pd.to_numeric(series, errors='coerce')
+            if (numeric.isna() & series.notna()).any():
+                buffer = self.buffers[column] = buffer.astype(object)
+            else:
+                values = numeric.to_numpy(dtype=float)
+        buffer[rows] = values
+
+    # Writes one value, without the array machinery of write()
+    def write_value(self, column, row, value):
+        self.changed.setdefault(column, set()).add(row // CHANGE_BLOCK_ROWS)
+        if column in self.categories:
+            code = self.codes[column][row] = self.encode_value(column, value)
+            self.buffers[column][row] = np.nan if code < 0 else value
+            return
+        buffer = self.buffers[column]
+        if buffer.dtype != object:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                buffer = self.buffers[column] = buffer.astype(object)
+        buffer[row] = value
+
+    # Takes the columns that were added to, replaced in or edited in the handed-out frame back into the store
+    def sync(self):
+        frame = self.frame_cache
+        if frame is None:
+            return
+        for column in frame.columns:
+            if column in self.categories:
+                values = frame[column].array
+                categorical = self.frame_categoricals.get(column)
+                if values is not categorical:
+                    self.set_column(column, values)
+                else:
+                    rows = np.flatnonzero(categorical.codes != self.codes[column][:self.n_rows])
+                    if len(rows):
+                        self.write(column, rows, categorical[rows])  # edited in place
+                continue
+            values = frame[column].to_numpy()
+            if column not in self.buffers or not np.shares_memory(values, self.buffers[column]):
+                self.set_column(column, values)
+        for column in [column for column in self.columns if column not in frame.columns]:
+            self.drop_column(column)
+        self.frame_cache = None
+
+    # The rows as a DataFrame over the buffers, cached until the rows change
+    def frame(self):
+        if self.frame_cache is None:
+            self.frame_categoricals = {
+                column: pd.Categorical.from_codes(self.codes[column][:self.n_rows], self.categories[column][0])
+                for column in self.columns if column in self.categories
+            }
+            data = {column: self.frame_categoricals.get(column, self.buffers[column][:self.n_rows])
+                    for column in self.columns}
+            self.frame_cache = pd.DataFrame(data, columns=self.columns, copy=False)
+        return self.frame_cache
+
+    # Adds one row from a {column: value} mapping; columns it doesn't mention are left missing
+    def append(self, row):
+        self.sync()
+        self.reserve(self.n_rows + 1)
+        for column, value in row.items():
+            if column not in self.buffers:
+                self.add_column(column, dtype=np.asarray(value).dtype)
+            self.write_value(column, self.n_rows, value)
+        self.n_rows += 1
+
+    # Adds all the rows of a DataFrame (imports, batch extraction)
+    def extend(self, df):
+        self.sync()
+        self.reserve(self.n_rows + len(df))
+        for column in df.columns:
+            if column not in self.buffers:
+                self.add_column(column, dtype=df[column].dtype)
+            self.write(column, slice(self.n_rows, self.n_rows + len(df)), df[column].array)
+        self.n_rows += len(df)
+
+    # A copy of the rows from start on, with every column
+    def take(self, start):
+        self.sync()
+        return pd.DataFrame({column: self.buffers[column][start:self.n_rows].copy() for column in self.columns},
+                            columns=self.columns)
+
+    # Removes the rows from start on
+    def truncate(self, start):
+        self.sync()
+        for column in self.columns:
+            self.buffers[column][start:self.n_rows] = np.nan
+            if column in self.codes:
+                self.codes[column][start:self.n_rows] = -1
+        self.n_rows = min(start, self.n_rows)
+
+    # A copy of a column's values, None if there is no such column
+    def column_values(self, column):
+        self.sync()
+        return self.buffers[column][:self.n_rows].copy() if column in self.buffers else None
+
+    # Sets all the values of a column, adding it if needed
+    def set_column(self, column, values):
+        values = np.asarray(values)
+        if column not in self.buffers:
+            self.add_column(column, dtype=values.dtype)
+        elif values.dtype == object and self.buffers[column].dtype != object and column not in self.categories:
+            self.buffers[column] = self.buffers[column].astype(object)
+        self.write(column, slice(0, len(values)), values)
+        self.frame_cache = None
+
+    def drop_column(self, column):
+        self.columns.remove(column)
+        del self.buffers[column]
+        self.changed.pop(column, None)
+        self.codes.pop(column, None)
+        self.categories.pop(column, None)
+        self.frame_cache = None
+
+    # Values of a column at some row positions, and setting them
+    def cells(self, rows, column):
+        self.sync()
+        return self.buffers[column][rows].copy()
+
+    def set_cells(self, rows, column, values):
+        self.sync()
+        self.write(column, rows, values)
+
+    # Remembers that some rows (a slice or row positions) of some columns (all of them by default) were written
+    def mark_written(self, rows, columns=None):
+        if isinstance(rows, slice):
+            start, stop, _ = rows.indices(self.capacity)
+            blocks = range(start // CHANGE_BLOCK_ROWS, -(-stop // CHANGE_BLOCK_ROWS))
+        else:
+            blocks = np.unique(np.asarray(rows, dtype=np.int64) // CHANGE_BLOCK_ROWS).tolist()
+        for column in self.columns if columns is None else columns:
+            self.changed.setdefault(column, set()).update(blocks)
+
+    # Whether any of rows start:stop of a column was written since mark_saved()
+    def was_written(self, column, start, stop):
+        blocks = self.changed.get(column, ())
+        return any(block in blocks for block in range(start // CHANGE_BLOCK_ROWS, -(-stop // CHANGE_BLOCK_ROWS)))
+
+    # Called once everything is on disk
+    def mark_saved(self):
+        self.changed = {}
+
+    # Removes every row but keeps the columns
+    def clear(self):
+        self.sync()
+        self.n_rows = 0
+        for column in self.columns:
+            self.add_column(column, dtype=self.buffers[column].dtype)
+
+    # Replaces the whole content with the rows and columns of a DataFrame
+    def replace(self, df):
+        self.frame_cache = None
+        self.n_rows = 0
+        self.columns, self.buffers, self.codes, self.categories = [], {}, {}, {}
+        for column in df.columns:
+            self.add_column(column, dtype=df[column].dtype)
+        self.extend(df)
+
+
+def _is_numeric(dtype):
+    return pd.api.types.is_numeric_dtype(dtype)
@@ -0,0 +1,72 @@
+# core/derived_cache.py
+# Remembers the results of the normalizations and scale conversions, so switching back and forth
+# between them is a lookup instead of a recompute.
+
+from collections import OrderedDict
+
+from core.normalization import METHODS, method_dependencies, derive_columns
+
+
+class DerivedCache:
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        # key -> (source columns it depends on, dataframe with the derived columns), oldest first
+        self.entries = OrderedDict()
+        # source column -> version number, bumped every time that column changes
+        self.column_versions = {}
+        # bumped when rows are added or removed, which changes every column at once
+        self.row_version = 0
+
+    # (method, formants, grouping column, data version), where the data version only covers
+    # the columns the method actually reads
+    def key(self, method, formants, group_column='speaker'):
+        dependencies = method_dependencies(method, formants, group_column)
+        grouped = METHODS[method][1]
+        versions = tuple(self.column_versions.get(column, 0) for column in dependencies)
+        return method, tuple(formants), group_column if grouped else None, self.row_version, versions
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, dependencies, result):
+        self.entries[key] = (set(dependencies), result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # least recently used
+
+    # Cell edits: only entries that read one of the edited columns are dropped
+    def invalidate_columns(self, columns):
+        columns = set(columns)
+        for column in columns:
+            self.column_versions[column] = self.column_versions.get(column, 0) + 1
+        for key in [key for key, (dependencies, _) in self.entries.items() if dependencies & columns]:
+            del self.entries[key]
+
+    # Added, removed or replaced rows: every entry is outdated
+    def invalidate_rows(self):
+        self.row_version += 1
+        self.entries.clear()
+
+    # Returns the derived columns for a method, computing them only on a cache miss
+    def derive(self, df, method, formants, group_column='speaker'):
+        key = self.key(method, formants, group_column)
+        result = self.get(key)
+        if result is None:
+            result = derive_columns(df, method, formants, group_column)
+            self.put(key, method_dependencies(method, formants, group_column), result)
+        return result
+
+    # The entries that are still up to date with the data, as (method, formants, grouping column, result)
+    def current_entries(self):
+        for key, (_, result) in list(self.entries.items()):
+            method, formants, group_column = key[0], list(key[1]), key[2] or 'speaker'
+            if key == self.key(method, formants, group_column):
+                yield method, formants, group_column, result
+
+    # Stores a result computed earlier (e.g. read back from a project file) as up to date with the data
+    def seed(self, method, formants, group_column, result):
+        self.put(self.key(method, formants, group_column), method_dependencies(method, formants, group_column), result)
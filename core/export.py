@@ -0,0 +1,69 @@
+# core/export.py
+# Saving figures without blocking the window. The figure is pickled as it is at the moment the user saves
+# (a snapshot), and a separate process unpickles it and renders it on its own Agg canvas. The window can
+# keep changing the plot in the meantime, and a cancelled export is simply stopped.
+
+import multiprocessing
+import pickle
+
+# Spawned rather than forked: forking a process with Qt's threads running is not safe
+_context = multiprocessing.get_context('spawn')
+
+
+# The figure with all its artists, as bytes that can be sent to another process
+def snapshot_figure(figure):
+    return pickle.dumps(figure, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# Renders a snapshot to file_name. progress(percent, message) is called along the way;
+# the rendering part advances as the axes of the figure are drawn.
+def render_snapshot(snapshot, file_name, format, dpi, progress=None):
+    # The snapshot remembers that it came from pyplot, and would otherwise restore itself into a GUI window
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    progress = progress or (lambda percent, message: None)
+    progress(5, 'Preparing')
+    figure = pickle.loads(snapshot)
+    FigureCanvasAgg(figure)
+
+    axes = figure.axes
+    drawn = [0]
+
+    def draw_axes(ax, draw):
+        def draw_and_report(renderer):
+            draw(renderer)
+            drawn[0] += 1
+            progress(10 + 80 * drawn[0] // len(axes), 'Rendering')
+        return draw_and_report
+
+    for ax in axes:
+        ax.draw = draw_axes(ax, ax.draw)
+
+    progress(10, 'Rendering')
+    figure.savefig(file_name, format=format, dpi=dpi)
+    progress(100, 'Saved')
+
+
+# Runs in the export process and reports back through the connection:
+# ('progress', percent, message), then ('done', None) or ('error', message)
+def _export_process(snapshot, file_name, format, dpi, connection):
+    try:
+        render_snapshot(snapshot, file_name, format, dpi,
+                        progress=lambda percent, message: connection.send(('progress', percent, message)))
+        connection.send(('done', None))
+    except Exception as e:
+        connection.send(('error', str(e)))
+    finally:
+        connection.close()
+
+
+# Starts rendering a snapshot in a new process. Returns (process, connection); the caller polls the connection
+# for the messages of _export_process and can terminate the process to cancel the export.
+def start_export(snapshot, file_name, format, dpi):
+    receiver, sender = _context.Pipe(duplex=False)
+    process = _context.Process(target=_export_process, args=(snapshot, file_name, format, dpi, sender), daemon=True)
+    process.start()
+    sender.close()  # only the child writes, so the receiver sees EOF if the child dies
+    return process, receiver
@@ -0,0 +1,153 @@
+# core/geometry.py
+# Confidence ellipses and convex hulls of the groups in the vowel space. The ellipses of all groups are
+# computed in one vectorized pass, and GroupGeometry remembers the results per group, so a redraw only
+# recomputes the groups whose points actually changed.
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from core.profiling import profiler
+
+# Scaling factor for the 67% confidence ellipse, sqrt(chi2.ppf(0.67, df=2)) in closed form
+# (the chi-squared distribution with 2 degrees of freedom is exponential)
+# https://joeystanley.com/blog/making-vowel-plots-in-r-part-1/#ellipses
+ELLIPSE_SCALE = np.sqrt(-2 * np.log(1 - 0.67))
+
+
+# Ellipse parameters of several groups at once. points_list holds one (N, 2) array per group.
+# Returns (valid, centers, widths, heights, angles), one entry per group, where a group is valid when it
+# has at least 2 points that vary along both axes. The angle (in degrees) is that of the major axis.
+def ellipse_parameters(points_list):
+    n_groups = len(points_list)
+    counts = np.array([len(points) for points in points_list], dtype=np.int64)
+    valid = counts >= 2
+    centers = np.full((n_groups, 2), np.nan)
+    widths, heights, angles = np.full(n_groups, np.nan), np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    if not valid.any():
+        return valid, centers, widths, heights, angles
+
+    kept = np.flatnonzero(valid)
+    points = np.concatenate([points_list[i] for i in kept]).astype(float)
+    sizes = counts[kept]
+    codes = np.repeat(np.arange(len(kept)), sizes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    # Every point of a group equal along one axis means there is no ellipse
+    spread = np.maximum.reduceat(points, starts) - np.minimum.reduceat(points, starts)
+    varies = (spread > 0).all(axis=1)
+
+    # Means, then the 2×2 covariances from the centered points (two passes, like np.cov)
+    mean = np.column_stack([np.bincount(codes, points[:, k], minlength=len(kept)) for k in (0, 1)]) / sizes[:, None]
+    d = points - mean[codes]
+    a = np.bincount(codes, d[:, 0] * d[:, 0], minlength=len(kept)) / (sizes - 1)
+    b = np.bincount(codes, d[:, 0] * d[:, 1], minlength=len(kept)) / (sizes - 1)
+    c = np.bincount(codes, d[:, 1] * d[:, 1], minlength=len(kept)) / (sizes - 1)
+
+    # Closed-form eigen-decomposition of [[a, b], [b, c]]
+    half_trace = (a + c) / 2
+    root = np.sqrt(((a - c) / 2) ** 2 + b ** 2)
+    major = half_trace + root
+    minor = np.maximum(half_trace - root, 0)  # rounding can push a zero eigenvalue below zero
+
+    valid[kept] = varies
+    centers[kept] = mean
+    widths[kept] = 2 * ELLIPSE_SCALE * np.sqrt(major)
+    heights[kept] = 2 * ELLIPSE_SCALE * np.sqrt(minor)
+    angles[kept] = np.degrees(0.5 * np.arctan2(2 * b, a - c))
+    return valid, centers, widths, heights, angles
+
+
+# Lower left and upper right corners of the bounding box of an ellipse (angle in degrees)
+def ellipse_bounds(center, width, height, angle):
+    theta = np.radians(angle)
+    cos, sin = np.cos(theta), np.sin(theta)
+    half_x = np.hypot(width / 2 * cos, height / 2 * sin)
+    half_y = np.hypot(width / 2 * sin, height / 2 * cos)
+    return np.array([[center[0] - half_x, center[1] - half_y], [center[0] + half_x, center[1] + half_y]])
+
+
+# Vertices of the convex hull of one group's points.
+# Returns (vertices or None, problem message or None); None, None means the group is simply too small.
+def hull_vertices(points, label):
+    # Need at least 3 non-collinear, unique points for a hull
+    if points.shape[0] < 3:
+        return None, None
+    if np.unique(points, axis=0).shape[0] < 3:
+        return None, None
+    try:
+        # Guard against degenerate rank (collinear points)
+        if np.linalg.matrix_rank(points) < 2:
+            return None, f"The input data for {label} is less than 2-dimensional."
+        from scipy.spatial import ConvexHull  # SciPy is only loaded once a hull is drawn
+
+        hull = ConvexHull(points)
+        return points[hull.vertices], None
+    except Exception as e:
+        return None, f"Qhull error for {label}: {str(e)}"
+
+
+# Remembers ellipses and hulls per (kind, group, plotted columns, grouping column). Each entry is stored
+# with a fingerprint of the group's points, so edited, added or removed rows (or a different normalization,
+# which plots other columns) recompute that group only.
+class GroupGeometry:
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (fingerprint, result), oldest first
+
+    @staticmethod
+    def fingerprint(points):
+        return hashlib.blake2b(np.ascontiguousarray(points, dtype=float).tobytes(), digest_size=16).digest()
+
+    def lookup(self, key, fingerprint):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, fingerprint, result):
+        self.entries[key] = (fingerprint, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)  # least recently used
+
+    # Ellipse (center, width, height, angle) of every group, None for groups without one.
+    # context identifies the plot (e.g. the x/y columns and the grouping column).
+    def ellipses(self, context, keys, points_list):
+        results = [None] * len(keys)
+        missing = []
+        for i, (key, points) in enumerate(zip(keys, points_list)):
+            fingerprint = self.fingerprint(points)
+            entry = self.lookup(('ellipse', key, context), fingerprint)
+            if entry is None:
+                missing.append((i, key, fingerprint))
+            else:
+                results[i] = entry[1]
+
+        profiler.note(computed=len(missing))
+        if missing:
+            valid, centers, widths, heights, angles = ellipse_parameters([points_list[i] for i, _, _ in missing])
+            for j, (i, key, fingerprint) in enumerate(missing):
+                result = (tuple(centers[j]), widths[j], heights[j], angles[j]) if valid[j] else None
+                self.put(('ellipse', key, context), fingerprint, result)
+                results[i] = result
+        return results
+
+    # (vertices or None, problem message or None) of every group, see hull_vertices
+    def hulls(self, context, keys, points_list, labels):
+        results = []
+        computed = 0
+        for key, points, label in zip(keys, points_list, labels):
+            fingerprint = self.fingerprint(points)
+            entry = self.lookup(('hull', key, context), fingerprint)
+            if entry is None:
+                result = hull_vertices(points, label)
+                self.put(('hull', key, context), fingerprint, result)
+                computed += 1
+            else:
+                result = entry[1]
+            results.append(result)
+        profiler.note(computed=computed)
+        return results
@@ -0,0 +1,169 @@
+# core/history.py
+# Undo and redo as a log of operations on the data store (see core/data_store.py). Instead of snapshots of
+# the whole table, an operation keeps only the side of its change that isn't in the store at the moment:
+# undoing swaps it with what is in the store, and redoing swaps it back. Appended rows cost nothing
+# but their row range until they're undone, so memory grows with the size of each change, and the
+# whole history is kept under a byte limit by forgetting the oldest operations.
+
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Rough bookkeeping cost of one operation, so that many small ones also count against the limit
+OPERATION_OVERHEAD = 128
+
+
+# Size in bytes of an array, a DataFrame, or a {name: array or None} mapping, counting the strings too
+def _nbytes(values):
+    if values is None:
+        return 0
+    if isinstance(values, dict):
+        return sum(_nbytes(value) for value in values.values())
+    if isinstance(values, pd.DataFrame):
+        return int(values.memory_usage(index=False, deep=True).sum())
+    if values.dtype == object:
+        return int(pd.Series(values, dtype=object).memory_usage(index=False, deep=True))
+    return values.nbytes
+
+
+# Rows from start to the end of the table. rows is None while they are in the store (right after they
+# were appended), or their values while they are not (after they were removed, or the append was undone).
+class RowRange:
+    def __init__(self, start, rows=None):
+        self.start = start
+        self.rows = rows
+
+    @property
+    def nbytes(self):
+        return OPERATION_OVERHEAD + _nbytes(self.rows)
+
+    def swap(self, store):
+        if self.rows is None:
+            self.rows = store.take(self.start)
+            store.truncate(self.start)
+        else:
+            store.extend(self.rows)
+            self.rows = None
+
+
+# Edited cells: values holds, per column, the values of those rows that are not in the store
+class CellEdits:
+    def __init__(self, rows, values):
+        self.rows = np.asarray(rows)
+        self.values = values
+
+    @property
+    def nbytes(self):
+        return OPERATION_OVERHEAD + self.rows.nbytes + _nbytes(self.values)
+
+    def swap(self, store):
+        for column, values in self.values.items():
+            self.values[column] = store.cells(self.rows, column)
+            store.set_cells(self.rows, column, values)
+
+
+# Whole columns set at once (normalization): values holds, per column, the values that are not in the
+# store, where None stands for a column that didn't exist. method names the normalization that set them, if any.
+class ColumnValues:
+    def __init__(self, values, method=None):
+        self.values = values
+        self.method = method
+
+    @property
+    def nbytes(self):
+        return OPERATION_OVERHEAD + _nbytes(self.values)
+
+    def swap(self, store):
+        for column, values in self.values.items():
+            self.values[column] = store.column_values(column)
+            if values is None:
+                store.drop_column(column)
+            else:
+                store.set_column(column, values)
+
+
+class History:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_steps = deque()  # (operations, size), oldest first
+        self.redo_steps = []  # (operations, size), next redo last
+        self.nbytes = 0
+        self.group = None  # operations recorded inside grouped(), undone as one step
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    # Adds a step that has just been done. Anything that could have been redone is forgotten.
+    def record(self, operation):
+        if self.group is not None:
+            self.group.append(operation)
+        else:
+            self.push([operation])
+
+    def push(self, operations):
+        for _, size in self.redo_steps:
+            self.nbytes -= size
+        self.redo_steps.clear()
+        size = sum(operation.nbytes for operation in operations)
+        self.undo_steps.append((operations, size))
+        self.nbytes += size
+        self.trim()
+
+    # Records everything done inside the block as one step (e.g. clearing the data, then importing)
+    @contextmanager
+    def grouped(self):
+        if self.group is not None:
+            yield
+            return
+        self.group = []
+        try:
+            yield
+        finally:
+            operations, self.group = self.group, None
+            if operations:
+                self.push(operations)
+
+    def undo(self, store):
+        return self.step(store, self.undo_steps, self.redo_steps, reverse=True)
+
+    def redo(self, store):
+        return self.step(store, self.redo_steps, self.undo_steps, reverse=False)
+
+    # Moves one step from one stack to the other, swapping its operations with the store.
+    # Returns the operations in the order they were applied (after their swap), or None if there was nothing to do.
+    def step(self, store, source, target, reverse):
+        if not source:
+            return None
+        operations, size = source.pop()
+        for operation in (reversed(operations) if reverse else operations):
+            operation.swap(store)
+        new_size = sum(operation.nbytes for operation in operations)
+        target.append((operations, new_size))
+        self.nbytes += new_size - size
+        self.trim()
+        return list(reversed(operations)) if reverse else list(operations)
+
+    # Forgets the oldest steps (then the farthest redo steps) until the history fits in max_bytes
+    def trim(self):
+        while self.nbytes > self.max_bytes and (self.undo_steps or self.redo_steps):
+            _, size = self.undo_steps.popleft() if self.undo_steps else self.redo_steps.pop(0)
+            self.nbytes -= size
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.trim()
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.nbytes = 0
+
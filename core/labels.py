@@ -0,0 +1,136 @@
+# core/labels.py
+# Point labels for scatterplots with many points. The label texts are formatted for all points at once,
+# but only the labels that fit on screen without overlapping (up to a budget) become text artists,
+# and that choice is only made again when the view limits or the size of the axes change.
+
+import numpy as np
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.text import Annotation
+
+from core.profiling import profiler
+
+# Rough size of a character of the label font, as a fraction of the font size. Labels are placed from
+# these estimates instead of measuring every text with the renderer.
+CHAR_WIDTH = 0.6
+LINE_HEIGHT = 1.2
+
+
+# Label texts for the given points, built column by column instead of row by row.
+# x_values/y_values are numeric arrays, vowels/speakers arrays of names or None when not shown.
+# Returns (texts, widest line of each text in characters, number of lines of each text).
+def format_labels(x_values, y_values, x_column, y_column, show_f=False, vowels=None, speakers=None):
+    parts = []
+    if show_f:
+        parts.append(f"{x_column}: " + np.char.mod('%.2f', x_values).astype(object))
+        parts.append(f"{y_column}: " + np.char.mod('%.2f', y_values).astype(object))
+    for names in (vowels, speakers):
+        if names is not None:
+            parts.append(np.asarray(names).astype(str).astype(object))
+
+    n = len(x_values)
+    if not parts:
+        return np.empty(0, dtype=object), np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+    texts = parts[0]
+    for part in parts[1:]:
+        texts = texts + "\n" + part
+    widths = np.max([np.char.str_len(part.astype(str)) for part in parts], axis=0) if n else np.empty(0, dtype=int)
+    return texts, widths, np.full(n, len(parts))
+
+
+# Draws the labels of a set of points (in data coordinates) as one artist of the Axes.
+# At every layout the points on screen are binned into a grid of cells as big as the largest label;
+# only the first point of each cell is a candidate, and a candidate is dropped when its label would
+# overlap a label already placed in one of the neighbouring cells. At most budget labels are drawn.
+class PointLabels(Artist):
+    def __init__(self, fontsize=8, budget=300):
+        super().__init__()
+        self.set_zorder(3)  # above the points, like any other text
+        self.fontsize = fontsize
+        self.budget = budget
+        self.offsets = np.empty((0, 2))
+        self.texts = np.empty(0, dtype=object)
+        self.widths = np.empty(0, dtype=int)
+        self.n_lines = np.empty(0, dtype=int)
+        self.annotations = []
+        self.layout_key = None  # view limits and axes size of the current layout
+
+    # offsets is an (N, 2) array of label anchors in data coordinates, the rest comes from format_labels
+    def set_labels(self, offsets, texts, widths, n_lines):
+        self.offsets = np.asarray(offsets, dtype=float).reshape(-1, 2)
+        self.texts, self.widths, self.n_lines = texts, widths, n_lines
+        self.layout_key = None
+        self.stale = True
+
+    def set_budget(self, budget):
+        if budget != self.budget:
+            self.budget = budget
+            self.layout_key = None
+            self.stale = True
+
+    # Indices of the labels to draw, in the order of the points
+    def choose_labels(self, renderer):
+        ax = self.axes
+        if not len(self.offsets) or self.budget <= 0:
+            return []
+
+        xy = ax.transData.transform(self.offsets)
+        x0, y0, x1, y1 = ax.bbox.extents
+        inside = np.isfinite(xy).all(axis=1) & (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+        candidates = np.flatnonzero(inside)
+        if not len(candidates):
+            return []
+
+        font = renderer.points_to_pixels(self.fontsize)
+        gap = renderer.points_to_pixels(5)  # labels sit 5 points above their point
+        widths = self.widths * CHAR_WIDTH * font
+        heights = self.n_lines * LINE_HEIGHT * font
+        cell_width = max(widths[candidates].max(), 1.0)
+        cell_height = max(heights[candidates].max(), 1.0)
+
+        # First point of every cell (np.unique keeps the first index of each cell id)
+        cells = np.floor(xy[candidates] / (cell_width, cell_height)).astype(np.int64)
+        cell_ids = (cells[:, 0] - cells[:, 0].min()) * (cells[:, 1].max() - cells[:, 1].min() + 1) + cells[:, 1]
+        _, first = np.unique(cell_ids, return_index=True)
+        first.sort()
+
+        placed = {}  # cell -> boxes (left, bottom, right, top) of the labels placed in it
+        chosen = []
+        for i in first:
+            index = candidates[i]
+            x, y = xy[index]
+            box = (x - widths[index] / 2, y + gap, x + widths[index] / 2, y + gap + heights[index])
+            cx, cy = cells[i]
+            neighbours = (placed.get((cx + dx, cy + dy), ()) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+            if any(box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]
+                   for boxes in neighbours for other in boxes):
+                continue
+            placed.setdefault((cx, cy), []).append(box)
+            chosen.append(index)
+            if len(chosen) >= self.budget:
+                break
+        return chosen
+
+    def layout(self, renderer):
+        self.annotations = []
+        with profiler.span('label layout', points=len(self.offsets)) as span:
+            chosen = self.choose_labels(renderer)
+            span.note(labels=len(chosen))
+        for index in chosen:
+            annotation = Annotation(self.texts[index], tuple(self.offsets[index]), textcoords="offset points",
+                                    xytext=(0, 5), ha='center', va='bottom', fontsize=self.fontsize)
+            annotation.axes = self.axes
+            annotation.set_figure(self.figure)
+            self.annotations.append(annotation)
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        key = (tuple(self.axes.viewLim.bounds), tuple(self.axes.bbox.bounds))
+        if key != self.layout_key:
+            self.layout(renderer)
+            self.layout_key = key
+        for annotation in self.annotations:
+            annotation.draw(renderer)
+        self.stale = False
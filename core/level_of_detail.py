@@ -0,0 +1,178 @@
+# core/level_of_detail.py
+# Multi-resolution versions of the waveform and the spectrogram, so drawing a recording costs about
+# as much as the number of pixels on screen instead of the number of samples in the file.
+
+import numpy as np
+
+
+# Halves a pair of min/max envelopes by combining neighbouring blocks (an odd last block is kept as is)
+def _halve(lows, highs):
+    if len(lows) % 2:
+        lows = np.append(lows, lows[-1])
+        highs = np.append(highs, highs[-1])
+    return np.minimum(lows[0::2], lows[1::2]), np.maximum(highs[0::2], highs[1::2])
+
+
+# Minimum and maximum of every block of block_size samples (a shorter last block is kept)
+def _block_envelope(low, high, block_size):
+    usable = len(low) - len(low) % block_size
+    lows = low[:usable].reshape(-1, block_size).min(axis=1)
+    highs = high[:usable].reshape(-1, block_size).max(axis=1)
+    if usable < len(low):
+        lows = np.append(lows, low[usable:].min())
+        highs = np.append(highs, high[usable:].max())
+    return lows, highs
+
+
+# Min/max envelope pyramid of the waveform. Level k holds the minimum and maximum of every block of
+# base_block * 2**k samples (over all channels), so any zoom level can be drawn from the level whose
+# block count is closest to the screen width.
+# The source is anything with n_samples, sampling_frequency, start_time, read(start, stop) and blocks(size),
+# like a memory-mapped WavFile. It is read one window at a time to build the pyramid, and zoom levels finer
+# than the first level are made from the samples on screen, so the pyramid stays small for long recordings.
+class EnvelopePyramid:
+    def __init__(self, source, base_block=256, window_blocks=4096):
+        self.source = source
+        self.sampling_frequency = float(source.sampling_frequency)
+        # Time of the first sample: like Praat, every sample sits in the middle of its own interval
+        self.start_time = float(source.start_time) + 0.5 / self.sampling_frequency
+        self.n_samples = source.n_samples
+
+        self.levels = []  # (block size in samples, lows, highs)
+        if not self.n_samples:
+            return
+        parts = [_block_envelope(*_fold_channels(values), base_block)
+                 for _, values in source.blocks(base_block * window_blocks)]  # whole blocks, except maybe the last
+        lows = np.concatenate([part[0] for part in parts])
+        highs = np.concatenate([part[1] for part in parts])
+
+        block = base_block
+        while True:
+            self.levels.append((block, lows, highs))
+            if len(lows) <= 1:
+                break
+            lows, highs = _halve(lows, highs)
+            block *= 2
+
+    @property
+    def nbytes(self):
+        return sum(lows.nbytes + highs.nbytes for _, lows, highs in self.levels)
+
+    # Returns (times, lows, highs) for the time range t0..t1 at no more than about pixel_width points.
+    # When zoomed in far enough, the raw samples are returned (lows == highs).
+    def view(self, t0, t1, pixel_width):
+        pixel_width = max(int(pixel_width), 1)
+        start = max(int(np.floor((t0 - self.start_time) * self.sampling_frequency)), 0)
+        stop = min(int(np.ceil((t1 - self.start_time) * self.sampling_frequency)) + 1, self.n_samples)
+        if stop <= start:
+            empty = np.empty(0)
+            return empty, empty, empty
+
+        visible = stop - start
+        if not self.levels or visible / self.levels[0][0] < pixel_width:
+            # Finer than the pyramid: read the samples on screen and reduce them to about one block per pixel
+            low, high = _fold_channels(self.source.read(start, stop))
+            block = max(visible // pixel_width, 1)
+            if block == 1:
+                times = self.start_time + np.arange(start, stop) / self.sampling_frequency
+                return times, low, high
+            lows, highs = _block_envelope(low, high, block)
+            times = self.start_time + (start + np.arange(len(lows)) * block + block / 2) / self.sampling_frequency
+            return times, lows, highs
+
+        for block, lows, highs in self.levels:
+            if visible / block <= pixel_width:
+                break
+        first, last = start // block, min(-(-stop // block), len(lows))
+        times = self.start_time + (np.arange(first, last) * block + block / 2) / self.sampling_frequency
+        return times, lows[first:last], highs[first:last]
+
+
+# Single-channel audio is its own envelope; several channels are folded into one
+def _fold_channels(values):
+    if values.shape[0] == 1:
+        return values[0], values[0]
+    return values.min(axis=0), values.max(axis=0)
+
+
+# Turns an envelope into one line that zigzags between the minimum and the maximum of each block,
+# which looks like the filled waveform but is a single cheap artist
+def envelope_line(times, lows, highs):
+    x = np.repeat(times, 2)
+    y = np.empty(len(x))
+    y[0::2] = lows
+    y[1::2] = highs
+    return x, y
+
+
+# Average of every block of factor neighbouring columns (a shorter last block is kept)
+def _average_columns(db, factor):
+    starts = np.arange(0, db.shape[1], factor)
+    counts = np.diff(np.append(starts, db.shape[1]))
+    return np.add.reduceat(db, starts, axis=1) / counts
+
+
+# Spectrogram pyramid along the time axis. Level k averages 2**k neighbouring columns (in dB),
+# so a long recording is drawn from a small image instead of a huge mesh.
+# Only levels of at most max_columns columns are kept in memory; closer zooms are averaged from the
+# full-resolution columns on screen, which may live in a file on disk for very long recordings.
+class SpectrogramPyramid:
+    def __init__(self, db, x_grid, y_grid, min_columns=256, max_columns=65536, window_columns=65536):
+        self.x_grid = np.asarray(x_grid)
+        self.y_grid = np.asarray(y_grid)
+        self.levels = [(1, db)]
+        n_columns = db.shape[1]
+        if not n_columns:
+            self.vmax = 0.0
+            return
+
+        factor = 2
+        while n_columns / factor > max_columns:
+            factor *= 2
+        # The first coarse level is averaged one window of columns at a time
+        window = max(window_columns // factor, 1) * factor
+        coarse = np.concatenate([_average_columns(np.asarray(db[:, i:i + window]), factor)
+                                 for i in range(0, n_columns, window)], axis=1)
+        self.vmax = max(np.max(np.asarray(db[:, i:i + window])) for i in range(0, n_columns, window))
+        if n_columns > min_columns:
+            self.levels.append((factor, coarse))
+        while coarse.shape[1] > min_columns:
+            coarse = _average_columns(coarse, 2)
+            factor *= 2
+            self.levels.append((factor, coarse))
+
+    @property
+    def nbytes(self):
+        return sum(db.nbytes for _, db in self.levels[1:])
+
+    # Returns (image, extent) for the time range t0..t1 with no more than about pixel_width columns
+    # and pixel_height rows, where extent = (left, right, bottom, top) for imshow.
+    def view(self, t0, t1, pixel_width, pixel_height=None):
+        pixel_width = max(int(pixel_width), 1)
+        n_columns = self.levels[0][1].shape[1]
+        first = max(int(np.searchsorted(self.x_grid, t0, side='right')) - 1, 0)
+        last = min(int(np.searchsorted(self.x_grid, t1, side='left')), n_columns)
+        last = max(last, first + 1)
+
+        for factor, db in self.levels:
+            if (last - first) / factor <= pixel_width:
+                break
+        needed = -(-(last - first) // pixel_width)
+        if needed < factor // 2:
+            # Between full resolution and the first kept level: average the visible columns directly
+            image = _average_columns(np.asarray(self.levels[0][1][:, first:last]), needed)
+            left, right = self.x_grid[first], self.x_grid[last]
+        else:
+            i0, i1 = first // factor, min(-(-last // factor), db.shape[1])
+            image = db[:, i0:i1]
+            left, right = self.x_grid[i0 * factor], self.x_grid[min(i1 * factor, n_columns)]
+
+        # Very tall spectrograms are thinned out vertically as well
+        row_step = 1
+        if pixel_height and image.shape[0] > 2 * pixel_height:
+            row_step = int(image.shape[0] // pixel_height)
+            image = image[::row_step]
+
+        bottom = self.y_grid[0]
+        top = self.y_grid[min(image.shape[0] * row_step, len(self.y_grid) - 1)]
+        return image, (left, right, bottom, top)
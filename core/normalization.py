@@ -3,25 +3,107 @@
 import numpy as np
 import pandas as pd
 
+# Shared grouped-statistics engine
+# Lobanov, Nearey1 and Nearey2 all need the same few numbers for every speaker: how many valid values there are,
+# their mean, their spread and the mean of their logs. Instead of running a Python function once per speaker,
+# the rows are turned into integer group codes once and every sum is taken for all formants at the same time
+# with np.bincount. This keeps the cost flat no matter how many speakers there are.
+
+# Turns the grouping column into integer codes (0..n_groups-1). Rows without a group (NaN) get -1,
+# just like pandas' groupby leaves them out.
+def group_codes(df, group_column='speaker'):
+    if group_column is None:
+        return np.zeros(len(df), dtype=np.intp), 1
+    codes, uniques = pd.factorize(df[group_column])
+    return codes, len(uniques)
+
+
+# Sums each column of values per group in one np.bincount call. Rows without a group (code -1) are left out.
+# values has shape (rows, formants), the result has shape (n_groups, formants).
+def grouped_sum(codes, n_groups, values):
+    n_cols = values.shape[1]
+    in_group = codes >= 0
+    if not in_group.all():
+        codes, values = codes[in_group], values[in_group]
+    flat_codes = (codes[:, None] * n_cols + np.arange(n_cols)).ravel()
+    sums = np.bincount(flat_codes, weights=values.ravel(), minlength=n_groups * n_cols)
+    return sums.reshape(n_groups, n_cols)
+
+
+def grouped_stats(df, formants, group_column='speaker'):
+    codes, n_groups = group_codes(df, group_column)
+    values = df[list(formants)].to_numpy(dtype=float)
+    in_group = codes >= 0
+
+    # NaN values are skipped, the same way pandas' mean() and std() skip them
+    valid = ~np.isnan(values) & in_group[:, None]
+    safe_codes = np.where(in_group, codes, 0)
+
+    count = grouped_sum(codes, n_groups, valid.astype(float))
+    total = grouped_sum(codes, n_groups, np.where(valid, values, 0.0))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+
+        # Second pass over the deviations (instead of sum(x^2) - n*mean^2) keeps the variance
+        # as accurate as pandas' own std()
+        row_mean = mean[safe_codes] if n_groups else np.full(values.shape, np.nan)
+        deviations = np.where(valid, values - row_mean, 0.0)
+        m2 = grouped_sum(codes, n_groups, deviations ** 2)
+        std = np.sqrt(m2 / (count - 1))
+        std[count < 2] = np.nan
+
+        logs = np.log(values)
+        log_valid = ~np.isnan(logs) & in_group[:, None]
+        log_count = grouped_sum(codes, n_groups, log_valid.astype(float))
+        log_sum = grouped_sum(codes, n_groups, np.where(log_valid, logs, 0.0))
+        log_mean = log_sum / log_count
+
+    return {
+        'codes': codes,
+        'n_groups': n_groups,
+        'values': values,
+        'logs': logs,
+        'count': count,
+        'sum': total,
+        'mean': mean,
+        'm2': m2,
+        'std': std,
+        'log_count': log_count,
+        'log_sum': log_sum,
+        'log_mean': log_mean,
+    }
+
+
+# Spreads a per-group statistic (n_groups, formants) back onto the rows. Rows without a group get NaN.
+def broadcast_to_rows(stats, per_group):
+    codes = stats['codes']
+    if not len(per_group):
+        return np.full((len(codes),) + per_group.shape[1:], np.nan)  # no row has a group
+    rows = per_group[np.where(codes >= 0, codes, 0)]
+    rows[codes < 0] = np.nan
+    return rows
+
+
 # Cite: Remirez, Emily. 2022, October 20. Vowel plotting in Python. Linguistics Methods Hub. (https://lingmethodshub.github.io/content/python/vowel-plotting-py). doi: 10.5281/zenodo.7232005
 
 # Lobanov's method was one of the earlier vowel-extrinsic formulas to appear, but it remains among the best.
 # Implementation: Following Nearey (1977) and Adank et al. (2004), NORM uses the formula (see the General Note below):
 # Fn[V]N = (Fn[V] - MEANn)/Sn
 def lobanov_normalization(df, formants, group_column='speaker'):
-    def zscore(x):
-        return (x - x.mean()) / x.std()
+    missing = [formant for formant in formants if f"zsc_{formant}" not in df.columns]
+    if not missing:
+        return df
+
+    stats = grouped_stats(df, missing, group_column)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (stats['values'] - broadcast_to_rows(stats, stats['mean'])) / broadcast_to_rows(stats, stats['std'])
 
-    for formant in formants:
-        z_name = f"zsc_{formant}"
-        if z_name not in df.columns:
-            df[z_name] = df.groupby(group_column)[formant].transform(zscore)
+    for i, formant in enumerate(missing):
+        df[f"zsc_{formant}"] = z[:, i]
     return df
 
 def bark_difference(df):
-    def bark(f):
-        return 26.81 / (1 + 1960 / f) - 0.53
-
     for formant in ['f1', 'f2', 'f3']:
         name = f"bark_{formant}"
         if name not in df.columns:
@@ -37,36 +119,47 @@ def bark_difference(df):
 
 # Cite: https://github.com/drammock/phonR/blob/master/R/phonR.R
 def nearey1(df, formants, group_column='speaker'):
-    def norm_logmean(f, group=None):
-        if group is None:
-            return np.log(f) - np.log(f.mean())
-        grouped = f.groupby(group)
-        result = pd.concat([(np.log(g) - np.log(g.mean())) for _, g in grouped])
-        return result.sort_index()
-
-    log_data = norm_logmean(df[formants], group=df[group_column])
-    for f in formants:
-        df[f"logmean_{f}"] = log_data[f]
+    stats = grouped_stats(df, formants, group_column)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_data = stats['logs'] - np.log(broadcast_to_rows(stats, stats['mean']))
+
+    for i, f in enumerate(formants):
+        df[f"logmean_{f}"] = log_data[:, i]
     return df
 
 
 def nearey2(df, formants, group_column='speaker'):
-    def norm_shared_logmean(f, group=None):
-        if group is None:
-            return np.log(f) - np.mean(np.log(f), axis=0)
-        grouped = f.groupby(group)
-        result = grouped.apply(lambda x: np.log(x) - np.mean(np.log(x), axis=0)).reset_index(drop=True)
-        return result
-
-    norm_data = norm_shared_logmean(df[formants], group=df[group_column])
+    stats = grouped_stats(df, formants, group_column)
+    norm_data = stats['logs'] - broadcast_to_rows(stats, stats['log_mean'])
+
     for i, f in enumerate(formants):
-        df[f"slogmean_{f}"] = norm_data.iloc[:, i]
+        df[f"slogmean_{f}"] = norm_data[:, i]
     return df
 
 # Bark Difference Metric - Zi = 26.81/(1+1960/Fi) - 0.53 (Traunmüller, 1997)
-def bark_transform(df, formants):
-    def bark(f): return 26.81 / (1 + 1960 / f) - 0.53
+def bark(f):
+    return 26.81 / (1 + 1960 / f) - 0.53
+
 
+def mel(f):
+    return 2595 * np.log10(1 + f / 700)
+
+
+def erb(f):
+    return 21.4 * np.log10(1 + 0.00437 * f)
+
+
+# Row-wise scale conversions by column prefix. These only depend on the row itself,
+# so they can be applied to a single new row without looking at the rest of the data.
+SCALE_TRANSFORMS = {
+    'bark': bark,
+    'log': np.log10,
+    'mel': mel,
+    'erb': erb,
+}
+
+
+def bark_transform(df, formants):
     for f in formants:
         name = f"bark_{f}"
         if name not in df.columns:
@@ -81,11 +174,69 @@ def log_transform(df, formants):
 
 def mel_transform(df, formants):
     for f in formants:
-        df[f"mel_{f}"] = 2595 * np.log10(1 + df[f] / 700)
+        df[f"mel_{f}"] = mel(df[f])
     return df
 
 
 def erb_transform(df, formants):
     for f in formants:
-        df[f"erb_{f}"] = 21.4 * np.log10(1 + 0.00437 * df[f])
+        df[f"erb_{f}"] = erb(df[f])
     return df
+
+
+# Every normalization and scale conversion by name: (function, whether it is computed per speaker/group)
+METHODS = {
+    'lobanov': (lobanov_normalization, True),
+    'nearey1': (nearey1, True),
+    'nearey2': (nearey2, True),
+    'bark_difference': (lambda df, formants: bark_difference(df), False),
+    'bark': (bark_transform, False),
+    'log': (log_transform, False),
+    'mel': (mel_transform, False),
+    'erb': (erb_transform, False),
+}
+
+
+# Column prefix each method writes, used to find the columns to plot
+COLUMN_PREFIXES = {
+    'lobanov': 'zsc',
+    'nearey1': 'logmean',
+    'nearey2': 'slogmean',
+    'bark': 'bark',
+    'log': 'log',
+    'mel': 'mel',
+    'erb': 'erb',
+}
+
+
+# Names of the (x, y) columns to plot for the selected formants under a method (None means raw values)
+def plot_columns(method, x_column, y_column):
+    if method is None:
+        return x_column, y_column
+    if method == 'bark_difference':
+        return 'Z3_minus_Z2', 'Z3_minus_Z1'
+    prefix = COLUMN_PREFIXES[method]
+    return f"{prefix}_{x_column}", f"{prefix}_{y_column}"
+
+
+# The source columns a method reads, used to decide which cached results an edit makes outdated
+def method_dependencies(method, formants, group_column='speaker'):
+    grouped = METHODS[method][1]
+    return list(dict.fromkeys(formants)) + ([group_column] if grouped else [])
+
+
+# Runs a method on a fresh copy of only the columns it needs and returns just the new columns.
+# Working on a fresh frame means the "if name not in df.columns" shortcuts above never return stale values.
+def derive_columns(df, method, formants, group_column='speaker'):
+    function, grouped = METHODS[method]
+    source = pd.DataFrame({f: pd.to_numeric(df[f], errors='coerce') for f in dict.fromkeys(formants)},
+                          index=df.index)
+    if grouped:
+        source[group_column] = df[group_column]
+    source_columns = list(source.columns)
+
+    if grouped:
+        result = function(source, list(formants), group_column)
+    else:
+        result = function(source, list(formants))
+    return result.drop(columns=source_columns)
@@ -0,0 +1,245 @@
+# core/plotting.py
+# Draws the vowel space on any matplotlib Axes. The main window calls this with its Qt canvas,
+# and the batch tool calls it with a plain Agg figure, so nothing here depends on Qt.
+
+import numpy as np
+import pandas as pd
+from matplotlib import cm
+from matplotlib.lines import Line2D
+from matplotlib.patches import Ellipse, Polygon
+from matplotlib.transforms import Bbox
+
+from core.geometry import GroupGeometry, ellipse_bounds
+from core.labels import PointLabels, format_labels
+from core.profiling import profiler
+
+
+# Default look of the plot, the same as the checkable options in the main window's menus
+DEFAULT_OPTIONS = {
+    'group_by': 'speaker',
+    'show_labels_f': False,
+    'show_labels_vowel': False,
+    'show_labels_speaker': False,
+    'label_budget': 300,  # most point labels drawn at once; the ones that would overlap are dropped first
+    'ellipse': False,
+    'qhull': False,
+    'center_labels': False,
+    'title': None,  # None means no title
+    'show_legend': False,
+    'show_grid': False,
+}
+
+# Above this many points the white marker edges are dropped: they no longer separate anything in the cloud,
+# but stroking them is most of the rendering time
+EDGE_LIMIT = 20000
+
+
+# Draws the scatterplot (with optional labels, ellipses and hulls) of y_column against x_column.
+# Returns a list of problems found on the way (e.g. groups that can't have a hull) for the caller to report.
+# Callers that redraw the same Axes over and over (like the main window) should keep a VowelSpacePlot instead,
+# so the points are updated in place rather than rebuilt.
+def plot_vowel_space(ax, data, x_column, y_column, **options):
+    return VowelSpacePlot(ax).draw(data, x_column, y_column, **options)
+
+
+# Rows of each group, in order of first appearance, from the group codes of pd.factorize
+def _group_rows(codes, n_groups):
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=n_groups)
+    return np.split(order, np.cumsum(counts)[:-1])
+
+
+# The vowel space of one Axes. All the points live in a single PathCollection that is created once and
+# then only gets new offsets and colors, so a redraw costs a few array operations whatever the number of
+# tokens. The point labels are a PointLabels layer that only lays itself out again when the view changes;
+# the ellipses and hulls come from a GroupGeometry cache and are only recomputed for groups that changed.
+class VowelSpacePlot:
+    def __init__(self, ax):
+        self.ax = ax
+        self.points = None
+        self.labels = None
+        self.legend_handles = []
+        self.geometry = GroupGeometry()  # ellipses and hulls of the groups, kept across redraws
+        self.decorations = []  # artists of the last draw that aren't reused (ellipses, hulls, centre labels)
+
+    # (Re)creates the point collection and the vowel-space orientation of the axes, e.g. after ax.clear()
+    def setup_axes(self):
+        ax = self.ax
+        ax.clear()
+        self.decorations = []
+        self.points = ax.scatter(np.empty(0), np.empty(0), marker='.', alpha=0.8, edgecolors="w", linewidth=1)
+        self.labels = PointLabels(fontsize=8)
+        ax.add_artist(self.labels)
+
+        # Position of the rulers
+        ax.yaxis.tick_right()
+        ax.xaxis.tick_top()
+
+        # Invert axes to resemble vowel space
+        ax.invert_xaxis()
+        ax.invert_yaxis()
+
+        # Position the axes
+        ax.xaxis.set_label_position("bottom")
+        ax.xaxis.set_ticks_position("top")
+        ax.yaxis.set_label_position("left")
+        ax.yaxis.set_ticks_position("right")
+
+    def draw(self, data, x_column, y_column, **options):
+        options = {**DEFAULT_OPTIONS, **options}
+        messages = []
+        ax = self.ax
+        if self.points is None or self.points not in ax.collections:
+            self.setup_axes()
+        for artist in self.decorations:
+            artist.remove()
+        self.decorations = []
+
+        # Coerce and mask once for the whole frame (note: (y, x) on axes)
+        with profiler.span('numeric coercion', rows=len(data)):
+            if x_column in data.columns and y_column in data.columns:
+                x_num = pd.to_numeric(data[x_column], errors="coerce").to_numpy(dtype=float)
+                y_num = pd.to_numeric(data[y_column], errors="coerce").to_numpy(dtype=float)
+            else:
+                x_num = y_num = np.full(len(data), np.nan)
+            mask = np.isfinite(x_num) & np.isfinite(y_num)
+            yx = np.column_stack([y_num, x_num])
+
+        with profiler.span('grouping and points') as span:
+            # Determine if we are coloring by speaker or by vowel; the group codes index the palette
+            group_by = options['group_by']
+            group_codes, unique_values = pd.factorize(data[group_by], use_na_sentinel=False)
+            palette = cm.viridis(np.arange(len(unique_values)) / max(len(unique_values), 1))
+            colors = dict(zip(unique_values, palette))
+
+            # Points are drawn vowel after vowel, so later vowels stay on top like separate scatters would
+            vowel_codes, vowels = pd.factorize(data['vowel'], use_na_sentinel=False)
+            order = np.argsort(vowel_codes, kind='stable')
+            order = order[mask[order]]
+            self.points.set_offsets(yx[order])
+            self.points.set_facecolor(palette[group_codes[order]])
+            self.points.set_edgecolor("w" if len(order) <= EDGE_LIMIT else "none")
+
+            # One legend entry per vowel, in the color of its first point
+            vowel_handles = []
+            first_rows = order[np.unique(vowel_codes[order], return_index=True)[1]]
+            for row in first_rows:
+                vowel_handles.append((Line2D([], [], linestyle='', marker='.', color=palette[group_codes[row]],
+                                             markeredgecolor="w", markeredgewidth=1, alpha=0.8),
+                                      vowels[vowel_codes[row]]))
+            span.note(points=len(order), groups=len(unique_values), vowels=len(vowels))
+
+        # Labels of the valid rows, each drawn at most once; which ones fit is decided at draw time.
+        # They're given in row order, so that when labels compete for room no vowel is favoured.
+        with profiler.span('labels') as span:
+            if options['show_labels_f'] or options['show_labels_vowel'] or options['show_labels_speaker']:
+                rows = np.flatnonzero(mask)
+                texts, widths, n_lines = format_labels(
+                    x_num[rows], y_num[rows], x_column, y_column, show_f=options['show_labels_f'],
+                    vowels=data['vowel'].to_numpy()[rows] if options['show_labels_vowel'] else None,
+                    speakers=data['speaker'].to_numpy()[rows] if options['show_labels_speaker'] else None)
+                self.labels.set_labels(yx[rows], texts, widths, n_lines)
+                span.note(labels=len(rows))
+            else:
+                self.labels.set_labels(np.empty((0, 2)), np.empty(0, dtype=object), np.empty(0), np.empty(0))
+            self.labels.set_budget(options['label_budget'])
+
+        # Joint-filtered finite points of every group, as (N, 2) float arrays in (y, x) order
+        with profiler.span('group points'):
+            group_points = [yx[rows[mask[rows]]] for rows in _group_rows(group_codes, len(unique_values))]
+        context = (x_column, y_column, group_by)
+
+        bounds = [yx[order]]  # everything the view has to fit
+        if options['ellipse']:
+            # Rows without a group key keep their own point color but get no ellipse
+            keys = [key for key in unique_values if not pd.isna(key)]
+            points_list = [points for key, points in zip(unique_values, group_points) if not pd.isna(key)]
+            with profiler.span('ellipse math', groups=len(keys)):
+                ellipses = self.geometry.ellipses(context, keys, points_list)
+            for key, ellipse in zip(keys, ellipses):
+                # Groups without enough data points or variability have no ellipse
+                if ellipse is None:
+                    continue
+                center, width, height, angle = ellipse
+
+                # Determine the color based on the current grouping
+                ell_color = colors[key]
+
+                # Create an ellipse
+                ell = Ellipse(xy=center, width=width, height=height, angle=angle,
+                              edgecolor=ell_color, fc=ell_color, lw=1, alpha=0.2)
+                ax.add_artist(ell)  # the limits come from ellipse_bounds, much cheaper than the patch's path
+                self.decorations.append(ell)
+                bounds.append(ellipse_bounds(*ellipse))
+
+                # Add label to the center of the ellipse
+                if options['center_labels']:
+                    self.decorations.append(
+                        ax.text(center[0], center[1], key, color='black', ha='center', va='center', fontsize=10))
+
+        hull_handles = []
+        if options['qhull'] and len(data) >= 3:
+            # Skip NaN group keys (cannot color/label them reliably)
+            keys = [key for key in unique_values if not pd.isna(key)]
+            points_list = [points for key, points in zip(unique_values, group_points) if not pd.isna(key)]
+            labels = [f"{group_by} '{key}'" for key in keys]
+            with profiler.span('qhull', groups=len(keys)):
+                hulls = self.geometry.hulls(context, keys, points_list, labels)
+            for key, (vertices, message) in zip(keys, hulls):
+                if message:
+                    messages.append(message)
+                if vertices is None:
+                    continue
+
+                face = colors.get(key, cm.viridis(0.5))  # fallback color if key missing
+                polygon = Polygon(vertices, closed=True, alpha=0.2, label=key, facecolor=face)
+                ax.add_artist(polygon)  # inside the limits of the points already
+                self.decorations.append(polygon)
+                hull_handles.append((polygon, key))
+
+                # Centroid of the hull for labeling
+                if options['center_labels']:
+                    centroid = np.mean(vertices, axis=0)
+                    self.decorations.append(
+                        ax.text(centroid[0], centroid[1], str(key),
+                                color='black', ha='center', va='center', fontsize=10))
+
+        ax.dataLim.set_points(Bbox.null().get_points())
+        ax.ignore_existing_data_limits = True
+        bounds = np.concatenate(bounds)
+        if len(bounds):
+            ax.update_datalim(bounds)
+        ax.set_autoscale_on(True)  # like the ax.clear() this replaces, every redraw fits the data again
+        ax.autoscale_view()
+
+        # A new legend is made from these the next time it's shown
+        self.legend_handles = vowel_handles + hull_handles
+        legend = ax.get_legend()
+        if legend:
+            legend.remove()
+        self.apply_style(**options)
+
+        ax.set_xlabel(y_column)
+        ax.set_ylabel(x_column)
+
+        return messages
+
+    # Title, legend and grid only change existing artists, so they can be applied without a redraw of the data
+    def apply_style(self, **options):
+        options = {**DEFAULT_OPTIONS, **options}
+        ax = self.ax
+        ax.set_title(options['title'] or "", pad=25)
+
+        legend = ax.get_legend()
+        if options['show_legend']:
+            if legend is None and self.legend_handles:
+                ax.legend(*zip(*self.legend_handles), loc='lower left', bbox_to_anchor=(1.05, 0))
+            elif legend is not None:
+                legend.set_visible(True)
+        elif legend is not None:
+            legend.set_visible(False)
+
+        if options['show_grid']:
+            ax.grid(True, linestyle='--', linewidth=0.5)
+        else:
+            ax.grid(False)
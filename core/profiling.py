@@ -0,0 +1,172 @@
+# core/profiling.py
+# Timing spans for the slow paths (redraws, normalizations, imports, audio analysis), so a slow operation
+# can be broken down into its stages. Recording is off by default; then span() hands out one shared object
+# that does nothing, and the instrumented code pays for a function call and an attribute check.
+#
+#     with profiler.span('tight_layout'):
+#         figure.tight_layout()
+#
+# Spans opened inside another span on the same thread become its stages. A span opened while no other span
+# is open on its thread is an operation; the most recent operations are kept for the Performance panel and
+# can be written to a trace file (Chrome's trace event format, which chrome://tracing and Perfetto open).
+# Setting the VOWSPACE_PROFILE environment variable to 1 starts the application with recording on.
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Span:
+    def __init__(self, profiler, name, values):
+        self.profiler = profiler
+        self.name = name
+        self.values = values  # row counts and other details, shown next to the timing
+        self.start = None
+        self.duration = None
+        self.thread = None
+        self.stages = []
+
+    # Adds details found out while the span runs (e.g. the number of rows drawn)
+    def note(self, **values):
+        self.values.update(values)
+
+    def __enter__(self):
+        self.profiler.enter(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.exit(self)
+        return False
+
+
+# What span() returns while nothing is recorded
+class NullSpan:
+    def note(self, **values):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler:
+    def __init__(self, max_operations=200):
+        self.enabled = os.environ.get('VOWSPACE_PROFILE', '') not in ('', '0')
+        self.operations = deque(maxlen=max_operations)  # finished operations, oldest first
+        self.listeners = []  # called with every finished operation, on the thread that ran it
+        self.lock = threading.Lock()
+        self.local = threading.local()  # the spans open on each thread
+        self.origin = time.perf_counter()
+
+    def span(self, name, **values):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, values)
+
+    # Decorator: every call of the function is a span
+    def timed(self, name):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with Span(self, name, {}):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Adds details to the innermost span open on this thread
+    def note(self, **values):
+        if self.enabled:
+            stack = getattr(self.local, 'stack', None)
+            if stack:
+                stack[-1].note(**values)
+
+    def enter(self, span):
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(span)
+        span.thread = threading.current_thread().name
+        span.start = time.perf_counter()
+
+    def exit(self, span):
+        span.duration = time.perf_counter() - span.start
+        stack = self.local.stack
+        stack.pop()
+        if stack:
+            stack[-1].stages.append(span)
+        else:
+            self.finish(span)
+
+    # Adds an operation that was timed elsewhere, e.g. one that runs across several events like an import
+    def record(self, name, start, **values):
+        if not self.enabled:
+            return
+        span = Span(self, name, values)
+        span.start = start
+        span.duration = time.perf_counter() - start
+        span.thread = threading.current_thread().name
+        self.finish(span)
+
+    def finish(self, span):
+        with self.lock:
+            self.operations.append(span)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener(span)
+
+    def clear(self):
+        with self.lock:
+            self.operations.clear()
+
+    # The kept operations and their stages as Chrome trace events (times in microseconds)
+    def trace_events(self):
+        with self.lock:
+            operations = list(self.operations)
+        origin = min([self.origin] + [operation.start for operation in operations])  # startup begins earlier
+        process = os.getpid()
+        threads = {}
+        events = []
+
+        def add(span):
+            thread = threads.setdefault(span.thread, len(threads) + 1)
+            events.append({'name': span.name, 'cat': 'vowspace', 'ph': 'X', 'pid': process, 'tid': thread,
+                           'ts': (span.start - origin) * 1e6, 'dur': span.duration * 1e6,
+                           'args': {key: _trace_value(value) for key, value in span.values.items()}})
+            for stage in span.stages:
+                add(stage)
+
+        for operation in operations:
+            add(operation)
+        for name, thread in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': process, 'tid': thread, 'args': {'name': name}})
+        return events
+
+    def export_trace(self, file_name):
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+
+
+# Details go into the trace as they are when JSON has them, as text otherwise
+def _trace_value(value):
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+# "rows=1000, groups=12" for the details of a span
+def describe(values):
+    return ', '.join(f"{key}={value}" for key, value in values.items())
+
+
+# The one profiler of the application, shared by the windows and the core modules
+profiler = Profiler()
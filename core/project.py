@@ -0,0 +1,238 @@
+# core/project.py
+# VowSpace projects: the whole session (typed columns, normalized columns, cached ellipses and hulls, view
+# settings) in a folder of NumPy .npz segments described by a JSON manifest.
+#
+# The rows are stored in segments (row ranges). Saving again to the same project only writes what changed
+# since the last save: the new rows become a new segment, and a column of an older segment is written again
+# only if the store wrote some of its rows since (see DataStore.mark_written), e.g. after an edit, an undo or
+# a re-normalization. Every segment keeps a hash per column of what was written, checked when the project is
+# opened. Files nobody refers to anymore are removed after the new manifest is in place.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = 'manifest.json'
+PROJECT_FORMAT = 'vowspace-project'
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = '.vowspace'
+
+# New rows are split into segments of at most this many rows, so an edit rewrites one block of a column
+SEGMENT_ROWS = 65536
+# Many small segments (one per save) are written again as full-size ones once there are this many
+MAX_SEGMENTS = 64
+
+
+# How a store column is kept on disk: float64 values, int32 category codes, or text
+def column_kind(store, column):
+    if column in store.categories:
+        return 'category'
+    return 'float' if store.buffers[column].dtype != object else 'text'
+
+
+# Arrays to save for rows start:stop of a column (under the given key of the segment file), and their hash
+def column_arrays(store, column, kind, start, stop, key):
+    categories = None
+    if kind == 'category':
+        arrays = {key: store.codes[column][start:stop]}
+        categories = [_json_value(value) for value in store.categories[column][0]]
+    elif kind == 'float':
+        arrays = {key: store.buffers[column][start:stop]}
+    else:
+        values = store.buffers[column][start:stop]
+        missing = pd.isna(values)
+        arrays = {key: np.array(['' if m else str(v) for v, m in zip(values, missing)], dtype=str),
+                  f"{key}_missing": missing}
+    return arrays, column_digest(kind, arrays, key, categories)
+
+
+# Hash of the arrays of one column of a segment, as written and as read back. The hash of category codes
+# also covers the categories (JSON values, in code order) they stand for.
+def column_digest(kind, arrays, key, categories=None):
+    digest = hashlib.blake2b(kind.encode(), digest_size=16)
+    if kind == 'category':
+        used = categories[:arrays[key].max(initial=-1) + 1]
+        digest.update(json.dumps(used).encode())
+    for name in sorted(arrays):
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != PROJECT_FORMAT:
+        raise ValueError(f"{path} is not a VowSpace project.")
+    if manifest.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f"{path} was saved by a newer version of VowSpace.")
+    return manifest
+
+
+# Saves the store (and the extra session state in extras: 'view', 'derived', 'geometry') to a project folder.
+# previous is the manifest returned by the last save or load of the same folder, or None to write everything.
+# Returns the new manifest.
+def save_project(path, store, extras=None, previous=None):
+    store.sync()
+    os.makedirs(path, exist_ok=True)
+    n_rows = store.n_rows
+    kinds = {column: column_kind(store, column) for column in store.columns}
+
+    previous = previous or {}
+    revision = previous.get('revision', 0) + 1
+    previous_kinds = {column['name']: column['kind'] for column in previous.get('columns', [])}
+    segments = [segment for segment in previous.get('segments', []) if segment['stop'] <= n_rows]
+    if len(segments) >= max(MAX_SEGMENTS, 2 * -(-n_rows // SEGMENT_ROWS)):
+        segments = []
+    segments = [dict(segment, files=dict(segment['files']), hashes=dict(segment['hashes'])) for segment in segments]
+
+    # Older segments: only the columns the store wrote rows of (or that are new, or changed kind) are written,
+    # into one new file per segment
+    for i, segment in enumerate(segments):
+        changed = {}
+        for j, column in enumerate(store.columns):
+            if column in segment['files'] and previous_kinds.get(column) == kinds[column] \
+                    and not store.was_written(column, segment['start'], segment['stop']):
+                continue
+            key = f"c{j}"
+            arrays, digest = column_arrays(store, column, kinds[column], segment['start'], segment['stop'], key)
+            changed.update(arrays)
+            segment['files'][column] = [f"segment-{i}-r{revision}.npz", key]
+            segment['hashes'][column] = digest
+        for column in [column for column in segment['files'] if column not in kinds]:
+            del segment['files'][column], segment['hashes'][column]
+        if changed:
+            np.savez(os.path.join(path, f"segment-{i}-r{revision}.npz"), **changed)
+
+    # The rows added since: new segments
+    start = segments[-1]['stop'] if segments else 0
+    while start < n_rows:
+        stop = min(start + SEGMENT_ROWS, n_rows)
+        file_name = f"segment-{len(segments)}-r{revision}.npz"
+        segment = {'start': start, 'stop': stop, 'files': {}, 'hashes': {}}
+        arrays = {}
+        for j, column in enumerate(store.columns):
+            column_data, digest = column_arrays(store, column, kinds[column], start, stop, f"c{j}")
+            arrays.update(column_data)
+            segment['files'][column] = [file_name, f"c{j}"]
+            segment['hashes'][column] = digest
+        np.savez(os.path.join(path, file_name), **arrays)
+        segments.append(segment)
+        start = stop
+
+    manifest = {
+        'format': PROJECT_FORMAT,
+        'version': PROJECT_VERSION,
+        'revision': revision,
+        'rows': n_rows,
+        'columns': [{'name': column, 'kind': kinds[column]} for column in store.columns],
+        'categories': {column: [_json_value(value) for value in store.categories[column][0]]
+                       for column in store.categories},
+        'segments': segments,
+    }
+    manifest.update(extras or {})
+
+    # The new manifest replaces the old one in one step, so an interrupted save leaves the previous state readable
+    temporary = os.path.join(path, MANIFEST_NAME + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(temporary, os.path.join(path, MANIFEST_NAME))
+
+    used = {file_name for segment in segments for file_name, _ in segment['files'].values()}
+    for name in os.listdir(path):
+        if name.startswith('segment-') and name.endswith('.npz') and name not in used:
+            os.remove(os.path.join(path, name))
+    store.mark_saved()
+    return manifest
+
+
+# Reads a project folder. Returns (data, manifest); vowel and speaker come back as categoricals with the
+# categories in the saved order, so the store gets the same codes as the saved segments. Raises ValueError
+# if a column of a segment doesn't match the hash it was saved with.
+def load_project(path):
+    manifest = read_manifest(path)
+    n_rows = manifest['rows']
+    columns = {}
+    for column in manifest['columns']:
+        kind = column['kind']
+        if kind == 'category':
+            columns[column['name']] = np.full(n_rows, -1, dtype=np.int32)
+        elif kind == 'float':
+            columns[column['name']] = np.full(n_rows, np.nan)
+        else:
+            columns[column['name']] = np.full(n_rows, np.nan, dtype=object)
+    kinds = {column['name']: column['kind'] for column in manifest['columns']}
+
+    files = {}
+    try:
+        for segment in manifest['segments']:
+            rows = slice(segment['start'], segment['stop'])
+            for column, (file_name, key) in segment['files'].items():
+                if file_name not in files:
+                    files[file_name] = np.load(os.path.join(path, file_name), allow_pickle=False)
+                arrays = {key: files[file_name][key]}
+                if kinds[column] == 'text':
+                    arrays[f"{key}_missing"] = files[file_name][f"{key}_missing"]
+                if column_digest(kinds[column], arrays, key, manifest['categories'].get(column)) \
+                        != segment['hashes'][column]:
+                    raise ValueError(f"{path}: {file_name} is damaged (column {column}).")
+                values = arrays[key]
+                if kinds[column] == 'text':
+                    values = np.where(arrays[f"{key}_missing"], np.nan, values.astype(object))
+                columns[column][rows] = values
+    finally:
+        for npz in files.values():
+            npz.close()
+
+    data = pd.DataFrame({
+        column: pd.Categorical.from_codes(values, [_from_json(value) for value in manifest['categories'][column]])
+        if kinds[column] == 'category' else values
+        for column, values in columns.items()
+    })
+    return data, manifest
+
+
+# Cached ellipses and hulls (see core.geometry.GroupGeometry) as JSON records, and back
+def geometry_records(geometry):
+    records = []
+    for (kind, group, context), (fingerprint, result) in geometry.entries.items():
+        if not _json_safe(group) or not all(_json_safe(value) for value in context):
+            continue
+        if kind == 'ellipse':
+            result = None if result is None else [float(v) for v in (*result[0], *result[1:])]
+        else:
+            vertices, message = result
+            result = [None if vertices is None else np.asarray(vertices, dtype=float).tolist(), message]
+        records.append({'kind': kind, 'group': _json_value(group), 'context': [_json_value(v) for v in context],
+                        'fingerprint': fingerprint.hex(), 'result': result})
+    return records
+
+
+def restore_geometry(geometry, records):
+    for record in records:
+        result = record['result']
+        if record['kind'] == 'ellipse':
+            result = None if result is None else ((result[0], result[1]), result[2], result[3], result[4])
+        else:
+            result = (None if result[0] is None else np.array(result[0], dtype=float), result[1])
+        key = (record['kind'], _from_json(record['group']), tuple(_from_json(v) for v in record['context']))
+        geometry.put(key, bytes.fromhex(record['fingerprint']), result)
+
+
+# NaN and NumPy scalars don't go into JSON as they are
+def _json_safe(value):
+    return value is None or isinstance(value, (str, bool, int, float, np.generic))
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _from_json(value):
+    return np.nan if value is None else value
@@ -0,0 +1,201 @@
+# core/running_stats.py
+# Keeps per-speaker running statistics next to the data so single-row changes (adding, editing, undoing)
+# can update the normalized columns without rescanning the whole dataframe.
+#
+# A change to one row moves its speaker's mean and standard deviation, so in general every row of that speaker
+# gets new zsc_/logmean_/slogmean_ values and a refresh costs O(rows of the speaker). For large speakers one
+# more token hardly moves the statistics: while they stay within `tolerance` (relative) of the ones the
+# speaker's rows were last written with, only the changed rows are written. The other rows then lag the exact
+# values by at most that tolerance until the drift exceeds it and the whole speaker is rewritten.
+
+import numpy as np
+import pandas as pd
+
+from core.data_io import FORMANT_COLUMNS
+from core.normalization import grouped_stats, SCALE_TRANSFORMS
+
+
+class RunningGroupStats:
+    def __init__(self, formants=None, group_column='speaker', tolerance=1e-3):
+        self.formants = list(formants or FORMANT_COLUMNS)
+        self.group_column = group_column
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        # key -> running sufficient statistics, one slot per formant:
+        # count, mean and M2 in Welford form, plus count and sum of the logs for Nearey2
+        self.groups = {}
+        # key -> set of row labels that belong to that group, so a refresh only touches those rows
+        self.rows = {}
+        # key -> the statistics all rows of that group were last written with
+        self.written = {}
+
+    def _new_group(self):
+        n = len(self.formants)
+        return {
+            'count': np.zeros(n),
+            'mean': np.zeros(n),
+            'm2': np.zeros(n),
+            'log_count': np.zeros(n),
+            'log_sum': np.zeros(n),
+        }
+
+    # Recomputes everything from scratch (after an import or a clear) with the vectorized engine
+    def rebuild(self, df):
+        self.reset()
+        if df.empty or self.group_column not in df.columns:
+            return
+
+        frame = pd.DataFrame({
+            f: pd.to_numeric(df[f], errors='coerce') if f in df.columns else np.nan for f in self.formants
+        }, index=df.index)
+        frame[self.group_column] = df[self.group_column]
+        stats = grouped_stats(frame, self.formants, self.group_column)
+
+        keys = pd.factorize(df[self.group_column])[1]
+        codes = stats['codes']
+        for code, key in enumerate(keys):
+            self.groups[key] = {
+                'count': stats['count'][code].copy(),
+                'mean': np.nan_to_num(stats['mean'][code]),
+                'm2': stats['m2'][code].copy(),
+                'log_count': stats['log_count'][code].copy(),
+                'log_sum': stats['log_sum'][code].copy(),
+            }
+        for label, code in zip(df.index, codes):
+            if code >= 0:
+                self.rows.setdefault(keys[code], set()).add(label)
+
+    # Turns a row (Series or dict) into a float vector in self.formants order
+    def _values(self, row):
+        values = np.full(len(self.formants), np.nan)
+        for i, formant in enumerate(self.formants):
+            try:
+                values[i] = float(row[formant])
+            except (KeyError, TypeError, ValueError):
+                pass
+        return values
+
+    # Welford update for one row, O(1) per formant
+    def add(self, key, row, label=None):
+        if pd.isna(key):
+            return
+        group = self.groups.setdefault(key, self._new_group())
+        values = self._values(row)
+        valid = ~np.isnan(values)
+
+        group['count'][valid] += 1
+        delta = values[valid] - group['mean'][valid]
+        group['mean'][valid] += delta / group['count'][valid]
+        group['m2'][valid] += delta * (values[valid] - group['mean'][valid])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = np.log(values)
+        log_valid = ~np.isnan(logs)
+        group['log_count'][log_valid] += 1
+        group['log_sum'][log_valid] += logs[log_valid]
+
+        if label is not None:
+            self.rows.setdefault(key, set()).add(label)
+
+    # Reverse Welford update, used by undo and by edits (remove the old row, add the new one)
+    def remove(self, key, row, label=None):
+        if pd.isna(key) or key not in self.groups:
+            return
+        group = self.groups[key]
+        values = self._values(row)
+        valid = ~np.isnan(values) & (group['count'] > 0)
+
+        group['count'][valid] -= 1
+        remaining = group['count'][valid]
+        delta = values[valid] - group['mean'][valid]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_mean = np.where(remaining > 0, group['mean'][valid] - delta / remaining, 0.0)
+        group['m2'][valid] = np.where(remaining > 0, group['m2'][valid] - delta * (values[valid] - new_mean), 0.0)
+        group['mean'][valid] = new_mean
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = np.log(values)
+        log_valid = ~np.isnan(logs) & (group['log_count'] > 0)
+        group['log_count'][log_valid] -= 1
+        group['log_sum'][log_valid] -= logs[log_valid]
+
+        if label is not None:
+            self.rows.get(key, set()).discard(label)
+        if not self.rows.get(key) and not group['count'].any():
+            self.groups.pop(key, None)
+            self.rows.pop(key, None)
+            self.written.pop(key, None)
+
+    # Per-group statistics in the same shape as grouped_stats(), for one key
+    def stats(self, key):
+        group = self.groups[key]
+        count = group['count']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, group['mean'], np.nan)
+            std = np.where(count > 1, np.sqrt(np.maximum(group['m2'], 0) / (count - 1)), np.nan)
+            log_mean = group['log_sum'] / group['log_count']
+        return {'count': count, 'mean': mean, 'std': std, 'log_mean': log_mean}
+
+    # Rewrites the speaker-normalized columns (zsc_, logmean_, slogmean_) that already exist in df
+    # for the rows of the given groups, and the row-wise scale columns for the given rows.
+    # A group whose statistics are still close to the ones its rows were written with only gets
+    # the given rows rewritten (see the note at the top). Returns the labels of the rows it wrote.
+    def refresh(self, df, keys=(), rows=()):
+        rewritten = set()
+        for key in keys:
+            if key not in self.groups or not self.rows.get(key):
+                continue
+            stats = self.stats(key)
+            current = np.concatenate([stats['mean'], stats['std'], stats['log_mean']])
+            written = self.written.get(key)
+            if written is not None and np.allclose(current, written, rtol=self.tolerance, atol=0, equal_nan=True):
+                labels = [label for label in rows if label in self.rows[key] and label in df.index]
+            else:
+                labels = [label for label in self.rows[key] if label in df.index]
+                self.written[key] = current
+            if labels:
+                self._write_group(df, labels, stats)
+                rewritten.update(labels)
+
+        rows = [label for label in rows if label in df.index]
+        if rows:
+            for prefix, transform in SCALE_TRANSFORMS.items():
+                for formant in self.formants:
+                    name = f"{prefix}_{formant}"
+                    if name in df.columns and formant in df.columns:
+                        x = pd.to_numeric(df.loc[rows, formant], errors='coerce').to_numpy(dtype=float)
+                        with np.errstate(divide='ignore', invalid='ignore'):
+                            df.loc[rows, name] = transform(x)
+
+            # The Bark difference metric is built on top of the bark_ columns
+            if {'Z3_minus_Z1', 'bark_f1', 'bark_f2', 'bark_f3'}.issubset(df.columns):
+                df.loc[rows, 'Z3_minus_Z1'] = df.loc[rows, 'bark_f3'] - df.loc[rows, 'bark_f1']
+                df.loc[rows, 'Z3_minus_Z2'] = df.loc[rows, 'bark_f3'] - df.loc[rows, 'bark_f2']
+                df.loc[rows, 'Z2_minus_Z1'] = df.loc[rows, 'bark_f2'] - df.loc[rows, 'bark_f1']
+        return sorted(rewritten.union(rows))
+
+    # The columns of df that refresh() writes
+    def derived_columns(self, df):
+        names = [f"{prefix}_{formant}" for formant in self.formants
+                 for prefix in ('zsc', 'logmean', 'slogmean', *SCALE_TRANSFORMS)]
+        names += ['Z3_minus_Z1', 'Z3_minus_Z2', 'Z2_minus_Z1']
+        return [name for name in names if name in df.columns]
+
+    def _write_group(self, df, labels, stats):
+        for i, formant in enumerate(self.formants):
+            if formant not in df.columns:
+                continue
+            targets = [name for name in (f"zsc_{formant}", f"logmean_{formant}", f"slogmean_{formant}")
+                       if name in df.columns]
+            if not targets:
+                continue
+            x = pd.to_numeric(df.loc[labels, formant], errors='coerce').to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if f"zsc_{formant}" in df.columns:
+                    df.loc[labels, f"zsc_{formant}"] = (x - stats['mean'][i]) / stats['std'][i]
+                if f"logmean_{formant}" in df.columns:
+                    df.loc[labels, f"logmean_{formant}"] = np.log(x) - np.log(stats['mean'][i])
+                if f"slogmean_{formant}" in df.columns:
+                    df.loc[labels, f"slogmean_{formant}"] = np.log(x) - stats['log_mean'][i]
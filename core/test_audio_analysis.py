@@ -0,0 +1,219 @@
+# core/test_audio_analysis.py
+# Run with: python -m pytest core
+
+import threading
+import wave
+
+import numpy as np
+import pytest
+from parselmouth import Sound
+
+from core.audio_analysis import (
+    AnalysisEntry, DecodedAudio, alignment_period, analysis_layout, chunk_plan, chunked_analysis, formant_frames,
+    frame_grid, intensity_frames, open_audio, pitch_frames, peak_amplitude, resampled_start
+)
+
+
+# A vowel-like recording: harmonics of a slowly moving f0, shaped by four formants, plus a little noise
+def write_wav(path, duration, sampling_frequency=16000, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sampling_frequency)) / sampling_frequency
+    phase = 2 * np.pi * np.cumsum(120 + 20 * np.sin(2 * np.pi * 0.7 * t)) / sampling_frequency
+    formants, bandwidths = np.array([700.0, 1200.0, 2600.0, 3500.0]), np.array([80.0, 100.0, 150.0, 200.0])
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 40):
+        signal += (1 / (1 + ((harmonic * 120 - formants) / bandwidths) ** 2)).sum() / harmonic * np.sin(harmonic * phase)
+    signal = 0.5 * signal / np.abs(signal).max() + rng.normal(0, 0.002, t.size)
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sampling_frequency)
+        wav.writeframes((np.clip(signal, -1, 1) * 32767).astype('<i2').tobytes())
+    return str(path)
+
+
+def test_different_kinds_are_computed_at_the_same_time(tmp_path):
+    entry = AnalysisEntry(write_wav(tmp_path / 'a.wav', 0.2))
+    started = {kind: threading.Event() for kind in ('pitch', 'intensity')}
+
+    # Each analysis waits until the other one has started, which only works if they run concurrently
+    def compute(kind):
+        started[kind].set()
+        other = 'intensity' if kind == 'pitch' else 'pitch'
+        assert started[other].wait(5)
+        return kind
+
+    entry.compute = compute
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(pitch=entry.get('pitch')))
+    thread.start()
+    results['intensity'] = entry.get('intensity')
+    thread.join(5)
+    assert results == {'pitch': 'pitch', 'intensity': 'intensity'}
+
+
+def test_same_kind_is_computed_once(tmp_path):
+    entry = AnalysisEntry(write_wav(tmp_path / 'a.wav', 0.2))
+    release = threading.Event()
+    calls = []
+
+    def compute(kind):
+        calls.append(kind)
+        release.wait(5)
+        return object()
+
+    entry.compute = compute
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(entry.get('pitch'))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ['pitch']
+    assert len(results) == 3 and all(result is results[0] for result in results)
+
+
+def test_failed_analysis_can_be_retried(tmp_path):
+    entry = AnalysisEntry(write_wav(tmp_path / 'a.wav', 0.2))
+    entry.compute = lambda kind: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        entry.get('pitch')
+    entry.compute = lambda kind: 'done'
+    assert entry.get('pitch') == 'done'
+
+
+LENGTHS = [0.3, 0.4, 0.5, 0.8, 1.1, 1.25, 2.0, 2.7, 3.33, 4.0, 5.01, 6.0]
+
+
+def analyses(source):
+    global_peak = peak_amplitude(source)
+    return {
+        'pitch': lambda snd: pitch_frames(snd, None, global_peak),
+        'intensity': lambda snd: intensity_frames(snd),
+        'formant': lambda snd: formant_frames(snd),
+    }
+
+
+@pytest.mark.parametrize('sampling_frequency', [16000, 48000])
+def test_frame_grid_matches_praat(sampling_frequency):
+    for duration in LENGTHS:
+        snd = Sound(np.zeros(int(duration * sampling_frequency)), sampling_frequency)
+        for kind, analysis in (('pitch', snd.to_pitch_ac), ('intensity', snd.to_intensity),
+                               ('formant', snd.to_formant_burg)):
+            n_frames, first_time = frame_grid(snd.n_samples, sampling_frequency, 0.0,
+                                              *analysis_layout(kind, sampling_frequency))
+            result = analysis()
+            assert n_frames == result.n_frames, (duration, kind)
+            assert first_time == pytest.approx(result.x1, abs=1e-12), (duration, kind)
+
+
+def test_chunk_plan_covers_every_frame_once():
+    fs = 16000
+    time_step, window_duration, resampling_frequency = analysis_layout('formant', fs)
+    n_frames, _ = frame_grid(10 * fs, fs, 0.0, time_step, window_duration, resampling_frequency)
+    plan = list(chunk_plan(10 * fs, fs, time_step, window_duration, resampling_frequency,
+                           chunk_duration=2.0, overlap=0.5))
+    assert len(plan) > 1
+    assert [first for _, _, first, _ in plan] == [0] + [last for _, _, _, last in plan[:-1]]
+    assert plan[-1][3] == n_frames
+    assert all(0 <= start < stop <= 10 * fs for start, stop, _, _ in plan)
+
+
+# Whole seconds make the frames of the default formant analysis fit the recording exactly
+@pytest.mark.parametrize('sampling_frequency', [8000, 11025, 16000, 22050, 44100, 48000])
+def test_chunk_plan_lines_up_with_the_whole_recording(sampling_frequency):
+    fs = sampling_frequency
+    custom = {'pitch': {'time_step': 0.005}, 'intensity': {'time_step': 0.004},
+              'formant': {'time_step': 0.002, 'maximum_formant': 5000.0}, 'spectrogram': {'time_step': 0.001}}
+    for kind in ('pitch', 'intensity', 'formant', 'spectrogram'):
+        for parameters in (None, custom):
+            layout = analysis_layout(kind, fs, parameters)
+            time_step, resampling_frequency = layout[0], layout[2]
+            for n_samples in (10 * fs, 37 * fs, int(12.5 * fs), 100 * fs + 1):
+                _, first_time = frame_grid(n_samples, fs, 0.0, *layout)
+                for start, stop, first_frame, last_frame in chunk_plan(n_samples, fs, *layout, chunk_duration=3.0,
+                                                                       overlap=0.5):
+                    n_frames, chunk_first_time = frame_grid(stop - start, fs, start / fs, *layout)
+                    offset = (chunk_first_time - first_time) / time_step
+                    assert offset == pytest.approx(round(offset), abs=1e-6), (kind, n_samples, start, stop)
+                    assert 0 <= first_frame - round(offset) < last_frame - round(offset) <= n_frames
+                    if resampling_frequency:
+                        shift = resampled_start(stop - start, fs, start / fs, resampling_frequency) \
+                            - resampled_start(n_samples, fs, 0.0, resampling_frequency)
+                        assert shift * resampling_frequency == pytest.approx(round(shift * resampling_frequency),
+                                                                             abs=1e-6)
+
+
+def test_time_step_off_the_sample_grid_is_refused():
+    with pytest.raises(ValueError):
+        alignment_period(16000, 0.001 * np.pi)
+
+
+def test_short_recording_is_one_chunk():
+    plan = list(chunk_plan(16000, 16000, *analysis_layout('pitch', 16000)))
+    assert [plan[0][:2]] == [(0, 16000)] and len(plan) == 1
+
+
+@pytest.mark.parametrize('duration', LENGTHS)
+def test_chunked_analysis_matches_whole_file(tmp_path, duration):
+    source = open_audio(write_wav(tmp_path / 'a.wav', duration))
+    whole_sound = Sound(str(tmp_path / 'a.wav'))
+    for kind, frames in analyses(source).items():
+        expected_times, expected = frames(whole_sound)
+
+        # Fits in one chunk: analysed as a whole
+        times, values = chunked_analysis(source, kind, frames)
+        assert np.array_equal(times, expected_times) and np.array_equal(values, expected, equal_nan=True), kind
+
+        times, values = chunked_analysis(source, kind, frames, chunk_duration=1.0, overlap=1.0)
+        assert np.allclose(times, expected_times, rtol=0, atol=1e-9), kind
+        assert np.array_equal(np.isnan(values), np.isnan(expected)), kind
+        if kind == 'formant':
+            # Praat low-passes the whole sound with one FFT before resampling it for Burg's method, which a
+            # chunk can't reproduce: at least 99% of the values are within 2% of the whole-file ones, and the
+            # median difference is below 0.01%
+            difference = (np.abs(values - expected) / expected)[~np.isnan(expected)]
+            assert np.mean(difference <= 0.02) >= 0.99 and np.median(difference) < 1e-4
+        else:
+            assert np.allclose(values, expected, rtol=0, atol=1e-3, equal_nan=True), kind
+
+
+# A source that remembers how many samples it was asked for at once
+class CountingSource:
+    def __init__(self, source):
+        self.source = source
+        self.n_samples, self.sampling_frequency = source.n_samples, source.sampling_frequency
+        self.start_time = source.start_time
+        self.largest_read = 0
+
+    def read(self, start=0, stop=None):
+        values = self.source.read(start, stop)
+        self.largest_read = max(self.largest_read, values.shape[1])
+        return values
+
+
+@pytest.mark.parametrize('sampling_frequency', [11025, 44100])
+def test_chunked_analysis_never_reads_the_whole_recording(tmp_path, sampling_frequency):
+    file_name = write_wav(tmp_path / 'a.wav', 5.0, sampling_frequency)
+    expected_times, expected = formant_frames(Sound(file_name))
+    source = CountingSource(open_audio(file_name))
+    times, values = chunked_analysis(source, 'formant', formant_frames, chunk_duration=1.0, overlap=0.5)
+    assert source.largest_read < 0.5 * source.n_samples
+    assert np.allclose(times, expected_times, rtol=0, atol=1e-9)
+    assert np.array_equal(np.isnan(values), np.isnan(expected))
+
+
+def test_decoded_audio_gives_the_same_frames(tmp_path):
+    file_name = write_wav(tmp_path / 'a.wav', 2.0)
+    expected = chunked_analysis(open_audio(file_name), 'formant', formant_frames)
+    times, values = chunked_analysis(DecodedAudio(file_name), 'formant', formant_frames)
+    assert np.allclose(times, expected[0], rtol=0, atol=1e-9) and np.allclose(values, expected[1], equal_nan=True)
+
+
+def test_finished_never_computes(tmp_path):
+    entry = AnalysisEntry(write_wav(tmp_path / 'a.wav', 0.2))
+    with pytest.raises(KeyError):
+        entry.finished('envelope')
+    envelope = entry.get('envelope')
+    assert entry.finished('envelope') is envelope
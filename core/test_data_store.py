@@ -0,0 +1,99 @@
+# core/test_data_store.py
+# Run with: python -m pytest core
+
+import numpy as np
+import pandas as pd
+
+from core.data_io import clean_dataset
+from core.data_store import DataStore
+
+
+def test_empty_string_is_a_category():
+    store = DataStore()
+    assert store.encode('speaker', ['a', '', None, np.nan, '', 'a']).tolist() == [0, 1, -1, -1, 1, 0]
+    assert store.categories['speaker'][0] == ['a', '']
+
+
+def test_encode_value_matches_encode():
+    store = DataStore()
+    assert [store.encode_value('speaker', value) for value in ('b', '', None, np.nan, 'b')] == [0, 1, -1, -1, 0]
+
+
+def test_import_without_speaker_column_keeps_one_speaker():
+    store = DataStore()
+    store.extend(clean_dataset(pd.DataFrame({'vowel': ['a', 'i'], 'f1': [500.0, 300.0], 'f2': [1500.0, 2300.0]})))
+    assert store.frame()['speaker'].tolist() == ['', '']
+    assert store.category_codes('speaker')[0].tolist() == [0, 0]
+
+
+def test_append_grows_the_buffers():
+    store = DataStore(capacity=2)
+    for i in range(5):
+        store.append({'vowel': 'a', 'f1': 500.0 + i, 'speaker': np.nan})
+    assert len(store) == 5 and store.capacity == 8
+    assert store.frame()['f1'].tolist() == [500.0, 501.0, 502.0, 503.0, 504.0]
+    assert store.frame()['speaker'].isna().all()
+
+
+def test_sync_takes_back_added_and_replaced_columns():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i'], 'f1': [500.0, 300.0], 'speaker': ['s1', 's2']}))
+    frame = store.frame()
+    frame['zsc_f1'] = [1.0, -1.0]
+    frame['f1'] = [510.0, 310.0]
+    store.sync()
+    assert store.column_values('zsc_f1').tolist() == [1.0, -1.0]
+    assert store.column_values('f1').tolist() == [510.0, 310.0]
+
+
+def test_frame_shows_categories_as_categorical():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i', 'a'], 'speaker': ['s1', None, 's1']}))
+    speaker = store.frame()['speaker']
+    assert isinstance(speaker.dtype, pd.CategoricalDtype)
+    assert speaker.cat.codes.tolist() == [0, -1, 0]
+
+
+def test_sync_finds_category_edits_made_in_place():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i'], 'speaker': ['s1', 's2']}))
+    store.frame().iat[1, store.columns.index('speaker')] = 's1'
+    codes, names = store.category_codes('speaker')
+    assert [names[code] for code in codes] == ['s1', 's1']
+    assert store.column_values('speaker').tolist() == ['s1', 's1']
+
+
+def test_sync_recodes_category_columns_replaced_in_the_frame():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i'], 'speaker': ['s1', 's1']}))
+    store.frame()['speaker'] = store.frame()['speaker'].cat.add_categories(['s2'])
+    store.frame().iat[1, store.columns.index('speaker')] = 's2'
+    codes, names = store.category_codes('speaker')
+    assert [names[code] for code in codes] == ['s1', 's2']
+
+
+def test_sync_drops_removed_columns():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a'], 'f1': [500.0], 'zsc_f1': [0.0]}))
+    del store.frame()['zsc_f1']
+    store.sync()
+    assert 'zsc_f1' not in store.columns
+
+
+def test_replace_starts_over():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a'], 'speaker': ['s1']}))
+    store.replace(pd.DataFrame({'vowel': ['o', 'u'], 'f1': [400.0, 350.0], 'speaker': ['s2', '']}))
+    frame = store.frame()
+    assert list(frame.columns) == ['vowel', 'f1', 'speaker']
+    assert frame['speaker'].tolist() == ['s2', '']
+    assert store.categories['speaker'][0] == ['s2', '']
+
+
+def test_truncate_forgets_rows():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i', 'u'], 'f1': [500.0, 300.0, 320.0]}))
+    store.truncate(1)
+    store.append({'vowel': 'e', 'f1': 450.0})
+    assert store.frame()['vowel'].tolist() == ['a', 'e']
+    assert store.frame()['f2'].isna().all()
@@ -0,0 +1,97 @@
+# core/test_history.py
+# Run with: python -m pytest core
+
+import numpy as np
+import pandas as pd
+
+from core.data_store import DataStore
+from core.history import OPERATION_OVERHEAD, CellEdits, ColumnValues, History, RowRange
+
+
+def filled_store():
+    store = DataStore()
+    store.extend(pd.DataFrame({'vowel': ['a', 'i'], 'f1': [500.0, 300.0], 'speaker': ['s1', 's2']}))
+    return store
+
+
+def test_undo_and_redo_of_appended_rows():
+    store, history = filled_store(), History()
+    history.record(RowRange(len(store)))
+    store.append({'vowel': 'u', 'f1': 320.0, 'speaker': 's1'})
+    assert history.undo(store) and len(store) == 2
+    assert history.redo(store)
+    assert store.frame()['vowel'].tolist() == ['a', 'i', 'u']
+
+
+def test_appended_rows_cost_nothing_until_undone():
+    store, history = filled_store(), History()
+    history.record(RowRange(len(store)))
+    store.append({'vowel': 'u', 'f1': 320.0})
+    assert history.nbytes == OPERATION_OVERHEAD
+    history.undo(store)
+    assert history.nbytes > OPERATION_OVERHEAD
+
+
+def test_cell_edits_swap_old_and_new_values():
+    store, history = filled_store(), History()
+    history.record(CellEdits([1], {'f1': store.cells([1], 'f1'), 'speaker': store.cells([1], 'speaker')}))
+    store.set_cells([1], 'f1', [310.0])
+    store.set_cells([1], 'speaker', ['s3'])
+    history.undo(store)
+    assert store.frame().loc[1, ['f1', 'speaker']].tolist() == [300.0, 's2']
+    history.redo(store)
+    assert store.frame().loc[1, ['f1', 'speaker']].tolist() == [310.0, 's3']
+
+
+def test_new_column_is_dropped_on_undo():
+    store, history = filled_store(), History()
+    history.record(ColumnValues({'zsc_f1': None}))
+    store.set_column('zsc_f1', [1.0, -1.0])
+    history.undo(store)
+    assert 'zsc_f1' not in store.columns
+    history.redo(store)
+    assert store.column_values('zsc_f1').tolist() == [1.0, -1.0]
+
+
+def test_grouped_steps_are_undone_together_in_reverse():
+    store, history = filled_store(), History()
+    with history.grouped():
+        history.record(CellEdits([0], {'f1': store.cells([0], 'f1')}))
+        store.set_cells([0], 'f1', [550.0])
+        history.record(RowRange(len(store)))
+        store.append({'vowel': 'e', 'f1': 450.0})
+    assert len(history.undo_steps) == 1
+    history.undo(store)
+    assert store.frame()['f1'].tolist() == [500.0, 300.0]
+    assert not history.can_undo
+
+
+def test_recording_forgets_the_redo_steps():
+    store, history = filled_store(), History()
+    history.record(RowRange(len(store)))
+    store.append({'vowel': 'u'})
+    history.undo(store)
+    history.record(RowRange(len(store)))
+    assert not history.can_redo
+    assert history.nbytes == OPERATION_OVERHEAD
+
+
+def test_nothing_to_undo():
+    assert not History().undo(filled_store())
+
+
+def test_trim_forgets_the_oldest_steps():
+    history = History(max_bytes=3 * OPERATION_OVERHEAD)
+    for i in range(5):
+        history.record(ColumnValues({f"c{i}": None}))
+    assert len(history.undo_steps) == 3
+    assert [list(operations[0].values) for operations, _ in history.undo_steps] == [['c2'], ['c3'], ['c4']]
+
+
+def test_lower_limit_trims_redo_steps_too():
+    store, history = filled_store(), History()
+    history.record(ColumnValues({'f1': store.column_values('f1')}))
+    store.set_column('f1', np.zeros(2))
+    history.undo(store)
+    history.set_max_bytes(0)
+    assert not history.can_undo and not history.can_redo and history.nbytes == 0
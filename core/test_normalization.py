@@ -0,0 +1,47 @@
+# core/test_normalization.py
+# Run with: python -m pytest core
+
+import numpy as np
+import pandas as pd
+
+from core.normalization import grouped_stats, grouped_sum, lobanov_normalization, nearey1, nearey2
+
+
+def test_grouped_sum_leaves_out_rows_without_group():
+    codes = np.array([0, -1, 1, 0])
+    values = np.array([[1.0], [100.0], [2.0], [3.0]])
+    assert grouped_sum(codes, 2, values).tolist() == [[4.0], [2.0]]
+
+
+def test_grouped_sum_without_groups():
+    sums = grouped_sum(np.array([-1, -1]), 0, np.ones((2, 3)))
+    assert sums.shape == (0, 3)
+
+
+def test_grouped_stats_match_pandas():
+    df = pd.DataFrame({'f1': [500.0, 600.0, 700.0, 800.0, np.nan],
+                       'speaker': ['a', 'b', 'a', 'b', 'a']})
+    stats = grouped_stats(df, ['f1'])
+    expected = df.groupby('speaker', sort=False)['f1']
+    assert np.allclose(stats['mean'][:, 0], expected.mean().to_numpy())
+    assert np.allclose(stats['std'][:, 0], expected.std().to_numpy())
+    assert stats['count'][:, 0].tolist() == [2.0, 2.0]
+
+
+def test_grouped_stats_single_row_group_has_no_std():
+    df = pd.DataFrame({'f1': [500.0, 600.0, 700.0], 'speaker': ['a', 'a', 'b']})
+    assert np.isnan(grouped_stats(df, ['f1'])['std'][1, 0])
+
+
+def test_normalizations_without_any_speaker_give_nan():
+    df = pd.DataFrame({'f1': [500.0, 600.0, 700.0], 'f2': [1500.0, 1600.0, 1700.0], 'speaker': [np.nan] * 3})
+    for function, prefix in ((lobanov_normalization, 'zsc'), (nearey1, 'logmean'), (nearey2, 'slogmean')):
+        result = function(df.copy(), ['f1', 'f2'])
+        assert result[[f"{prefix}_f1", f"{prefix}_f2"]].isna().all().all()
+
+
+def test_lobanov_skips_rows_without_speaker():
+    df = pd.DataFrame({'f1': [500.0, 600.0, 700.0], 'speaker': ['a', np.nan, 'a']})
+    z = lobanov_normalization(df, ['f1'])['zsc_f1']
+    assert np.isnan(z[1])
+    assert np.allclose(z[[0, 2]], [-np.sqrt(0.5), np.sqrt(0.5)])
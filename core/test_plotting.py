@@ -0,0 +1,21 @@
+# core/test_plotting.py
+# Run with: python -m pytest core
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.patches import Ellipse
+
+from core.plotting import VowelSpacePlot
+
+
+def test_rows_without_speaker_get_no_ellipse():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'vowel': ['a'] * 20, 'f1': rng.normal(600, 50, 20), 'f2': rng.normal(1500, 100, 20),
+                         'speaker': ['s1'] * 10 + [np.nan] * 10})
+    plot = VowelSpacePlot(Figure().add_subplot())
+    plot.draw(data, 'f1', 'f2', ellipse=True, center_labels=True)
+    ellipses = [artist for artist in plot.decorations if isinstance(artist, Ellipse)]
+    texts = [artist.get_text() for artist in plot.decorations if hasattr(artist, 'get_text')]
+    assert len(ellipses) == 1
+    assert texts == ['s1']
@@ -0,0 +1,70 @@
+# core/test_project.py
+# Run with: python -m pytest core
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import project
+from core.data_store import DataStore
+from core.project import save_project, load_project
+
+
+def make_store(n):
+    rng = np.random.default_rng(0)
+    store = DataStore()
+    store.extend(pd.DataFrame({
+        'vowel': rng.choice(['a', 'i', 'u'], n),
+        'f0': np.nan, 'f1': rng.normal(500, 50, n), 'f2': rng.normal(1500, 150, n), 'f3': np.nan, 'f4': np.nan,
+        'speaker': rng.choice(['s1', 's2'], n),
+    }))
+    return store
+
+
+def written_files(manifest):
+    return {(i, column): tuple(file) for i, segment in enumerate(manifest['segments'])
+            for column, file in segment['files'].items()}
+
+
+def test_save_writes_only_the_written_segments_and_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(project, 'SEGMENT_ROWS', 1024)
+    store = make_store(3000)
+    first = save_project(tmp_path, store)
+    assert save_project(tmp_path, store, previous=first)['segments'] == first['segments']
+
+    store.set_cells([2500], 'f1', [123.0])
+    second = save_project(tmp_path, store, previous=first)
+    changed = {key for key, file in written_files(second).items() if written_files(first)[key] != file}
+    assert changed == {(2, 'f1')}
+
+    data, _ = load_project(tmp_path)
+    assert data['f1'].iat[2500] == 123.0
+    assert np.array_equal(data['f1'].to_numpy(), store.column_values('f1'))
+
+
+def test_save_finds_in_place_edits_of_the_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(project, 'SEGMENT_ROWS', 1024)
+    store = make_store(3000)
+    first = save_project(tmp_path, store)
+    store.frame()['speaker'].iat[10] = 's2' if store.frame()['speaker'].iat[10] == 's1' else 's1'
+    store.frame()['f2'].to_numpy()[2000] = 1.0
+    store.mark_written([2000], ['f2'])
+    second = save_project(tmp_path, store, previous=first)
+    changed = {key for key, file in written_files(second).items() if written_files(first)[key] != file}
+    assert changed == {(0, 'speaker'), (1, 'f2')}
+    data, _ = load_project(tmp_path)
+    assert data['speaker'].iat[10] == store.frame()['speaker'].iat[10]
+    assert data['f2'].iat[2000] == 1.0
+
+
+def test_load_rejects_a_damaged_segment(tmp_path):
+    store = make_store(100)
+    manifest = save_project(tmp_path, store)
+    file_name, key = manifest['segments'][0]['files']['f1']
+    arrays = dict(np.load(os.path.join(tmp_path, file_name)))
+    arrays[key] = arrays[key] + 1
+    np.savez(os.path.join(tmp_path, file_name), **arrays)
+    with pytest.raises(ValueError):
+        load_project(tmp_path)
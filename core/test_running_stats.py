@@ -0,0 +1,50 @@
+# core/test_running_stats.py
+# Run with: python -m pytest core
+
+import numpy as np
+import pandas as pd
+
+from core.normalization import lobanov_normalization
+from core.running_stats import RunningGroupStats
+
+
+def speaker_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'f1': rng.normal(500, 50, n), 'f2': rng.normal(1500, 150, n), 'speaker': ['a'] * n})
+
+
+def add_row(df, stats, f1, f2):
+    df.loc[len(df)] = {'f1': f1, 'f2': f2, 'speaker': 'a'}
+    stats.add('a', df.loc[len(df) - 1], label=len(df) - 1)
+    stats.refresh(df, keys=['a'], rows=[len(df) - 1])
+
+
+def test_refresh_matches_lobanov_after_add():
+    df = lobanov_normalization(speaker_frame(5), ['f1', 'f2'])
+    stats = RunningGroupStats(['f1', 'f2'])
+    stats.rebuild(df)
+    add_row(df, stats, 650.0, 1200.0)
+    expected = lobanov_normalization(df[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])
+    assert np.allclose(df['zsc_f1'], expected['zsc_f1'])
+
+
+def test_small_change_writes_only_the_new_row():
+    df = lobanov_normalization(speaker_frame(2000), ['f1', 'f2'])
+    stats = RunningGroupStats(['f1', 'f2'], tolerance=1e-2)
+    stats.rebuild(df)
+    stats.refresh(df, keys=['a'])
+    before = df['zsc_f1'].copy()
+    add_row(df, stats, 500.0, 1500.0)
+    assert df['zsc_f1'].iloc[:-1].equals(before)
+    exact = lobanov_normalization(df[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])['zsc_f1']
+    assert np.allclose(df['zsc_f1'], exact, atol=0.05)
+
+
+def test_drift_beyond_tolerance_rewrites_the_speaker():
+    df = lobanov_normalization(speaker_frame(20), ['f1', 'f2'])
+    stats = RunningGroupStats(['f1', 'f2'], tolerance=1e-3)
+    stats.rebuild(df)
+    stats.refresh(df, keys=['a'])
+    add_row(df, stats, 900.0, 2500.0)
+    exact = lobanov_normalization(df[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])['zsc_f1']
+    assert np.allclose(df['zsc_f1'], exact)
@@ -0,0 +1,101 @@
+# core/wav_io.py
+# Memory-mapped access to PCM WAV files. Only the header is parsed on opening; the samples stay on disk
+# and are converted to floats one window at a time, so recordings larger than RAM can still be analysed.
+
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+# Raises ValueError for anything that isn't uncompressed (PCM or floating point) WAV
+class WavFile:
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] not in (b'RIFF', b'RF64') or header[8:] != b'WAVE':
+                raise ValueError(f"{file_name} is not a WAV file.")
+
+            fmt = None
+            data_offset = data_size = None
+            file_size = f.seek(0, 2)
+            position = 12
+            while position + 8 <= file_size:
+                f.seek(position)
+                chunk_id, chunk_size = struct.unpack('<4sI', f.read(8))
+                if chunk_id == b'fmt ':
+                    fmt = f.read(chunk_size)
+                elif chunk_id == b'data':
+                    data_offset = position + 8
+                    # Recordings that were cut off (or streamed) may claim more data than the file holds
+                    data_size = min(chunk_size, file_size - data_offset)
+                    break
+                position += 8 + chunk_size + chunk_size % 2  # chunks are padded to an even size
+
+        if fmt is None or data_offset is None:
+            raise ValueError(f"{file_name} has no 'fmt ' or 'data' chunk.")
+
+        format_tag, self.n_channels, sampling_frequency, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack('<H', fmt[24:26])[0]  # the first two bytes of the sub-format GUID
+        if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(f"{file_name} is not PCM or floating point audio (format {format_tag:#06x}).")
+
+        self.sampling_frequency = float(sampling_frequency)
+        self.start_time = 0.0
+        self.bits = bits
+        self.is_float = format_tag == WAVE_FORMAT_IEEE_FLOAT
+        self.sample_width = block_align // self.n_channels
+        self.n_samples = data_size // block_align
+
+        # 24-bit samples have no NumPy type, so they're mapped as raw bytes and unpacked per window
+        if self.is_float:
+            dtype = {4: '<f4', 8: '<f8'}.get(self.sample_width)
+        else:
+            dtype = {1: 'u1', 2: '<i2', 3: 'u1', 4: '<i4'}.get(self.sample_width)
+        if dtype is None:
+            raise ValueError(f"{file_name} has unsupported {bits}-bit samples.")
+
+        if self.n_samples:
+            shape = (self.n_samples, self.n_channels * 3) if self.sample_width == 3 else (self.n_samples, self.n_channels)
+            self.samples = np.memmap(file_name, dtype=dtype, mode='r', offset=data_offset, shape=shape)
+        else:
+            self.samples = np.empty((0, self.n_channels), dtype=dtype)
+
+    @property
+    def duration(self):
+        return self.n_samples / self.sampling_frequency
+
+    # The mapped samples live in the operating system's page cache, not in our memory budget
+    @property
+    def nbytes(self):
+        return 0
+
+    # Samples start..stop of every channel as a (channels x samples) float array between -1 and 1,
+    # scaled the same way Praat scales the file when it reads it
+    def read(self, start=0, stop=None):
+        stop = self.n_samples if stop is None else min(stop, self.n_samples)
+        start = max(start, 0)
+        raw = np.asarray(self.samples[start:stop])
+
+        if self.is_float:
+            values = raw.astype(np.float64)
+        elif self.sample_width == 1:
+            values = (raw.astype(np.float64) - 128) / 128  # 8-bit WAV is unsigned
+        elif self.sample_width == 3:
+            as_bytes = raw.reshape(-1, self.n_channels, 3).astype(np.int32)
+            ints = as_bytes[..., 0] | (as_bytes[..., 1] << 8) | (as_bytes[..., 2] << 16)
+            ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+            values = ints / float(2 ** 23)
+        else:
+            values = raw / float(2 ** (8 * self.sample_width - 1))
+        return np.ascontiguousarray(values.T)
+
+    # Yields (first sample, values) for consecutive windows of at most block_size samples
+    def blocks(self, block_size):
+        for start in range(0, self.n_samples, block_size):
+            yield start, self.read(start, start + block_size)
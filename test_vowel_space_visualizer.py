@@ -0,0 +1,84 @@
+# test_vowel_space_visualizer.py
+# Run with: python -m pytest test_vowel_space_visualizer.py
+
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pandas as pd
+import pytest
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from core.normalization import lobanov_normalization
+from vowel_space_visualizer import VowelSpaceVisualizer
+
+app = QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def window(monkeypatch):
+    errors = []
+    monkeypatch.setattr(QMessageBox, 'critical', staticmethod(lambda parent, title, text: errors.append(text)))
+    window = VowelSpaceVisualizer()
+    window.errors = errors
+    yield window
+    window.close()
+
+
+def add_token(window, vowel, f1, f2, speaker):
+    window.edit_vowel.setText(vowel)
+    window.edit_f1.setText(str(f1))
+    window.edit_f2.setText(str(f2))
+    window.edit_speaker.setText(speaker)
+    window.add_data()
+
+
+def test_undoing_a_normalization_unchecks_it(window):
+    for i, speaker in enumerate(['s1', 's1', 's1', 's2', 's2', 's2']):
+        add_token(window, 'aei'[i % 3], 500 + 40 * i, 1500 - 60 * i, speaker)
+    window.checkbox_normalize_lobanov.trigger()
+    window.flush_render()
+    assert 'zsc_f1' in window.data.columns
+
+    window.undo()
+    window.flush_render()
+    assert 'zsc_f1' not in window.data.columns
+    assert not window.checkbox_normalize_lobanov.isChecked()
+    assert window.errors == []
+
+    window.redo()
+    window.flush_render()
+    assert window.checkbox_normalize_lobanov.isChecked()
+    assert window.errors == []
+
+
+def test_undoing_a_token_updates_the_normalized_columns(window):
+    for i, speaker in enumerate(['s1', 's1', 's1', 's2', 's2', 's2']):
+        add_token(window, 'aei'[i % 3], 500 + 40 * i, 1500 - 60 * i, speaker)
+    window.checkbox_normalize_lobanov.trigger()
+    add_token(window, 'u', 900, 800, 's1')
+
+    window.undo()
+    expected = lobanov_normalization(window.data[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])
+    assert len(window.data) == 6
+    assert np.allclose(window.data['zsc_f1'], expected['zsc_f1'])
+
+    window.redo()
+    expected = lobanov_normalization(window.data[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])
+    assert np.allclose(window.data['zsc_f1'], expected['zsc_f1'])
+
+
+def test_undoing_an_edit_moves_the_row_back_to_its_speaker(window):
+    for i, speaker in enumerate(['s1', 's1', 's1', 's2', 's2', 's2']):
+        add_token(window, 'aei'[i % 3], 500 + 40 * i, 1500 - 60 * i, speaker)
+    window.checkbox_normalize_lobanov.trigger()
+    old_rows = window.data.iloc[[0]].copy()
+    window.data.iat[0, window.data.columns.get_loc('speaker')] = 's2'
+    window.rows_edited(old_rows, ['speaker'])
+
+    window.undo()
+    assert window.data.at[0, 'speaker'] == 's1'
+    assert window.running_stats.stats('s1')['count'][1] == 3
+    expected = lobanov_normalization(window.data[['f1', 'f2', 'speaker']].copy(), ['f1', 'f2'])
+    assert np.allclose(window.data['zsc_f1'], expected['zsc_f1'])
@@ -1,46 +1,90 @@
 # vowel_space_visualizer.py
 # This is where everything else comes together.
 
+import os
+import time
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import openpyxl
 from PyQt5.QtGui import QIcon
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.patches import Ellipse
-from scipy.spatial import ConvexHull
-from scipy.stats import chi2
+from matplotlib.figure import Figure
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout,
-    QGridLayout, QFileDialog, QMessageBox, QMenu, QMenuBar, QAction, QCheckBox, QComboBox
+    QGridLayout, QFileDialog, QMessageBox, QMenu, QMenuBar, QAction, QCheckBox, QComboBox, QInputDialog
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 
-from components.df_editor import DFEditor
-from components.ipa_window import IPAWindow
-from components.audio_tool import AudioAnalysisTool
-
-from core.normalization import (
-    lobanov_normalization,
-    bark_difference,
-    nearey1,
-    nearey2,
-    bark_transform,
-    log_transform,
-    mel_transform,
-    erb_transform
-)
+# The editor, IPA keyboard, Audio Analysis Tools and Performance panel are imported when they're first opened,
+# so starting the window doesn't load their dependencies (Parselmouth for the audio tools, most of all)
+from components.dataset_import import DatasetImport
+from components.export_queue import ExportQueue
+
+from core.data_io import read_dataset, DATASET_FILTER
+from core.data_store import DataStore
+from core.derived_cache import DerivedCache
+from core.history import History, RowRange, CellEdits, ColumnValues
+from core.normalization import plot_columns
+from core.plotting import DEFAULT_OPTIONS, VowelSpacePlot
+from core.profiling import profiler
+from core.project import save_project, load_project, geometry_records, restore_geometry, PROJECT_EXTENSION
+from core.running_stats import RunningGroupStats
+
+
+# Checkable options and normalizations that are saved with a project
+VIEW_CHECKBOXES = [
+    'group_by_vowel_action', 'connect_ellipse_action', 'connect_qhull_action', 'show_center_info_action',
+    'checkbox_show_labels_f', 'checkbox_show_labels_vowel', 'checkbox_show_labels_speaker',
+    'checkbox_show_legend', 'checkbox_show_grids', 'checkbox_normalize_bark', 'checkbox_normalize_lobanov',
+    'checkbox_normalize_nearey1', 'checkbox_normalize_nearey2', 'checkbox_use_bark', 'checkbox_use_log',
+    'checkbox_use_mel', 'checkbox_use_erb', 'checkbox_no_title', 'checkbox_show_all_formants',
+]
+
+# Undoing or redoing up to this many added, removed or edited rows updates the running statistics row by row;
+# bigger steps (imports, clearing the data) rebuild them with the vectorized engine
+INCREMENTAL_RESTORE_ROWS = 1000
 
 
 class VowelSpaceVisualizer(QWidget):
     def __init__(self):
         super().__init__()
+
+        # Render scheduler: changes only mark what's out of date, and a zero-delay single-shot timer turns
+        # a burst of them (several toggles, a whole import) into one frame once control returns to Qt.
+        # 'data' and 'transform' (rows or plotted columns changed) redraw the plot, 'styling' (title, legend,
+        # grid) only updates the existing artists and 'layout' (resizes) only redoes the layout.
+        self.dirty_parts = set()
+        self.render_timer = QTimer()
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(0)
+        self.render_timer.timeout.connect(self.render_frame)
+
+        # Figures are saved in the background, one after the other (see components/export_queue.py)
+        self.export_queue = ExportQueue(self)
+        self.export_queue.progress.connect(self.export_progress)
+        self.export_queue.finished_export.connect(self.export_finished)
+
+        # Datasets are imported in batches in the background (see components/dataset_import.py)
+        self.dataset_import = None
+        self.import_drawn_at = float('-inf')
+        self.import_started_at = None  # for the timing of the whole import (see core/profiling.py)
+        self.performance_panel = None
+
         self.initUI()
 
         self.resize_timer = QTimer()
         self.resize_timer.timeout.connect(self.delayed_update_scatterplot)
 
+    # The data as a DataFrame over the store's buffers. Assigning a DataFrame replaces the store's content.
+    @property
+    def data(self):
+        return self.store.frame()
+
+    @data.setter
+    def data(self, df):
+        self.store.replace(df)
+
     def initUI(self):
         # Create widgets
         self.create_widgets()
@@ -48,8 +92,19 @@ class VowelSpaceVisualizer(QWidget):
         # Set layout
         self.set_layout()
 
-        # Set initial state
-        self.data = pd.DataFrame(columns=["vowel", "f0", "f1", "f2", "f3", "f4", "speaker"])
+        # Set initial state. The rows live in a columnar store with growing buffers; self.data is its
+        # DataFrame view (see the data property below)
+        self.store = DataStore(["vowel", "f0", "f1", "f2", "f3", "f4", "speaker"])
+        # Undo/redo log of the changes to the store, kept under a memory limit
+        self.history = History()
+        # The project folder the session was last saved to or opened from, and its manifest,
+        # so saving again only writes what changed (see core/project.py)
+        self.project_path = None
+        self.project_manifest = None
+        # Per-speaker running statistics kept next to self.data, so single-row changes update the normalized columns
+        self.running_stats = RunningGroupStats()
+        # Cached normalization results, invalidated per column when the data changes
+        self.derived_cache = DerivedCache()
         self.setWindowTitle("VowSpace v1.4.2")
         self.setWindowIcon(QIcon("assets/vowspace.ico"))
 
@@ -70,18 +125,38 @@ class VowelSpaceVisualizer(QWidget):
         save_as_action = self.create_action('Save As...', self.save_scatterplot, Qt.CTRL + Qt.SHIFT + Qt.Key_S)
         save_data_action = self.create_action('Save Data As...', self.save_data_to_excel)
         import_data_action = self.create_action('Import Data from Dataset', self.import_data_from_excel)
+        open_project_action = self.create_action('Open Project...', self.open_project, Qt.CTRL + Qt.Key_O)
+        save_project_action = self.create_action('Save Project', self.save_project, Qt.CTRL + Qt.ALT + Qt.Key_S)
+        save_project_as_action = self.create_action('Save Project As...', self.save_project_as)
 
         file_menu.addAction(save_action)
         file_menu.addAction(save_as_action)
         file_menu.addAction(save_data_action)
         file_menu.addAction(import_data_action)
+        file_menu.addSeparator()
+        file_menu.addAction(open_project_action)
+        file_menu.addAction(save_project_action)
+        file_menu.addAction(save_project_as_action)
+        file_menu.addSeparator()
+
+        cancel_exports_action = self.create_action('Cancel Saving', self.cancel_exports)
+        file_menu.addAction(cancel_exports_action)
+
+        cancel_import_action = self.create_action('Cancel Import', self.cancel_import)
+        file_menu.addAction(cancel_import_action)
 
         # Edit menu
         edit_menu = menubar.addMenu('Edit')
 
-        undo_action = self.create_action('Undo', self.undo_last_data, Qt.CTRL + Qt.Key_Z)
+        undo_action = self.create_action('Undo', self.undo, Qt.CTRL + Qt.Key_Z)
         edit_menu.addAction(undo_action)
 
+        redo_action = self.create_action('Redo', self.redo, Qt.CTRL + Qt.SHIFT + Qt.Key_Z)
+        edit_menu.addAction(redo_action)
+
+        history_limit_action = self.create_action('Set Undo Memory Limit...', self.set_history_limit)
+        edit_menu.addAction(history_limit_action)
+
         # Options menu
         options_menu = menubar.addMenu('Options')
 
@@ -130,6 +205,11 @@ class VowelSpaceVisualizer(QWidget):
                                                                format='png', checkable=True)
         labels_submenu.addAction(self.checkbox_show_labels_speaker)
 
+        # How many point labels can be on screen at once (the overlapping ones are left out)
+        self.label_budget = DEFAULT_OPTIONS['label_budget']
+        label_budget_action = self.create_action('Set Label Limit...', self.set_label_budget)
+        labels_submenu.addAction(label_budget_action)
+
         # Adds another submenu under Show Data Labels
         visualization_options_menu.addMenu(labels_submenu)
 
@@ -137,12 +217,12 @@ class VowelSpaceVisualizer(QWidget):
         legend_options_menu = visualization_options_menu.addMenu('Legend Options')
 
         # Show legend or not
-        self.checkbox_show_legend = self.create_action('Show Legend', self.update_scatterplot, format='png',
+        self.checkbox_show_legend = self.create_action('Show Legend', self.update_style, format='png',
                                                        checkable=True)
         legend_options_menu.addAction(self.checkbox_show_legend)
 
         # Show grids or not
-        self.checkbox_show_grids = self.create_action('Show Grids', self.update_scatterplot, format='png',
+        self.checkbox_show_grids = self.create_action('Show Grids', self.update_style, format='png',
                                                       checkable=True)
         visualization_options_menu.addAction(self.checkbox_show_grids)
 
@@ -182,6 +262,11 @@ class VowelSpaceVisualizer(QWidget):
         self.checkbox_use_erb = self.create_action('Erb Conversion', self.normErb, format='png', checkable=True)
         data_options_menu.addAction(self.checkbox_use_erb)
 
+        # Timings of the redraws, normalizations, imports and audio analyses
+        options_menu.addSeparator()
+        performance_action = self.create_action('Performance Panel...', self.show_performance_panel)
+        options_menu.addAction(performance_action)
+
         self.layout().setMenuBar(menubar)
 
     def create_action(self, text, function, shortcut=None, format=None, checkable=False):
@@ -226,6 +311,8 @@ class VowelSpaceVisualizer(QWidget):
 
         self.checkbox_no_title = QCheckBox('No Title')
         self.checkbox_no_title.setChecked(True) # Thought this would be more efficient
+        self.checkbox_no_title.toggled.connect(self.update_style)
+        self.edit_title.editingFinished.connect(self.update_style)
 
         # The buttons that trigger those actions
         self.button_add_data = self.create_button('Add Data', self.add_data, Qt.Key_Return)
@@ -249,8 +336,11 @@ class VowelSpaceVisualizer(QWidget):
         self.dropdown_y_axis.addItems(["f0", "f1", "f2", "f3", "f4"])  # Add available columns
         self.dropdown_y_axis.setCurrentText("f2")  # Set default value to F2
 
-        self.figure, self.ax = plt.subplots(figsize=(8, 6))
+        # A plain Figure: pyplot and its figure manager aren't needed for a figure that lives in the window
+        self.figure = Figure(figsize=(8, 6))
+        self.ax = self.figure.add_subplot()
         self.canvas = FigureCanvas(self.figure)
+        self.vowel_plot = VowelSpacePlot(self.ax)  # keeps the point collection between redraws
 
     def update_input_fields_audio(self, f1, f2, f3, f4, speaker_name):
         # Update speaker's name
@@ -318,6 +408,10 @@ class VowelSpaceVisualizer(QWidget):
 
         layout.addWidget(self.canvas)
 
+        # Progress of the exports and imports running in the background
+        self.status_label = QLabel('')
+        layout.addWidget(self.status_label)
+
         self.setLayout(layout)
 
     def create_button(self, text, function, shortcut=None):
@@ -367,13 +461,18 @@ class VowelSpaceVisualizer(QWidget):
         # Convert F4 to float or set to NaN if empty
         f4 = float(self.edit_f4.text()) if self.edit_f4.text() else np.nan
 
-        speaker = self.edit_speaker.text() if self.edit_speaker.text() else ''
+        # An empty speaker field leaves the speaker missing
+        speaker = self.edit_speaker.text() if self.edit_speaker.text() else np.nan
 
-        new_data = pd.DataFrame(
-            {"vowel": [vowel], "f0": [f0], "f1": [f1], "f2": [f2], "f3": [f3], "f4": [f4], "speaker": [speaker]}) if speaker else \
-            pd.DataFrame({"vowel": [vowel], "f0": [f0], "f1": [f1], "f2": [f2], "f3": [f3], "f4": [f4]})
+        self.history.record(RowRange(len(self.store)))
+        self.store.append({"vowel": vowel, "f0": f0, "f1": f1, "f2": f2, "f3": f3, "f4": f4, "speaker": speaker})
 
-        self.data = pd.concat([self.data, new_data], ignore_index=True)
+        # Update the speaker's running statistics and the derived columns of the new row and its speaker
+        row = self.data.index[-1]
+        key = self.data.at[row, 'speaker'] if 'speaker' in self.data.columns else np.nan
+        self.running_stats.add(key, self.data.loc[row], label=row)
+        self.refresh_running_stats(keys=[key], rows=[row])
+        self.derived_cache.invalidate_rows()
 
         self.clear_input_fields()
 
@@ -416,348 +515,290 @@ class VowelSpaceVisualizer(QWidget):
         msg_box.setText(message)
         msg_box.exec_()
 
-    # Deletes the last inputted data from the dataframe
-    def undo_last_data(self):
-        if not self.data.empty:
-            self.data = self.data.iloc[:-1]
-            self.update_scatterplot()
+    # Undoes or redoes the last change to the data (adding, editing, clearing, importing, normalizing)
+    def undo(self):
+        # The rows of a running import can't be taken out from under it
+        if self.dataset_import is None:
+            operations = self.history.undo(self.store)
+            if operations:
+                self.data_restored(operations, undone=True)
+
+    def redo(self):
+        if self.dataset_import is None:
+            operations = self.history.redo(self.store)
+            if operations:
+                self.data_restored(operations, undone=False)
+
+    # After an undo or redo the running statistics, derived columns and normalization checkboxes are brought
+    # in line with the data. Small row changes are applied to the statistics like the original change was,
+    # so their cost follows the size of the change; anything else rebuilds them.
+    def data_restored(self, operations, undone):
+        row_operations = [operation for operation in operations if isinstance(operation, (RowRange, CellEdits))]
+        if row_operations and len(row_operations) == len(operations) \
+                and sum(self.restored_row_count(operation) for operation in row_operations) <= INCREMENTAL_RESTORE_ROWS:
+            for operation in row_operations:
+                self.restore_rows(operation)
+        elif row_operations or any(self.running_stats.group_column in operation.values
+                                   or set(self.running_stats.formants) & set(operation.values)
+                                   for operation in operations):
+            self.running_stats.rebuild(self.data)
+            self.refresh_running_stats(keys=list(self.running_stats.groups), rows=list(self.data.index))
+            self.derived_cache.invalidate_rows()
+        else:
+            self.derived_cache.invalidate_columns([column for operation in operations for column in operation.values])
 
-    # Creates the scatterplot
-    def update_scatterplot(self, format=None):
-        self.ax.clear()
+        self.restore_normalization_checkboxes(operations, undone)
+        self.update_scatterplot()
 
-        markers = '.'  # Use a single marker for all vowels (.)
-        vowel_markers = {v: markers for v in self.data['vowel'].unique()}
+    # Rows an undone or redone operation changed in the store
+    def restored_row_count(self, operation):
+        if isinstance(operation, CellEdits):
+            return len(operation.rows)
+        return len(operation.rows) if operation.rows is not None else len(self.store) - operation.start
+
+    # Applies one undone or redone RowRange or CellEdits (already swapped with the store) to the running statistics
+    def restore_rows(self, operation):
+        if isinstance(operation, CellEdits):
+            # The store has the values now in effect, the operation the ones that were replaced
+            old_rows = self.data.iloc[operation.rows].copy()
+            for column, values in operation.values.items():
+                old_rows[column] = values
+            self.derived_cache.invalidate_columns(list(operation.values))
+            self.update_running_stats(old_rows)
+            return
 
-        # Determine if we are coloring by speaker or by vowel
-        if self.group_by_vowel_action.isChecked():
-            group_by = 'vowel'
-            unique_values = self.data['vowel'].unique()
+        self.derived_cache.invalidate_rows()
+        if operation.rows is None:
+            # Rows put back at the end of the table
+            rows = list(self.data.index[operation.start:])
+            for row in rows:
+                self.running_stats.add(self.data.at[row, 'speaker'] if 'speaker' in self.data.columns else np.nan,
+                                       self.data.loc[row], label=row)
+            keys = {self.data.at[row, 'speaker'] for row in rows} if 'speaker' in self.data.columns else set()
         else:
-            group_by = 'speaker'
-            unique_values = self.data['speaker'].unique()
+            # Rows taken off the end of the table; the operation holds them
+            removed = operation.rows.set_axis(range(operation.start, operation.start + len(operation.rows)))
+            rows = []
+            keys = set()
+            for row, values in removed.iterrows():
+                key = values.get('speaker', np.nan)
+                self.running_stats.remove(key, values, label=row)
+                keys.add(key)
+        self.refresh_running_stats(keys=[key for key in keys if not pd.isna(key)], rows=rows)
+
+    # A checked normalization whose columns an undo took away is unchecked; a redo that brings them back
+    # checks it again when no other normalization is checked
+    def restore_normalization_checkboxes(self, operations, undone):
+        checkboxes = self.normalization_checkboxes()
+        for operation in operations:
+            if isinstance(operation, ColumnValues) and operation.method in checkboxes:
+                if not undone and not self.selected_normalizations():
+                    checkboxes[operation.method].setChecked(True)
+        x_column, y_column = self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()
+        for method in self.selected_normalizations():
+            columns = plot_columns(method, x_column, y_column)
+            if not set(columns).issubset(self.data.columns):
+                checkboxes[method].setChecked(False)
+
+    def set_history_limit(self):
+        megabytes, ok = QInputDialog.getInt(self, "Undo Memory Limit", "Memory for undo history (MB):",
+                                            self.history.max_bytes // 2 ** 20, 0, 100000)
+        if ok:
+            self.history.set_max_bytes(megabytes * 2 ** 20)
+
+    # Called by the DataFrame Editor with the previous values of the rows it changed
+    # (and the columns it changed, when it knows them)
+    def rows_edited(self, old_rows, edited_columns=None):
+        # Only the cached results that read one of the edited columns are dropped
+        if edited_columns is None:
+            new_rows = self.data.loc[old_rows.index, old_rows.columns]
+            edited_columns = [column for column in old_rows.columns
+                              if (old_rows[column].astype(str) != new_rows[column].astype(str)).any()]
+        self.derived_cache.invalidate_columns(edited_columns)
+        # The store has the new values, so the edit is recorded with the old ones
+        positions = self.data.index.get_indexer(old_rows.index)
+        self.store.mark_written(positions, edited_columns)
+        self.history.record(CellEdits(positions, {column: old_rows[column].to_numpy() for column in edited_columns}))
+
+        self.update_running_stats(old_rows)
+        self.update_scatterplot()
 
-        colors = {
-            value: plt.cm.viridis(i / len(unique_values))
-            for i, value in enumerate(unique_values)
+    # Moves edited rows from their old speaker's running statistics to their new one's
+    # and refreshes the derived columns of both speakers
+    def update_running_stats(self, old_rows):
+        keys = set()
+        for row, old in old_rows.iterrows():
+            old_key = old.get('speaker', np.nan)
+            new_key = self.data.at[row, 'speaker'] if 'speaker' in self.data.columns else np.nan
+            self.running_stats.remove(old_key, old, label=row)
+            self.running_stats.add(new_key, self.data.loc[row], label=row)
+            keys.update(key for key in (old_key, new_key) if not pd.isna(key))
+
+        self.refresh_running_stats(keys=keys, rows=list(old_rows.index))
+
+    # Rewrites the derived columns of some speakers and rows in place (see RunningGroupStats.refresh),
+    # telling the store which rows changed so the next project save writes them
+    def refresh_running_stats(self, keys, rows):
+        rows = self.running_stats.refresh(self.data, keys=keys, rows=rows)
+        self.store.mark_written(rows, self.running_stats.derived_columns(self.data))
+
+    # The normalization and scale conversion checkboxes of the Data Options menu, by method
+    def normalization_checkboxes(self):
+        return {
+            'bark': self.checkbox_use_bark,
+            'bark_difference': self.checkbox_normalize_bark,
+            'lobanov': self.checkbox_normalize_lobanov,
+            'nearey1': self.checkbox_normalize_nearey1,
+            'nearey2': self.checkbox_normalize_nearey2,
+            'log': self.checkbox_use_log,
+            'mel': self.checkbox_use_mel,
+            'erb': self.checkbox_use_erb,
         }
 
-        # Get selected columns from dropdown menus
-        x_column = self.dropdown_x_axis.currentText()
-        y_column = self.dropdown_y_axis.currentText()
+    # Which normalization or scale conversion is checked in the Data Options menu (None for raw values)
+    def selected_normalizations(self):
+        return [method for method, checkbox in self.normalization_checkboxes().items() if checkbox.isChecked()]
 
+    # The current state of the checkable options, in the form core.plotting expects
+    def plot_options(self):
+        custom_title = self.edit_title.text()
+        return {
+            'group_by': 'vowel' if self.group_by_vowel_action.isChecked() else 'speaker',
+            'show_labels_f': self.checkbox_show_labels_f.isChecked(),
+            'show_labels_vowel': self.checkbox_show_labels_vowel.isChecked(),
+            'show_labels_speaker': self.checkbox_show_labels_speaker.isChecked(),
+            'label_budget': self.label_budget,
+            'ellipse': self.connect_ellipse_action.isChecked(),
+            'qhull': self.connect_qhull_action.isChecked(),
+            'center_labels': self.show_center_info_action.isChecked(),
+            'title': None if self.checkbox_no_title.isChecked() else (custom_title or "Vowel Space(s)"),
+            'show_legend': self.checkbox_show_legend.isChecked(),
+            'show_grid': self.checkbox_show_grids.isChecked(),
+        }
+
+    # Asks for the largest number of point labels to draw
+    def set_label_budget(self):
+        budget, ok = QInputDialog.getInt(self, "Label Limit", "Maximum number of labels on screen:",
+                                         self.label_budget, 0, 100000)
+        if ok:
+            self.label_budget = budget
+            self.update_scatterplot()
+
+    # Marks parts of the plot as out of date; they're brought up to date together in the next frame
+    def request_render(self, *parts):
+        self.dirty_parts.update(parts)
+        self.render_timer.start()
+
+    def render_frame(self):
+        self.render_timer.stop()
+        parts, self.dirty_parts = self.dirty_parts, set()
+        if parts & {'data', 'transform'}:
+            self.draw_scatterplot()
+            return
+        if 'styling' in parts:
+            self.vowel_plot.apply_style(**self.plot_options())
+        # A title or legend that appears or goes away changes the room the axes have as well
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    # Renders any pending changes right away, e.g. before the figure is saved
+    def flush_render(self):
+        if self.dirty_parts:
+            self.render_frame()
+
+    # Redraws the scatterplot in the next frame
+    def update_scatterplot(self, format=None):
+        self.request_render('data')
+
+    # Title, legend and grid changes
+    def update_style(self, format=None):
+        self.request_render('styling')
+
+    # Creates the scatterplot (timed as "update_scatterplot", which is what it does in the end)
+    @profiler.timed('update_scatterplot')
+    def draw_scatterplot(self):
+        profiler.note(rows=len(self.store))
         # Apply transformations if checkboxes are checked
         # Check if more than one normalization method is selected
-        if sum([
-            self.checkbox_use_bark.isChecked(),
-            self.checkbox_normalize_bark.isChecked(),
-            self.checkbox_normalize_lobanov.isChecked(),
-            self.checkbox_normalize_nearey1.isChecked(),
-            self.checkbox_normalize_nearey2.isChecked(),
-            self.checkbox_use_log.isChecked(),
-            self.checkbox_use_mel.isChecked(),
-            self.checkbox_use_erb.isChecked(),
-        ]) > 1:
+        methods = self.selected_normalizations()
+        if len(methods) > 1:
+            self.ax.clear()
             self.show_error_message(
                 "Cannot apply two normalizations' transformations simultaneously.")
             return
 
-        # Determine which normalization to apply
-        if self.checkbox_use_bark.isChecked():
-            x_column = f"bark_{x_column}"
-            y_column = f"bark_{y_column}"
-        elif self.checkbox_use_log.isChecked():
-            x_column = f"log_{x_column}"
-            y_column = f"log_{y_column}"
-        elif self.checkbox_use_mel.isChecked():
-            x_column = f"mel_{x_column}"
-            y_column = f"mel_{y_column}"
-        elif self.checkbox_use_erb.isChecked():
-            x_column = f"erb_{x_column}"
-            y_column = f"erb_{y_column}"
-        elif self.checkbox_normalize_bark.isChecked():
-            x_column = f"Z3_minus_Z2"
-            y_column = f"Z3_minus_Z1"
-        elif self.checkbox_normalize_lobanov.isChecked():
-            x_column = f"zsc_{x_column}"
-            y_column = f"zsc_{y_column}"
-        elif self.checkbox_normalize_nearey1.isChecked():
-            x_column = f"logmean_{x_column}"
-            y_column = f"logmean_{y_column}"
-        elif self.checkbox_normalize_nearey2.isChecked():
-            x_column = f"slogmean_{x_column}"
-            y_column = f"slogmean_{y_column}"
+        # Get selected columns from dropdown menus and determine which normalization to apply
+        x_column, y_column = plot_columns(methods[0] if methods else None,
+                                          self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText())
 
         # Check if selected columns exist in the data
         if x_column not in self.data.columns or y_column not in self.data.columns:
+            self.ax.clear()
             QMessageBox.critical(self, "Error",
                                  f"Selected column(s) '{x_column}' or '{y_column}' do not exist in the dataset.")
             return
 
-        for v in self.data['vowel'].unique():
-            subset = self.data[self.data['vowel'] == v]
-
-            # Check if x_column or y_column exist in subset
-            if x_column not in subset.columns or y_column not in subset.columns:
-                continue
-
-            # Use the appropriate color mapping based on the selection
-            # Coerce to numeric and build a joint finite mask
-            x_num = pd.to_numeric(subset[x_column], errors="coerce")
-            y_num = pd.to_numeric(subset[y_column], errors="coerce")
-            mask = np.isfinite(x_num) & np.isfinite(y_num)
-
-            if not mask.any():
-                continue  # nothing valid to plot for this vowel
-
-            # Keep colors aligned with the filtered rows
-            color = [colors[val] for val in subset.loc[mask, group_by]]
-
-            self.ax.scatter(
-                y_num[mask], x_num[mask],  # note: (y, x) on axes
-                marker=vowel_markers[v],
-                c=color,
-                label=v,
-                alpha=0.8, edgecolors="w", linewidth=1
-            )
-
-            # Labels: iterate only over valid rows
-            show_labels_f = self.checkbox_show_labels_f.isChecked()
-            show_labels_vowel = self.checkbox_show_labels_vowel.isChecked()
-            show_labels_speaker = self.checkbox_show_labels_speaker.isChecked()
-
-            for idx, row in subset.loc[mask].iterrows():
-                label = ''
-                if show_labels_f:
-                    label += f"{x_column}: {float(row[x_column]):.2f}\n{y_column}: {float(row[y_column]):.2f}\n"
-                if show_labels_vowel:
-                    label += f"{row['vowel']}\n"
-                if show_labels_speaker:
-                    label += f"{row['speaker']}\n"
-                if label:
-                    self.ax.annotate(label.strip(), (float(row[y_column]), float(row[x_column])),
-                                     textcoords="offset points", xytext=(0, 5),
-                                     ha='center', va='bottom', fontsize=8)
-
-            # Show labels based on checkbox states
-            show_labels_f = self.checkbox_show_labels_f.isChecked()
-            show_labels_vowel = self.checkbox_show_labels_vowel.isChecked()
-            show_labels_speaker = self.checkbox_show_labels_speaker.isChecked()
-
-            for index, row in subset.iterrows():
-                label = ''
-
-                if show_labels_f:
-                    label += f"{x_column}: {row[x_column]:.2f}\n{y_column}: {row[y_column]:.2f}\n"
-
-                if show_labels_vowel:
-                    label += f"{row['vowel']}\n"
-
-                if show_labels_speaker:
-                    label += f"{row['speaker']}\n"
-
-                # Add label if any information is present
-                if label:
-                    self.ax.annotate(label.strip(), (row[y_column], row[x_column]), textcoords="offset points",
-                                     xytext=(0, 5), ha='center', va='bottom', fontsize=8)
-
-        if self.connect_ellipse_action.isChecked():
-            if self.group_by_vowel_action.isChecked():
-                group_by = 'vowel'
-            else:
-                group_by = 'speaker'
-
-            for key in self.data[group_by].unique():
-                subset = self.data[self.data[group_by] == key]
-
-                # Ensure the subset has enough data points and variability
-                # Coerce and joint-filter
-                x = pd.to_numeric(subset[x_column], errors="coerce")
-                y = pd.to_numeric(subset[y_column], errors="coerce")
-                mask = np.isfinite(x) & np.isfinite(y)
-                if mask.sum() < 2 or x[mask].nunique() < 2 or y[mask].nunique() < 2:
-                    continue
-
-                # Build a (N, 2) float array in (y, x) order (to match your plotting)
-                yx = np.column_stack([y[mask].to_numpy(dtype=float),
-                                      x[mask].to_numpy(dtype=float)])
-
-                mean = yx.mean(axis=0)  # [mean_y, mean_x]
-                cov = np.cov(yx, rowvar=False)  # 2×2 covariance on columns
-
-                # Eigenvalues and eigenvectors of the covariance matrix
-                eigvals, eigvecs = np.linalg.eigh(cov)
-
-                # Sort eigenvalues and corresponding eigenvectors
-                order = eigvals.argsort()[::-1]
-                eigvals, eigvecs = eigvals[order], eigvecs[:, order]
-
-                # Scaling factor for the 67% confidence ellipse
-                # https://joeystanley.com/blog/making-vowel-plots-in-r-part-1/#ellipses
-                scale_factor = np.sqrt(chi2.ppf(0.67, df=2))
-
-                # Calculate width and height of the ellipse
-                width, height = 2 * scale_factor * np.sqrt(eigvals)
-
-                # Calculate the angle of the ellipse
-                angle = np.degrees(np.arctan2(*eigvecs[:, 0][::-1]))
-
-                # Determine the color based on the current grouping
-                ell_color = colors[key]
-
-                # Define transparency
-                alpha = 0.2
-
-                # Create an ellipse
-                ell = Ellipse(xy=(mean[0], mean[1]),
-                              width=width, height=height,
-                              angle=angle,
-                              edgecolor=ell_color, fc=ell_color, lw=1, alpha=alpha)
-                self.ax.add_patch(ell)
-
-                # Add label to the center of the ellipse
-                if self.show_center_info_action.isChecked():
-                    self.ax.text(mean[0], mean[1], key, color='black', ha='center', va='center', fontsize=10)
-
-        if self.connect_qhull_action.isChecked() and len(self.data) >= 3:
-            group_by = 'vowel' if self.group_by_vowel_action.isChecked() else 'speaker'
-
-            for key, group in self.data.groupby(group_by):
-                # Skip NaN group keys (cannot color/label them reliably)
-                if pd.isna(key):
-                    continue
-
-                # Coerce to numeric and joint-filter finite rows
-                gx = pd.to_numeric(group[x_column], errors="coerce")
-                gy = pd.to_numeric(group[y_column], errors="coerce")
-                gmask = np.isfinite(gx) & np.isfinite(gy)
-
-                # Build a strict float64 (N,2) array in (y, x) order
-                points = np.column_stack([
-                    gy[gmask].to_numpy(dtype=np.float64, copy=False),
-                    gx[gmask].to_numpy(dtype=np.float64, copy=False)
-                ])
-
-                # Need at least 3 non-collinear, unique points for a hull
-                if points.shape[0] < 3:
-                    continue
-                if np.unique(points, axis=0).shape[0] < 3:
-                    continue
-                try:
-                    # Guard against degenerate rank (collinear points)
-                    if np.linalg.matrix_rank(points) < 2:
-                        QMessageBox.critical(self, "Error",
-                                             f"The input data for {group_by} '{key}' is less than 2-dimensional.")
-                        continue
-
-                    hull = ConvexHull(points)
-                    face = colors.get(key, plt.cm.viridis(0.5))  # fallback color if key missing
-                    polygon = plt.Polygon(points[hull.vertices], closed=True, alpha=0.2,
-                                          label=key, facecolor=face)
-                    self.ax.add_patch(polygon)
-
-                    # Centroid of the hull for labeling
-                    centroid = np.mean(points[hull.vertices], axis=0)
-                    if self.show_center_info_action.isChecked():
-                        self.ax.text(centroid[0], centroid[1], str(key),
-                                     color='black', ha='center', va='center', fontsize=10)
-
-                except Exception as e:
-                    QMessageBox.critical(self, "Error",
-                                         f"Qhull error for {group_by} '{key}': {str(e)}")
-
-        custom_title = self.edit_title.text()
-        if self.checkbox_no_title.isChecked():
-            self.ax.set_title("", pad=25)
-        else:
-            self.ax.set_title(custom_title if custom_title else "Vowel Space(s)", pad=25)
-
-        show_legend = self.checkbox_show_legend.isChecked()
-        # Remove previous legend if exists
-        legend = self.ax.get_legend()
-        if legend:
-            legend.remove()
-
-        if show_legend:
-            handles, labels = self.ax.get_legend_handles_labels()
-            if handles and labels:
-                self.ax.legend(loc='lower left', bbox_to_anchor=(1.05, 0))
-
-        show_grid = self.checkbox_show_grids.isChecked()
-        if show_grid:
-            self.ax.grid(True, linestyle='--', linewidth=0.5)
-        else:
-            self.ax.grid(False)
-
-        # Set labels for the axes, inverted, that is, if needed...
-        '''custom_label_x = self.edit_label_x.text()
-        custom_label_y = self.edit_label_y.text()
-        if self.checkbox_custom_labels.isChecked():
-            self.ax.set_xlabel(custom_label_x, pad=25)
-            self.ax.set_ylabel(custom_label_y, pad=25)
-        else:'''
-        self.ax.set_xlabel(y_column)
-        self.ax.set_ylabel(x_column)
-
-        # Position of the rulers
-        self.ax.yaxis.tick_right()
-        self.ax.xaxis.tick_top()
-
-        # Invert axes to resemble vowel space
-        # plt.gca().invert_xaxis()
-        # plt.gca().invert_yaxis() this is very buggy and doesn't work consistently for some reason
-        self.ax.invert_xaxis()
-        self.ax.invert_yaxis()
-
-        # Position the axes
-        self.ax.xaxis.set_label_position("bottom")
-        self.ax.xaxis.set_ticks_position("top")
-        self.ax.yaxis.set_label_position("left")
-        self.ax.yaxis.set_ticks_position("right")
+        messages = self.vowel_plot.draw(self.data, x_column, y_column, **self.plot_options())
+        for message in messages:
+            QMessageBox.critical(self, "Error", message)
 
         # Use tight_layout to minimize gaps between the window and the scatterplot
-        self.figure.tight_layout()
-        self.canvas.draw()
+        with profiler.span('tight_layout'):
+            self.figure.tight_layout()
+        with profiler.span('canvas.draw'):
+            self.canvas.draw()
 
     # Normalization!
+    # Every callback goes through the derived-data cache: the result for (method, formants, speaker column,
+    # data version) is computed once and switching back to it later is a lookup.
+    @profiler.timed('normalization')
+    def apply_normalization(self, method, formants=None):
+        if formants is None:
+            formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
+        profiler.note(method=method, rows=len(self.store))
+        with profiler.span('derive columns'):
+            derived = self.derived_cache.derive(self.data, method, formants)
+
+        # Only the columns whose values change are recorded for undo (None for a new column)
+        with profiler.span('undo record') as span:
+            previous = {}
+            for column in derived.columns:
+                values = self.store.column_values(column)
+                if values is None or values.dtype == object \
+                        or not np.array_equal(values, derived[column].to_numpy(), equal_nan=True):
+                    previous[column] = values
+            if previous:
+                self.history.record(ColumnValues(previous, method))
+            span.note(changed=len(previous))
+
+        with profiler.span('store columns'):
+            for column in derived.columns:
+                self.data[column] = derived[column].to_numpy()
+        self.request_render('transform')
+
     def lobify(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = lobanov_normalization(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('lobanov')
 
     def diffBark(self, arg):
-        self.data = bark_difference(self.data)
-        self.update_scatterplot()
+        self.apply_normalization('bark_difference', ['f1', 'f2', 'f3'])
 
     def Nearey1(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = nearey1(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('nearey1')
 
     def Nearey2(self, exp=False):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = nearey2(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('nearey2')
 
     def metricBark(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = bark_transform(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('bark')
 
     def normLog(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = log_transform(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('log')
 
     def normMel(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = mel_transform(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('mel')
 
     def normErb(self, arg):
-        formants = [self.dropdown_x_axis.currentText(), self.dropdown_y_axis.currentText()]
-        self.data = erb_transform(self.data, formants)
-        self.update_scatterplot()
+        self.apply_normalization('erb')
 
     # Takes delay event into account when resizing the app to avoid lag
     def custom_resize_event(self, event):
@@ -766,25 +807,18 @@ class VowelSpaceVisualizer(QWidget):
 
     # Takes delay event into account when resizing the scatterplot to avoid lag
     def delayed_update_scatterplot(self):
-        self.resize_timer.stop()  # Stops the timer to ensure it only triggers o
-        # nce
-        self.update_scatterplot()
-
-        # Uses the timer to avoid lag - will return to that
-        # self.resize_timer.stop()
-        # self.update_scatterplot()
+        self.resize_timer.stop()  # Stops the timer to ensure it only triggers once
+        # A new size only needs a new layout, the data on the plot is the same
+        self.request_render('layout')
 
     # Clears all the data from the dataframe
     def clear_data(self):
-        # Get a list of all current column names
-        existing_columns = list(self.data.columns)
-
-        # Clear existing data in all columns
-        for column in existing_columns:
-            self.data[column] = pd.Series(dtype=self.data[column].dtype)  # Clear data in each column
-
-        # Reset self.data to an empty DataFrame with original columns
-        self.data = pd.DataFrame(columns=existing_columns)
+        # Keeps the current columns
+        if len(self.store):
+            self.history.record(RowRange(0, self.store.take(0)))
+        self.store.clear()
+        self.running_stats.reset()
+        self.derived_cache.invalidate_rows()
 
         # Update the scatterplot after clearing data
         self.update_scatterplot()
@@ -795,11 +829,7 @@ class VowelSpaceVisualizer(QWidget):
         file_name = f"{custom_title}.jpg"
 
         if file_name:
-            try:
-                self.figure.savefig(file_name, format='jpeg', dpi=1200)
-                QMessageBox.information(self, "Success", "Scatterplot saved successfully.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error saving scatterplot: {str(e)}")
+            self.export_scatterplot(file_name, 'jpeg')
 
     # Lets the user to make further changes to the file to be saved
     def save_scatterplot(self):
@@ -810,14 +840,43 @@ class VowelSpaceVisualizer(QWidget):
                                                    options=options)
 
         if file_name:
-            try:
-                # Determine file format based on the selected file extension
-                file_format = 'jpeg' if file_name.lower().endswith(('.jpg', '.jpeg')) else 'png'
+            # Determine file format based on the selected file extension
+            file_format = 'jpeg' if file_name.lower().endswith(('.jpg', '.jpeg')) else 'png'
+            self.export_scatterplot(file_name, file_format)
 
-                self.figure.savefig(file_name, format=file_format, dpi=1200)
-                QMessageBox.information(self, "Success", "Scatterplot saved successfully.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error saving scatterplot: {str(e)}")
+    # Queues the scatterplot as it is now; the image is rendered in the background while the user keeps working
+    def export_scatterplot(self, file_name, file_format):
+        try:
+            self.flush_render()
+            self.export_queue.submit(self.figure, file_name, file_format, 1200)
+            self.status_label.setText(f"Saving {file_name}... ({self.export_queue.pending} in queue)")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error saving scatterplot: {str(e)}")
+
+    def export_progress(self, export_id, percent, message):
+        self.status_label.setText(f"{message} ({percent}%), {self.export_queue.pending} in queue")
+
+    def export_finished(self, export_id, file_name, error):
+        waiting = f" {self.export_queue.pending} more in queue." if self.export_queue.pending else ""
+        if error == 'Cancelled':
+            self.status_label.setText(f"Saving {file_name} was cancelled.{waiting}")
+        elif error:
+            self.status_label.setText(waiting.strip())
+            QMessageBox.critical(self, "Error", f"Error saving scatterplot: {error}")
+        else:
+            self.status_label.setText(f"Scatterplot saved successfully as {file_name}.{waiting}")
+
+    def cancel_exports(self):
+        self.export_queue.cancel()
+
+    def closeEvent(self, event):
+        self.export_queue.shutdown()
+        if self.dataset_import is not None:
+            self.dataset_import.cancel()
+            self.dataset_import.wait(2000)
+        if self.performance_panel is not None:
+            self.performance_panel.close()
+        super().closeEvent(event)
 
     # Saves the current dataframe as an .xlsx file
     def save_data_to_excel(self):
@@ -833,75 +892,215 @@ class VowelSpaceVisualizer(QWidget):
 
         if file_name:
             try:
-                # Remove columns that have no data
+                # Leave out the columns that have no data (only from the file, the session keeps them)
                 columns_to_keep = self.data.columns[self.data.count() > 0]
-                self.data = self.data[columns_to_keep]
+                table = self.data[columns_to_keep]
 
                 # Determine file format based on the selected file extension
                 file_format = 'xls' if file_name.lower().endswith('.xls') else 'xlsx'
 
-                self.data.to_excel(file_name, index=False, sheet_name='Sheet1', engine='openpyxl')
+                table.to_excel(file_name, index=False, sheet_name='Sheet1', engine='openpyxl')
                 QMessageBox.information(self, "Success", f"Data saved to {file_format} successfully.")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error saving data to {file_format}: {str(e)}")
 
-    # Imports data from an .xls or .xlsx file. The files should have columns named "vowel", "speaker", and F values.
-    def import_data_from_excel(self):
-        self.clear_data()  # Clears the already existing data on the dataframe before the importing
+    # Saves the session to its project folder, writing only what changed since the last save
+    def save_project(self):
+        if self.project_path is None:
+            self.save_project_as()
+        else:
+            self.write_project(self.project_path)
 
+    def save_project_as(self):
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        file_name, _ = QFileDialog.getOpenFileName(self, "Import Data from Dataset", "",
-                                                   "Excel Files (*.xls *.xlsx);;All Files (*)", options=options)
-
-        if file_name:
-            try:
-                # Read Excel file with specific na_values to handle various representations of missing values
-                na_values = ['', 'NaN', 'nan', 'N/A', 'NA', 'n/a']
-                new_data = pd.read_excel(file_name, na_values=na_values)
-
-                # Ensure all formant columns are treated as numeric and handle errors gracefully
-                formant_columns = ['f0', 'f1', 'f2', 'f3', 'f4']
-                for col in formant_columns:
-                    if col in new_data.columns:
-                        new_data[col] = pd.to_numeric(new_data[col], errors='coerce')
-
-                # Set 'speaker' column to an empty string if it doesn't exist
-                if 'speaker' not in new_data.columns:
-                    new_data['speaker'] = ''
+        custom_title = self.edit_title.text() or "Vowel Space(s)"
+        path, _ = QFileDialog.getSaveFileName(self, "Save Project", f"{custom_title}{PROJECT_EXTENSION}",
+                                              f"VowSpace Projects (*{PROJECT_EXTENSION})", options=options)
+        if path:
+            if not path.endswith(PROJECT_EXTENSION):
+                path += PROJECT_EXTENSION
+            self.write_project(path)
+
+    def write_project(self, path):
+        try:
+            extras = {
+                'view': self.view_state(),
+                'derived': self.derived_records(),
+                'geometry': geometry_records(self.vowel_plot.geometry),
+            }
+            previous = self.project_manifest if path == self.project_path else None
+            self.project_manifest = save_project(path, self.store, extras, previous)
+            self.project_path = path
+            self.status_label.setText(f"Project saved to {path}.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error saving project: {str(e)}")
+
+    def open_project(self):
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        path = QFileDialog.getExistingDirectory(self, "Open Project", "", options=options)
+        if not path:
+            return
+        try:
+            data, manifest = load_project(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error opening project: {str(e)}")
+            return
 
-                # Fill missing values in 'speaker' column with 'N/A'
-                new_data['speaker'] = new_data['speaker'].fillna('N/A')
+        self.store.replace(data)
+        self.store.mark_saved()
+        self.history.clear()
+        self.running_stats.rebuild(self.data)
+        self.derived_cache.invalidate_rows()
+        for entry in manifest.get('derived', []):
+            if all(column in self.data.columns for column in entry['columns']):
+                self.derived_cache.seed(entry['method'], entry['formants'], entry['group_column'],
+                                        self.data[entry['columns']].copy())
+        restore_geometry(self.vowel_plot.geometry, manifest.get('geometry', []))
+        self.restore_view_state(manifest.get('view', {}))
+        self.project_path, self.project_manifest = path, manifest
+        self.status_label.setText(f"Opened project {path}.")
+        self.update_scatterplot()
 
-                # Drop rows with any missing values after conversion
-                new_data = new_data.dropna()
+    # Plot options, normalizations and axes, as saved in a project
+    def view_state(self):
+        return {
+            'checked': {name: getattr(self, name).isChecked() for name in VIEW_CHECKBOXES},
+            'x_axis': self.dropdown_x_axis.currentText(),
+            'y_axis': self.dropdown_y_axis.currentText(),
+            'title': self.edit_title.text(),
+            'label_budget': self.label_budget,
+        }
 
-                # Concatenate new data with existing data
-                self.data = pd.concat([self.data, new_data], ignore_index=True)
+    def restore_view_state(self, state):
+        for name, checked in state.get('checked', {}).items():
+            if name in VIEW_CHECKBOXES:
+                getattr(self, name).setChecked(checked)
+        if 'x_axis' in state:
+            self.dropdown_x_axis.setCurrentText(state['x_axis'])
+        if 'y_axis' in state:
+            self.dropdown_y_axis.setCurrentText(state['y_axis'])
+        self.edit_title.setText(state.get('title', ''))
+        self.label_budget = state.get('label_budget', self.label_budget)
+
+    # The cached normalization results whose columns are in the data as they are, so a project only has to
+    # name them; opening it puts them back in the cache
+    def derived_records(self):
+        records = []
+        for method, formants, group_column, result in self.derived_cache.current_entries():
+            columns = list(result.columns)
+            if all(column in self.data.columns and self.data[column].equals(result[column]) for column in columns):
+                records.append({'method': method, 'formants': formants, 'group_column': group_column,
+                                'columns': columns})
+        return records
+
+    # Imports data from an Excel, CSV/TSV, Parquet or Feather file.
+    # The files should have columns named "vowel", "speaker", and F values.
+    # The file is read in batches in the background; each batch is added as it arrives (see import_batch).
+    def import_data_from_excel(self):
+        if self.dataset_import is not None:
+            self.show_error_message("An import is already running.")
+            return
 
-                # import_data_from_excel
-                self.df_editor = DFEditor(self.data, visualizer=self)
-                self.df_editor.show()
+        # Clearing and importing are undone together
+        with self.history.grouped():
+            self.clear_data()  # Clears the already existing data on the dataframe before the importing
+
+            options = QFileDialog.Options()
+            options |= QFileDialog.DontUseNativeDialog
+            file_name, _ = QFileDialog.getOpenFileName(self, "Import Data from Dataset", "",
+                                                       DATASET_FILTER, options=options)
+            if not file_name:
+                return
+            # All the rows of the import, however many batches they come in
+            self.history.record(RowRange(len(self.store)))
+
+        self.dataset_import = DatasetImport(file_name, parent=self)
+        self.dataset_import.batch_ready.connect(self.import_batch)
+        self.dataset_import.progress.connect(self.import_progress)
+        self.dataset_import.finished_import.connect(self.import_finished)
+        self.import_drawn_at = float('-inf')
+        self.import_started_at = time.perf_counter()
+        self.status_label.setText(f"Importing {file_name}...")
+        self.dataset_import.start()
+
+    @profiler.timed('import batch')
+    def import_batch(self, batch):
+        profiler.note(rows=len(batch))
+        self.store.extend(batch)
+        self.dataset_import.batch_done()
+        self.derived_cache.invalidate_rows()
+
+        # The first rows are drawn right away, then the plot catches up at most once a second
+        now = time.perf_counter()
+        if now - self.import_drawn_at >= 1:
+            self.import_drawn_at = now
+            self.update_scatterplot()
 
-                # Update scatterplot after importing data
-                self.update_scatterplot()
+    def import_progress(self, percent, message):
+        self.status_label.setText(f"{message} ({percent}%), {len(self.store)} rows")
 
-                QMessageBox.information(self, "Success", "Data imported from Excel successfully.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error importing data from Excel: {str(e)}")
+    def import_finished(self, error):
+        file_name = self.dataset_import.file_name
+        self.dataset_import = None
+        with profiler.span('import statistics', rows=len(self.store)):
+            self.running_stats.rebuild(self.data)
+        self.derived_cache.invalidate_rows()
+        self.update_scatterplot()
+        profiler.record('import_data_from_excel', self.import_started_at, rows=len(self.store),
+                        file=os.path.basename(file_name), error=error)
+
+        if error == 'Cancelled':
+            self.status_label.setText(f"Import cancelled, {len(self.store)} rows were imported.")
+        elif error:
+            self.status_label.setText('')
+            QMessageBox.critical(self, "Error", f"Error importing data: {error}")
+        else:
+            self.status_label.setText(f"Imported {len(self.store)} rows.")
+            self.open_df_editor()
+            QMessageBox.information(self, "Success", "Data imported successfully.")
+
+    def cancel_import(self):
+        if self.dataset_import is not None:
+            self.dataset_import.cancel()
+
+    # Adds a whole table of rows at once (imports, batch formant extraction)
+    def append_data(self, new_data, redraw=True):
+        self.history.record(RowRange(len(self.store)))
+        self.store.extend(new_data)
+        self.running_stats.rebuild(self.data)
+        self.derived_cache.invalidate_rows()
+        if redraw:
+            self.update_scatterplot()
 
     # Shows an IPA keyboard
     def show_IPA(self):
+        from components.ipa_window import IPAWindow
+
         self.ipa_window = IPAWindow(self)
         self.ipa_window.exec_()
 
     # Opens Dataframe editor
     def open_df_editor(self):
-        self.df_editor = DFEditor(self.data)  # Passinf data to the DFEditor
+        from components.df_editor import DFEditor
+
+        self.df_editor = DFEditor(self.data, visualizer=self)  # Passinf data to the DFEditor
         self.df_editor.show()
 
+    # Shows the timings of the most recent operations; the panel keeps its list while it's hidden
+    def show_performance_panel(self):
+        if self.performance_panel is None:
+            from components.performance_panel import PerformancePanel
+
+            self.performance_panel = PerformancePanel()
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
     # Opens Audio Analysis Tools window.
     def audio_analysis_tools(self):
+        from components.audio_tool import AudioAnalysisTool
+
         # Creates a new instance of AudioAnalysisTools if not open
         self.audio_tools_window = AudioAnalysisTool(visualizer=self)
         self.audio_tools_window.show()
\ No newline at end of file